@@ -3,17 +3,18 @@
 Analysis script to verify the synthetic orders data patterns
 """
 
-import pandas as pd
 import numpy as np
 from datetime import datetime
 import matplotlib.pyplot as plt
 
+from data_loader import load_orders
+
 def analyze_synthetic_data(filename):
     """Analyze the synthetic data to verify patterns."""
     print(f"🔍 Analyzing synthetic data: {filename}")
     
-    # Load the data
-    df = pd.read_csv(filename)
+    # Load the data (typed columns, cached next to the CSV)
+    df = load_orders(filename)
     
     # Basic statistics
     print(f"\n📊 Basic Statistics:")
@@ -23,12 +24,12 @@ def analyze_synthetic_data(filename):
     
     # Filter main order rows (first line item per order)
     main_orders = df[df['Financial Status'].notna() & (df['Financial Status'] != '')].copy()
+    if main_orders.empty:
+        print(f"\n⚠️  No orders to analyze")
+        return
     
-    # Convert dates
-    main_orders['Created at'] = pd.to_datetime(main_orders['Created at'])
     main_orders['Month'] = main_orders['Created at'].dt.to_period('M')
     main_orders['Weekday'] = main_orders['Created at'].dt.dayofweek
-    main_orders['Total'] = main_orders['Total'].astype(float)
     
     print(f"\n💰 Revenue Analysis:")
     print(f"   - Total revenue: ${main_orders['Total'].sum():,.2f}")
@@ -56,7 +57,7 @@ def analyze_synthetic_data(filename):
     
     weekend_avg = len(weekend_orders) / (len(main_orders['Created at'].dt.date.unique()) * 2/7)
     weekday_avg = len(weekday_orders) / (len(main_orders['Created at'].dt.date.unique()) * 5/7)
-    weekend_boost = weekend_avg / weekday_avg
+    weekend_boost = weekend_avg / weekday_avg if weekday_avg else float('nan')
     
     print(f"\n🎯 Weekend Analysis:")
     print(f"   - Weekend orders: {len(weekend_orders):,}")
@@ -81,13 +82,31 @@ def analyze_synthetic_data(filename):
     print(f"\n✅ Analysis complete!")
 
 if __name__ == "__main__":
-    # Find the most recent synthetic file
-    import glob
-    import os
-    
-    synthetic_files = glob.glob("toy_sales_synthetic_*.csv")
-    if synthetic_files:
-        latest_file = max(synthetic_files, key=os.path.getctime)
-        analyze_synthetic_data(latest_file)
+    import argparse
+
+    from dataset_catalog import add_lookup_arguments, lookup_from_args
+
+    parser = argparse.ArgumentParser(description="Verify the synthetic orders data patterns")
+    parser.add_argument('file', nargs='?', help="Export to analyze (default: newest matching dataset in the catalog)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Reuse saved summary state and only scan rows appended since the last run")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Constant-memory mode: approximate quantiles and counts from mergeable sketches")
+    add_lookup_arguments(parser)
+    args = parser.parse_args()
+
+    # Newest matching dataset from the catalog unless a file is given
+    latest_file = args.file or lookup_from_args(args)
+    if latest_file is None:
+        print("❌ No matching synthetic dataset in the catalog! Generate one, or register an existing file with:")
+        print("   python dataset_catalog.py register <file>")
+    elif args.incremental:
+        from incremental_analytics import analyze_incremental
+
+        analyze_incremental(latest_file)
+    elif args.streaming:
+        from streaming_stats import analyze_streaming
+
+        analyze_streaming(latest_file)
     else:
-        print("❌ No synthetic data files found!")
+        analyze_synthetic_data(latest_file)
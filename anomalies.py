@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Anomaly Injection for Forezia Mock Data
+Ground-truth spikes, level shifts, dropouts and stock-out runs over SKUs x days demand
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Label codes are positions in this tuple (0 = normal day). Injected types are
+# applied in order, so a later type wins where two overlap (a stock-out hides a spike).
+ANOMALY_LABELS = ('none', 'spike', 'level_shift', 'dropout', 'stockout',
+                  # store-wide days produced by generate_synthetic_data itself
+                  'skipped_day', 'zero_order_day')
+SPIKE, LEVEL_SHIFT, DROPOUT, STOCKOUT, SKIPPED_DAY, ZERO_ORDER_DAY = range(1, len(ANOMALY_LABELS))
+ZERO_DEMAND_LABELS = (DROPOUT, STOCKOUT, SKIPPED_DAY, ZERO_ORDER_DAY)
+LABEL_FIELDNAMES = ['sku', 'date', 'anomaly']
+
+
+@dataclass(frozen=True)
+class AnomalySpec:
+    """Rates are per SKU-day; ranges are ``(low, high)`` drawn uniformly per event."""
+    spike_rate: float = 0.005
+    spike_magnitude: Tuple[float, float] = (2.0, 5.0)       # demand multiplier
+    level_shift_rate: float = 0.001                         # chance a shift starts
+    level_shift_magnitude: Tuple[float, float] = (0.4, 1.8)
+    level_shift_days: Tuple[float, float] = (14, 60)
+    dropout_rate: float = 0.005                             # single zero days
+    stockout_rate: float = 0.002                            # chance a stock-out starts
+    stockout_days: Tuple[float, float] = (3, 10)
+
+
+def _runs(starts: np.ndarray, lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Expand run starts into a mask, plus the start column covering each cell.
+
+    ``lengths`` holds one length per ``True`` in ``starts`` (row-major).
+    Each cell's run end is the running maximum of the ends started so far,
+    so all runs of all rows are expanded without a Python loop.
+    """
+    rows, cols = np.nonzero(starts)
+    ends = np.zeros(starts.shape, dtype=np.int32)
+    ends[rows, cols] = cols + lengths
+    days = np.arange(starts.shape[1], dtype=np.int32)
+    in_run = days < np.maximum.accumulate(ends, axis=1)
+    latest_start = np.maximum.accumulate(np.where(starts, days, 0), axis=1)
+    return in_run, latest_start
+
+
+def anomaly_multipliers(shape: Tuple[int, int], spec: AnomalySpec = AnomalySpec(),
+                        rng: Optional[np.random.Generator] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Draw demand multipliers and labels for a ``(skus, days)`` series.
+
+    Returns ``(multipliers, labels)``: float multipliers (1.0 = untouched,
+    0.0 = no demand) and int8 codes into ``ANOMALY_LABELS``. Without ``rng``
+    the draws are seeded from NumPy's global random state (``np.random.seed``).
+    """
+    rng = rng if rng is not None else np.random.default_rng(np.random.randint(0, 2 ** 31))
+    multipliers = np.ones(shape)
+    labels = np.zeros(shape, dtype=np.int8)
+
+    spikes = rng.random(shape) < spec.spike_rate
+    multipliers[spikes] = rng.uniform(*spec.spike_magnitude, size=int(spikes.sum()))
+    labels[spikes] = SPIKE
+
+    starts = rng.random(shape) < spec.level_shift_rate
+    lo, hi = spec.level_shift_days
+    shifted, start_col = _runs(starts, rng.integers(int(lo), int(hi) + 1, size=int(starts.sum())))
+    magnitude = np.ones(shape)
+    magnitude[starts] = rng.uniform(*spec.level_shift_magnitude, size=int(starts.sum()))
+    magnitude = np.take_along_axis(magnitude, start_col, axis=1)
+    multipliers[shifted] *= magnitude[shifted]
+    labels[shifted] = LEVEL_SHIFT
+
+    dropouts = rng.random(shape) < spec.dropout_rate
+    multipliers[dropouts] = 0.0
+    labels[dropouts] = DROPOUT
+
+    starts = rng.random(shape) < spec.stockout_rate
+    lo, hi = spec.stockout_days
+    stocked_out, _ = _runs(starts, rng.integers(int(lo), int(hi) + 1, size=int(starts.sum())))
+    multipliers[stocked_out] = 0.0
+    labels[stocked_out] = STOCKOUT
+    return multipliers, labels
+
+
+def inject_anomalies(matrix: np.ndarray, spec: AnomalySpec = AnomalySpec(),
+                     rng: Optional[np.random.Generator] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Apply ``anomaly_multipliers`` to an integer sales matrix; returns ``(sales, labels)``.
+
+    Spikes are applied to at least one unit of demand, so a spike on a zero
+    day is still visible.
+    """
+    multipliers, labels = anomaly_multipliers(matrix.shape, spec, rng)
+    base = np.where(labels == SPIKE, np.maximum(matrix, 1), matrix)
+    return np.rint(base * multipliers).astype(matrix.dtype), labels
+
+
+def labels_frame(labels: np.ndarray, skus: Sequence[str], dates: Sequence) -> pd.DataFrame:
+    """Long ``sku``/``date``/``anomaly`` frame of every labelled cell (SKU-major order)."""
+    rows, cols = np.nonzero(labels)
+    return pd.DataFrame({
+        'sku': np.asarray(skus, dtype=object)[rows],
+        'date': pd.DatetimeIndex(dates)[cols].strftime('%Y-%m-%d'),
+        'anomaly': np.asarray(ANOMALY_LABELS, dtype=object)[labels[rows, cols]],
+    }, columns=LABEL_FIELDNAMES)
+
+
+def write_labels(path: str, labels: np.ndarray, skus: Sequence[str], dates: Sequence,
+                 compression: Optional[str] = None) -> int:
+    """Write the label sidecar CSV; returns the number of labelled SKU-days."""
+    from output_writer import CompressedCSVWriter
+
+    frame = labels_frame(labels, skus, dates)
+    with CompressedCSVWriter(path, compression=compression) as writer:
+        writer.write_frame(frame)
+    return len(frame)
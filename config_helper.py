@@ -7,6 +7,8 @@ Creates and validates config.json files
 import json
 import os
 
+from generator_config import ConfigError, compile_config
+
 def create_default_config():
     """Create a default config.json file."""
     default_config = {
@@ -89,6 +91,16 @@ def validate_config(config_path='config.json'):
             else:
                 print("✅ Discount probabilities sum correctly")
         
+        # Strict validation - the same checks the generator runs before generating
+        try:
+            compile_config(config, source=config_path)
+        except ConfigError as e:
+            print(f"❌ Config has {len(e.errors)} error(s); the generator will refuse to run:")
+            for error in e.errors:
+                print(f"   - {error}")
+            return None
+        print("✅ Config passes strict validation")
+        
         return config
         
     except FileNotFoundError:
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Correlated Cross-SKU Demand for Forezia Mock Data
+Low-rank factor model for daily SKU demand multipliers, with complement and substitute groups per category
+"""
+
+from dataclasses import dataclass
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from hierarchy import group_codes
+
+
+@dataclass(frozen=True)
+class CorrelationSpec:
+    """Standard deviations are on the log scale of a SKU's daily demand."""
+    market_std: float = 0.10             # one factor shared by every SKU
+    category_std: float = 0.15           # one factor per category
+    complement_std: float = 0.20         # one factor per complement group (bought together)
+    complement_group_size: int = 3
+    substitute_std: float = 0.25         # zero-sum shift of demand inside each substitute group
+    substitute_group_size: int = 2
+    idiosyncratic_std: float = 0.10      # independent per SKU
+    persistence: float = 0.5             # AR(1) coefficient of every latent series
+    complement_basket_boost: float = 3.0  # weight multiplier for complements of an item already in the order
+
+
+def demand_groups(category_codes: Sequence[int], complement_size: int, substitute_size: int,
+                  rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Draw complement and substitute group ids per SKU; groups never span categories.
+
+    Each category's SKUs are shuffled and cut into complement groups of
+    ``complement_size``. A substitute group takes the SKUs at the same position
+    in ``substitute_size`` neighbouring complement groups, so substitutes are
+    never also complements of each other. Trailing groups may be smaller.
+    """
+    codes = np.asarray(category_codes, dtype=np.int64)
+    order = rng.permutation(len(codes))
+    order = order[np.argsort(codes[order], kind='stable')]
+    sorted_codes = codes[order]
+    rank = np.arange(len(codes)) - np.searchsorted(sorted_codes, sorted_codes)   # position inside the category
+    bundle, position = np.divmod(rank, complement_size)
+    complement, substitute = np.empty(len(codes), dtype=np.int64), np.empty(len(codes), dtype=np.int64)
+    for out, keys in ((complement, [sorted_codes, bundle]),
+                      (substitute, [sorted_codes, bundle // substitute_size, position])):
+        _, ids = np.unique(np.stack(keys), axis=1, return_inverse=True)
+        out[order] = ids.reshape(-1)
+    return complement, substitute
+
+
+class DemandFactorModel:
+    """Daily demand multipliers for many SKUs from shared latent factors.
+
+    The log multiplier of SKU ``i`` is
+
+        market * f + category * f[cat(i)] + complement * f[comp(i)]
+        + substitute * (e[i] - mean of e over sub(i)) + idiosyncratic * u[i]
+
+    with every latent series a unit-variance AR(1). The covariance is low rank
+    (1 + categories + complement groups) plus a block-centered diagonal, so one
+    day costs O(SKUs) and no covariance matrix is ever factorized. Centering
+    makes substitutes negatively correlated: what one gains, the others lose.
+    Multipliers are log-normal with mean 1.
+    """
+
+    def __init__(self, categories: Sequence[str], spec: CorrelationSpec = CorrelationSpec(),
+                 rng: Optional[np.random.Generator] = None):
+        self.spec = spec
+        # Without ``rng``, seed from NumPy's global state so np.random.seed(...) reproduces the model
+        self.rng = rng if rng is not None else np.random.default_rng(np.random.randint(0, 2 ** 31))
+        codes, self.category_names = group_codes(list(categories))
+        self.category = np.asarray(codes, dtype=np.int64)
+        self.complement, self.substitute = demand_groups(
+            self.category, spec.complement_group_size, spec.substitute_group_size, self.rng)
+        num_skus = len(self.category)
+        self._substitute_sizes = np.bincount(self.substitute).astype(float)
+        # Rescale the centered shocks back to unit variance (singleton groups get none)
+        sizes = self._substitute_sizes[self.substitute]
+        self._substitute_scale = np.sqrt(np.divide(sizes, sizes - 1, out=np.zeros(num_skus), where=sizes > 1))
+        # Latent state: market, categories, complement groups, substitute shocks, idiosyncratic shocks
+        self._sizes = (1, len(self.category_names), int(self.complement.max()) + 1 if num_skus else 0,
+                       num_skus, num_skus)
+        self._state = None
+        self.log_variance = (spec.market_std ** 2 + spec.category_std ** 2 + spec.complement_std ** 2
+                             + spec.substitute_std ** 2 * (sizes > 1) + spec.idiosyncratic_std ** 2)
+
+    @property
+    def num_factors(self) -> int:
+        """Rank of the shared (low-rank) part of the covariance."""
+        return sum(self._sizes[:3])
+
+    def _step(self) -> np.ndarray:
+        shocks = self.rng.standard_normal(sum(self._sizes))
+        if self._state is None:
+            self._state = shocks
+        else:
+            rho = self.spec.persistence
+            self._state = rho * self._state + np.sqrt(1 - rho ** 2) * shocks
+        return self._state
+
+    def sample(self) -> np.ndarray:
+        """Draw the next day's multiplier for every SKU."""
+        spec = self.spec
+        market, category, complement, substitute, own = np.split(self._step(), np.cumsum(self._sizes)[:-1])
+        group_mean = np.bincount(self.substitute, weights=substitute) / self._substitute_sizes
+        log_demand = (spec.market_std * market
+                      + spec.category_std * category[self.category]
+                      + spec.complement_std * complement[self.complement]
+                      + spec.substitute_std * self._substitute_scale * (substitute - group_mean[self.substitute])
+                      + spec.idiosyncratic_std * own)
+        return np.exp(log_demand - self.log_variance / 2)
+
+    def sample_days(self, num_days: int) -> np.ndarray:
+        """Draw a ``(skus, num_days)`` matrix of consecutive daily multipliers."""
+        out = np.empty((len(self.category), num_days))
+        for day in range(num_days):
+            out[:, day] = self.sample()
+        return out
+
+    def basket_factor(self, chosen: int) -> np.ndarray:
+        """Weight multiplier per SKU once SKU ``chosen`` is in an order.
+
+        Its substitutes (and itself) drop to 0 and its complements get
+        ``complement_basket_boost``; every other SKU keeps 1.
+        """
+        factor = np.where(self.complement == self.complement[chosen], self.spec.complement_basket_boost, 1.0)
+        factor[self.substitute == self.substitute[chosen]] = 0.0
+        factor[chosen] = 0.0
+        return factor
+
+    def log_correlation(self) -> np.ndarray:
+        """Implied SKU x SKU correlation of the log multipliers (dense; for checks on small catalogs)."""
+        spec = self.spec
+
+        def same(groups):
+            return groups[:, None] == groups[None, :]
+
+        sizes = self._substitute_sizes[self.substitute]
+        centered = np.eye(len(sizes)) - same(self.substitute) / sizes[:, None]
+        cov = (spec.market_std ** 2
+               + spec.category_std ** 2 * same(self.category)
+               + spec.complement_std ** 2 * same(self.complement)
+               + spec.substitute_std ** 2 * np.outer(self._substitute_scale, self._substitute_scale) * centered
+               + spec.idiosyncratic_std ** 2 * np.eye(len(sizes)))
+        std = np.sqrt(np.diag(cov))
+        return cov / np.outer(std, std)
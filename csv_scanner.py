@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Parallel CSV Scanner for Shopify-Layout Exports
+Splits an export into record-aligned byte ranges, parses them in worker processes
+and merges per-range partial aggregates (SKU x day units, monthly revenue, ...)
+"""
+
+import argparse
+import csv
+import io
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from output_writer import open_compressed_text, resolve_compression
+
+DEFAULT_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+CHUNK_BYTES = 64 * 1024 * 1024  # bytes per range; bounds each worker's memory
+CHUNK_ROWS = 500000  # rows per chunk when a compressed file is scanned serially
+PEEK_BYTES = 64 * 1024  # look-ahead used to validate a candidate record start
+DATE_COLUMN = 'Created at'
+SKU_COLUMN = 'Lineitem sku'
+
+
+@dataclass(frozen=True)
+class Aggregate:
+    """A mergeable aggregate: ``fn(frame)`` returns a partial result per range.
+
+    By default partials are Series/DataFrames of sums, merged by adding them
+    (``merge_partials``). Other partials (e.g. sketches) pass their own
+    ``merge``, which receives the list of partials. ``fn`` receives string
+    columns and must be a module-level function (it is sent to worker processes).
+    """
+    name: str
+    columns: Tuple[str, ...]
+    fn: Callable[[pd.DataFrame], Any]
+    description: str = ''
+    merge: Optional[Callable[[List[Any]], Any]] = None
+
+    def merge_partials(self, partials: Iterable[Any]) -> Any:
+        return (self.merge or merge_partials)(list(partials))
+
+
+def order_day(frame: pd.DataFrame) -> pd.Series:
+    # Shopify timestamps start with YYYY-MM-DD; slicing avoids a datetime parse
+    return frame[DATE_COLUMN].str[:10]
+
+
+def main_order_rows(frame: pd.DataFrame) -> pd.DataFrame:
+    # First line item of each order carries the order-level fields
+    return frame[frame['Financial Status'] != '']
+
+
+def _sku_day_units(frame):
+    units = pd.to_numeric(frame['Lineitem quantity'], errors='coerce').fillna(0)
+    return units.groupby([frame[SKU_COLUMN].rename('sku'), order_day(frame).rename('date')]).sum().rename('units')
+
+
+def _sku_day_lines(frame):
+    return frame.groupby([frame[SKU_COLUMN].rename('sku'), order_day(frame).rename('date')]).size().rename('lines')
+
+
+def _daily_orders(frame):
+    main = main_order_rows(frame)
+    return main.groupby(order_day(main).rename('date')).size().rename('orders')
+
+
+def _monthly_revenue(frame):
+    main = main_order_rows(frame)
+    total = pd.to_numeric(main['Total'], errors='coerce').fillna(0.0)
+    return total.groupby(main[DATE_COLUMN].str[:7].rename('month')).sum().rename('revenue')
+
+
+AGGREGATES: Dict[str, Aggregate] = {}
+
+
+def register_aggregate(aggregate: Aggregate) -> Aggregate:
+    """Register ``aggregate`` under its name (used by ``scan_csv`` and the CLI)."""
+    AGGREGATES[aggregate.name] = aggregate
+    return aggregate
+
+
+for _aggregate in (
+    Aggregate('sku_day_units', (SKU_COLUMN, DATE_COLUMN, 'Lineitem quantity'), _sku_day_units,
+              "Units sold per SKU and day"),
+    Aggregate('sku_day_lines', (SKU_COLUMN, DATE_COLUMN), _sku_day_lines,
+              "Line items per SKU and day"),
+    Aggregate('daily_orders', ('Financial Status', DATE_COLUMN), _daily_orders,
+              "Orders per day"),
+    Aggregate('monthly_revenue', ('Financial Status', DATE_COLUMN, 'Total'), _monthly_revenue,
+              "Order totals per month"),
+):
+    register_aggregate(_aggregate)
+
+
+# ----------------------------------------------------------------------
+# Record-aligned byte ranges
+# ----------------------------------------------------------------------
+def read_header(path: str) -> Tuple[List[str], int]:
+    """Return the header fields and the byte offset of the first record."""
+    with open(path, 'rb') as f:
+        line = f.readline()
+        return next(csv.reader([line.decode('utf-8-sig')])), f.tell()
+
+
+def _starts_record(f, offset: int, num_fields: int) -> bool:
+    """True if the bytes at ``offset`` parse as one complete record.
+
+    A newline inside a quoted field leaves the rest of the record behind it,
+    which parses to the wrong number of fields, so such offsets are skipped.
+    """
+    f.seek(offset)
+    text = f.read(PEEK_BYTES).decode('utf-8', errors='replace')
+    try:
+        row = next(csv.reader(io.StringIO(text, newline='')))
+    except (StopIteration, csv.Error):
+        return False
+    return len(row) == num_fields
+
+
+def _next_record_start(f, pos: int, num_fields: int, size: int) -> int:
+    """First record start at or after ``pos`` (``size`` if there is none)."""
+    f.seek(pos - 1)
+    f.readline()  # to the end of the line containing byte pos - 1
+    while True:
+        candidate = f.tell()
+        if candidate >= size or _starts_record(f, candidate, num_fields):
+            return min(candidate, size)
+        f.seek(candidate)
+        f.readline()
+
+
+def last_record_end(path: str) -> int:
+    """Offset just past the last complete line (a partially written tail is excluded)."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        pos = size
+        while pos > 0:
+            step = min(PEEK_BYTES, pos)
+            f.seek(pos - step)
+            block = f.read(step)
+            newline = block.rfind(b'\n')
+            if newline >= 0:
+                return pos - step + newline + 1
+            pos -= step
+    return 0
+
+
+def record_ranges(path: str, chunk_bytes: int = CHUNK_BYTES, start: Optional[int] = None,
+                  end: Optional[int] = None) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """Split an uncompressed CSV into ``(start, end)`` byte ranges of whole records.
+
+    ``start`` must be a record start (default: the first record) and ``end``
+    a record end (default: end of file).
+    """
+    header, data_start = read_header(path)
+    size = os.path.getsize(path) if end is None else end
+    bounds = [data_start if start is None else max(start, data_start)]
+    with open(path, 'rb') as f:
+        pos = bounds[0] + chunk_bytes
+        while pos < size:
+            start = _next_record_start(f, pos, len(header), size)
+            if start >= size:
+                break
+            bounds.append(start)
+            pos = start + chunk_bytes
+    bounds.append(size)
+    return header, [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+# ----------------------------------------------------------------------
+# Scanning
+# ----------------------------------------------------------------------
+@dataclass(frozen=True)
+class ScanFilter:
+    """Row filters pushed down into every range (``None`` = no filter)."""
+    start_date: Optional[str] = None  # inclusive, YYYY-MM-DD
+    end_date: Optional[str] = None    # inclusive, YYYY-MM-DD
+    skus: Optional[frozenset] = None
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        cols = ()
+        if self.start_date or self.end_date:
+            cols += (DATE_COLUMN,)
+        if self.skus is not None:
+            cols += (SKU_COLUMN,)
+        return cols
+
+    def apply(self, frame: pd.DataFrame) -> pd.DataFrame:
+        mask = pd.Series(True, index=frame.index)
+        if self.start_date or self.end_date:
+            day = order_day(frame)
+            if self.start_date:
+                mask &= day >= self.start_date
+            if self.end_date:
+                mask &= day <= self.end_date
+        if self.skus is not None:
+            mask &= frame[SKU_COLUMN].isin(self.skus)
+        return frame if mask.all() else frame[mask]
+
+
+def _aggregate_frame(frame: pd.DataFrame, aggregates: Sequence[Aggregate], scan_filter: ScanFilter):
+    frame = scan_filter.apply(frame)
+    return [aggregate.fn(frame) for aggregate in aggregates], len(frame)
+
+
+def _scan_range(path: str, start: int, end: int, header: List[str], usecols: List[str],
+                aggregates: Sequence[Aggregate], scan_filter: ScanFilter):
+    """Worker task: parse one byte range and return its partial aggregates."""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    frame = pd.read_csv(io.BytesIO(data), header=None, names=header, usecols=usecols,
+                        dtype=str, keep_default_na=False)
+    return _aggregate_frame(frame, aggregates, scan_filter)
+
+
+def _scan_stream(path: str, usecols: List[str], aggregates: Sequence[Aggregate],
+                 scan_filter: ScanFilter) -> Iterable:
+    """Compressed input cannot be split by byte offset; scan it in row chunks instead."""
+    with open_compressed_text(path) as f:
+        for frame in pd.read_csv(f, usecols=lambda c: c in usecols, dtype=str,
+                                 keep_default_na=False, chunksize=CHUNK_ROWS):
+            yield _aggregate_frame(frame, aggregates, scan_filter)
+
+
+def merge_partials(partials: Iterable[pd.Series]) -> pd.Series:
+    """Merge partial sums (Series or DataFrames) from several ranges, sorted by key."""
+    partials = [p for p in partials if len(p)]
+    if not partials:
+        return pd.Series(dtype=float)
+    merged = pd.concat(partials)
+    return merged.groupby(level=list(range(merged.index.nlevels))).sum().sort_index()
+
+
+def _scan_pool(pool, path: str, ranges: List[Tuple[int, int]], args: tuple, window: int) -> Iterable:
+    """Range results in order, with at most ``window`` ranges in flight."""
+    pending = deque()
+    for start, end in ranges:
+        pending.append(pool.submit(_scan_range, path, start, end, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _fold(results: Iterable, aggregates: Sequence[Aggregate]) -> Dict[str, Any]:
+    """Merge range results into running totals as they arrive.
+
+    Only one partial per aggregate is held at a time, so memory is bounded
+    by the size of the aggregates, not by the number of ranges.
+    """
+    merged: List[Any] = [None] * len(aggregates)
+    rows = 0
+    for partials, count in results:
+        for i, (aggregate, partial) in enumerate(zip(aggregates, partials)):
+            merged[i] = partial if merged[i] is None else aggregate.merge_partials([merged[i], partial])
+        rows += count
+    out = {agg.name: agg.merge_partials([] if value is None else [value]) for agg, value in zip(aggregates, merged)}
+    out['rows'] = rows
+    return out
+
+
+def scan_csv(path: str, aggregates: Sequence[str] = ('sku_day_units',), start_date: Optional[str] = None,
+             end_date: Optional[str] = None, skus: Optional[Iterable[str]] = None,
+             workers: int = DEFAULT_WORKERS, chunk_bytes: int = CHUNK_BYTES,
+             start_offset: Optional[int] = None, end_offset: Optional[int] = None) -> Dict[str, Any]:
+    """Compute ``aggregates`` over a Shopify-layout export in parallel.
+
+    Only the columns the aggregates and filters need are parsed. Each
+    range returns small partial aggregates, which are merged into running
+    totals as they arrive. Counts are identical for any ``workers`` /
+    ``chunk_bytes``; float sums (revenue) agree up to rounding, since the
+    partials are added in a different order.
+
+    ``start_offset`` / ``end_offset`` restrict the scan to a byte window of
+    whole records (uncompressed files only), e.g. the tail appended since a
+    previous scan.
+
+    Returns a dict of aggregate name -> merged result, plus ``'rows'`` (rows
+    that passed the filters) and ``'end_offset'`` (byte offset covered, or
+    ``None`` for compressed input).
+    """
+    selected = []
+    for name in aggregates:
+        if name not in AGGREGATES:
+            raise KeyError(f"Unknown aggregate '{name}'. Available: {', '.join(sorted(AGGREGATES))}")
+        selected.append(AGGREGATES[name])
+    scan_filter = ScanFilter(start_date, end_date, frozenset(skus) if skus is not None else None)
+    usecols = sorted(set(scan_filter.columns).union(*(a.columns for a in selected)))
+
+    if resolve_compression(path) is not None:
+        if start_offset is not None or end_offset is not None:
+            raise ValueError("Byte offsets are only supported for uncompressed files")
+        merged = _fold(_scan_stream(path, usecols, selected, scan_filter), selected)
+        end_offset = None
+    else:
+        end_offset = os.path.getsize(path) if end_offset is None else end_offset
+        header, ranges = record_ranges(path, chunk_bytes, start_offset, end_offset)
+        missing = [c for c in usecols if c not in header]
+        if missing:
+            raise ValueError(f"{path} has no column(s): {', '.join(missing)}")
+        args = (header, usecols, selected, scan_filter)
+        if workers > 1 and len(ranges) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+                merged = _fold(_scan_pool(pool, path, ranges, args, 2 * workers), selected)
+        else:
+            merged = _fold((_scan_range(path, start, end, *args) for start, end in ranges), selected)
+    merged['end_offset'] = end_offset
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate a Shopify-layout CSV export in parallel")
+    parser.add_argument('input', help="Shopify-layout CSV (.csv, .csv.gz or .csv.zst)")
+    parser.add_argument('--aggregate', action='append', choices=sorted(AGGREGATES),
+                        help="Aggregate to compute (repeatable, default: sku_day_units)")
+    parser.add_argument('--start-date', help="First day to include, YYYY-MM-DD")
+    parser.add_argument('--end-date', help="Last day to include, YYYY-MM-DD")
+    parser.add_argument('--sku', action='append', help="Only include this SKU (repeatable)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--chunk-mb', type=int, default=CHUNK_BYTES // (1024 * 1024))
+    parser.add_argument('--save-dir', help="Write each aggregate to <save-dir>/<aggregate>.csv")
+    args = parser.parse_args()
+
+    aggregates = args.aggregate or ['sku_day_units']
+    print(f"🔍 Scanning {args.input} ({args.workers} worker(s))...")
+    results = scan_csv(args.input, aggregates, args.start_date, args.end_date, args.sku,
+                       workers=args.workers, chunk_bytes=args.chunk_mb * 1024 * 1024)
+    print(f"📊 {results['rows']:,} rows matched")
+    for name in aggregates:
+        series = results[name]
+        print(f"\n{AGGREGATES[name].description} ({len(series):,} groups):")
+        print(series.head(20).to_string())
+        if args.save_dir:
+            os.makedirs(args.save_dir, exist_ok=True)
+            path = os.path.join(args.save_dir, f'{name}.csv')
+            series.to_csv(path)
+            print(f"📁 Saved to: {path}")
+
+
+if __name__ == '__main__':
+    main()
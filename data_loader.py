@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Typed Order Loader for Forezia Mock Data
+Reads only the needed Shopify columns with explicit dtypes and caches them in a binary sidecar
+"""
+
+import os
+import pickle
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from output_writer import open_compressed_text
+
+SHOPIFY_TS_FORMAT = '%Y-%m-%d %H:%M:%S %z'
+# Columns the analysis scripts use
+ANALYSIS_COLUMNS = ('Name', 'Created at', 'Financial Status', 'Total', 'Lineitem quantity',
+                    'Lineitem name', 'Lineitem sku', 'Vendor')
+# Explicit dtypes; anything not listed is read as a string
+COLUMN_DTYPES: Dict[str, str] = {
+    'Name': 'string',
+    'Financial Status': 'category',
+    'Fulfillment Status': 'category',
+    'Lineitem name': 'category',
+    'Lineitem sku': 'category',
+    'Vendor': 'category',
+    'Currency': 'category',
+    'Subtotal': 'float64',
+    'Shipping': 'float64',
+    'Taxes': 'float64',
+    'Total': 'float64',
+    'Discount Amount': 'float64',
+    'discount_ratio': 'float64',
+    'Lineitem price': 'float64',
+    'Lineitem quantity': 'Int32',
+}
+DATE_COLUMNS: Dict[str, str] = {
+    'Created at': SHOPIFY_TS_FORMAT,
+    'Paid at': SHOPIFY_TS_FORMAT,
+    'Fulfilled at': SHOPIFY_TS_FORMAT,
+}
+CACHE_SUFFIX = '.cache.pkl'
+CACHE_VERSION = 1  # bump when dtypes or parsing change
+
+
+def cache_path(path: str) -> str:
+    """Binary cache file kept next to ``path``."""
+    return path + CACHE_SUFFIX
+
+
+def _source_key(path: str):
+    stat = os.stat(path)
+    return CACHE_VERSION, stat.st_size, stat.st_mtime_ns
+
+
+def _read_cache(path: str) -> Optional[dict]:
+    """Cache entry for ``path`` if it was built from the current file, else None."""
+    try:
+        with open(cache_path(path), 'rb') as f:
+            cached = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    return cached if cached.get('key') == _source_key(path) else None
+
+
+def _write_cache(path: str, requested, frame: pd.DataFrame):
+    """Write the cache atomically; a read-only directory just skips caching."""
+    target = cache_path(path)
+    tmp = f'{target}.{os.getpid()}.tmp'
+    try:
+        with open(tmp, 'wb') as f:
+            pickle.dump({'key': _source_key(path), 'requested': sorted(requested), 'frame': frame},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, target)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def parse_dates(values: pd.Series, fmt: str) -> pd.Series:
+    """Parse with the exact ``fmt`` (fast path), falling back to inference for other layouts."""
+    try:
+        return pd.to_datetime(values, format=fmt)
+    except (ValueError, TypeError):
+        return pd.to_datetime(values, format='mixed')
+
+
+def read_orders_csv(path: str, columns: Iterable[str] = ANALYSIS_COLUMNS) -> pd.DataFrame:
+    """Read ``columns`` of a (possibly compressed) Shopify CSV with explicit dtypes.
+
+    Requested columns missing from the file are skipped.
+    """
+    wanted = set(columns)
+    dtypes = {c: COLUMN_DTYPES.get(c, 'string') for c in wanted}
+    for c in DATE_COLUMNS:
+        dtypes.pop(c, None)
+    with open_compressed_text(path) as f:
+        frame = pd.read_csv(f, usecols=lambda c: c in wanted, dtype=dtypes)
+    for column, fmt in DATE_COLUMNS.items():
+        if column in frame.columns:
+            frame[column] = parse_dates(frame[column], fmt)
+    return frame
+
+
+def load_orders(path: str, columns: Iterable[str] = ANALYSIS_COLUMNS, use_cache: bool = True) -> pd.DataFrame:
+    """Load typed order columns, reusing the binary cache while ``path`` is unchanged.
+
+    The cache is keyed on the source file's size and modification time. A
+    request for columns the cache lacks re-reads the CSV once for the union
+    of old and new columns, so alternating scripts do not thrash it.
+    """
+    columns = list(dict.fromkeys(columns))
+    if not use_cache:
+        return read_orders_csv(path, columns)
+    cached = _read_cache(path)
+    if cached is not None and set(columns) <= set(cached['requested']):
+        frame = cached['frame']
+    else:
+        requested = set(columns) | set(cached['requested'] if cached else ())
+        frame = read_orders_csv(path, requested)
+        _write_cache(path, requested, frame)
+    return frame[[c for c in frame.columns if c in columns]]
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Dataset Catalog for Forezia Mock Data
+A local SQLite index of generated datasets (config hash, seed, date range, SKUs, files, checksums)
+so tools look datasets up by attributes instead of globbing output directories
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+CATALOG_FILE = os.environ.get('FOREZIA_CATALOG', 'datasets.sqlite')
+CHECKSUM_BLOCK = 1024 * 1024
+# Dataset kinds
+SHOPIFY_ORDERS = 'shopify_orders'   # Shopify-layout order export (file or partition directory)
+DAILY_SALES = 'daily_sales'         # long sku/ds/y daily sales
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS datasets (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    layout TEXT NOT NULL,            -- 'file', 'partitioned' or 'sqlite'
+    generator TEXT,
+    created_at TEXT NOT NULL,
+    config_hash TEXT,
+    seed INTEGER,
+    start_date TEXT,
+    end_date TEXT,
+    rows INTEGER,
+    num_skus INTEGER,
+    compression TEXT,
+    checksum TEXT,
+    bytes INTEGER,
+    config TEXT                      -- the config the dataset was generated from (JSON)
+);
+CREATE INDEX IF NOT EXISTS datasets_lookup ON datasets (kind, generator, created_at);
+CREATE INDEX IF NOT EXISTS datasets_config ON datasets (config_hash, seed);
+CREATE TABLE IF NOT EXISTS dataset_skus (
+    dataset_id INTEGER NOT NULL REFERENCES datasets(id) ON DELETE CASCADE,
+    sku TEXT NOT NULL,
+    PRIMARY KEY (dataset_id, sku)
+);
+CREATE INDEX IF NOT EXISTS dataset_skus_sku ON dataset_skus (sku);
+CREATE TABLE IF NOT EXISTS dataset_files (
+    dataset_id INTEGER NOT NULL REFERENCES datasets(id) ON DELETE CASCADE,
+    role TEXT NOT NULL,              -- 'data', 'partition', 'rollups', 'anomalies', ...
+    path TEXT NOT NULL,
+    rows INTEGER,
+    bytes INTEGER,
+    sha256 TEXT,
+    min_date TEXT,
+    max_date TEXT
+);
+CREATE INDEX IF NOT EXISTS dataset_files_dataset ON dataset_files (dataset_id);
+"""
+
+DATASET_FIELDS = ('id', 'path', 'kind', 'layout', 'generator', 'created_at', 'config_hash', 'seed',
+                  'start_date', 'end_date', 'rows', 'num_skus', 'compression', 'checksum', 'bytes')
+
+
+def connect(catalog: str = CATALOG_FILE) -> sqlite3.Connection:
+    """Open (and create if needed) the catalog database."""
+    conn = sqlite3.connect(catalog, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA_SQL)
+    return conn
+
+
+def config_hash(config: Optional[Mapping[str, Any]]) -> str:
+    """Stable hash of a parsed config (key order and whitespace do not matter)."""
+    canonical = json.dumps(config or {}, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def file_checksum(path: str) -> str:
+    """SHA-256 of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHECKSUM_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _file_entry(role: str, path: str, **stats) -> Dict[str, Any]:
+    return {'role': role, 'path': os.path.abspath(path), 'bytes': os.path.getsize(path),
+            'sha256': stats.pop('sha256', None) or file_checksum(path), **stats}
+
+
+def partition_files(root: str, manifest: Mapping[str, Any]) -> List[Dict[str, Any]]:
+    """File entries for a ``PartitionedWriter`` manifest (checksums come from the manifest)."""
+    return [{'role': 'partition', 'path': os.path.abspath(os.path.join(root, p['path'])), 'rows': p['rows'],
+             'bytes': p['bytes'], 'sha256': p['sha256'], 'min_date': p['min_date'], 'max_date': p['max_date']}
+            for p in manifest['partitions']]
+
+
+def register_dataset(path: str, kind: str = SHOPIFY_ORDERS, generator: Optional[str] = None,
+                     config: Optional[Mapping[str, Any]] = None, seed: Optional[int] = None,
+                     start_date: Optional[str] = None, end_date: Optional[str] = None,
+                     rows: Optional[int] = None, skus: Iterable[str] = (), compression: Optional[str] = None,
+                     partitions: Sequence[Mapping[str, Any]] = (), extra_files: Mapping[str, str] = None,
+                     layout: Optional[str] = None, catalog: str = CATALOG_FILE) -> int:
+    """Record a dataset and its files; returns its catalog id.
+
+    ``path`` is a single output file, or a partition directory when
+    ``partitions`` (see ``partition_files``) is given. ``extra_files`` maps a
+    role (``'rollups'``, ``'anomalies'``) to a sidecar file. ``layout``
+    overrides the detected ``'file'`` / ``'partitioned'`` (e.g. ``'sqlite'``
+    for a database export). The dataset checksum is the file's SHA-256, or a
+    hash over the partition checksums.
+    Re-registering the same path replaces the old entry.
+    """
+    if partitions:
+        files = [dict(p) for p in partitions]
+        checksum = hashlib.sha256(''.join(f"{f['path']}:{f['sha256']}\n" for f in sorted(
+            files, key=lambda f: f['path'])).encode('utf-8')).hexdigest()
+        layout = layout or 'partitioned'
+    else:
+        files = [_file_entry('data', path, rows=rows, min_date=start_date, max_date=end_date)]
+        checksum = files[0]['sha256']
+        layout = layout or 'file'
+    for role, extra in (extra_files or {}).items():
+        if extra and os.path.exists(extra):
+            files.append(_file_entry(role, extra))
+    skus = sorted(set(skus))
+    record = {
+        'path': os.path.abspath(path), 'kind': kind, 'layout': layout, 'generator': generator,
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'config_hash': config_hash(config) if config is not None else None, 'seed': seed,
+        'start_date': start_date, 'end_date': end_date, 'rows': rows, 'num_skus': len(skus),
+        'compression': compression, 'checksum': checksum,
+        'bytes': sum(f['bytes'] for f in files if f['role'] in ('data', 'partition')),
+        'config': json.dumps(config, sort_keys=True, default=str) if config is not None else None,
+    }
+    with closing(connect(catalog)) as conn, conn:
+        conn.execute("DELETE FROM datasets WHERE path = ?", (record['path'],))
+        cursor = conn.execute(f"INSERT INTO datasets ({', '.join(record)}) VALUES ({', '.join('?' * len(record))})",
+                              tuple(record.values()))
+        dataset_id = cursor.lastrowid
+        conn.executemany("INSERT INTO dataset_skus (dataset_id, sku) VALUES (?, ?)",
+                         [(dataset_id, sku) for sku in skus])
+        conn.executemany(
+            "INSERT INTO dataset_files (dataset_id, role, path, rows, bytes, sha256, min_date, max_date) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(dataset_id, f['role'], f['path'], f.get('rows'), f.get('bytes'), f.get('sha256'),
+              f.get('min_date'), f.get('max_date')) for f in files])
+    return dataset_id
+
+
+def find_datasets(kind: Optional[str] = None, generator: Optional[str] = None, layout: Optional[str] = None,
+                  config_hash: Optional[str] = None, seed: Optional[int] = None, sku: Optional[str] = None,
+                  covers: Optional[str] = None, existing: bool = True, limit: Optional[int] = None,
+                  catalog: str = CATALOG_FILE) -> List[Dict[str, Any]]:
+    """Datasets matching every given attribute, newest first.
+
+    ``config_hash`` may be a prefix, ``covers`` is a ``YYYY-MM-DD`` day
+    inside the dataset's date range, and ``existing`` drops entries whose
+    path no longer exists on disk.
+    """
+    clauses, params = [], []
+    for column, value in (('kind', kind), ('generator', generator), ('layout', layout), ('seed', seed)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if config_hash:
+        clauses.append("config_hash LIKE ?")
+        params.append(f"{config_hash}%")
+    if sku:
+        clauses.append("id IN (SELECT dataset_id FROM dataset_skus WHERE sku = ?)")
+        params.append(sku)
+    if covers:
+        clauses.append("start_date <= ? AND end_date >= ?")
+        params.extend([covers, covers])
+    query = f"SELECT {', '.join(DATASET_FIELDS)} FROM datasets"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY created_at DESC, id DESC"
+    if not os.path.exists(catalog):
+        return []
+    with closing(connect(catalog)) as conn:
+        found = []
+        for row in conn.execute(query, params):
+            if existing and not os.path.exists(row['path']):
+                continue
+            found.append(dict(row))
+            if limit and len(found) >= limit:
+                break
+    return found
+
+
+def latest_dataset(catalog: str = CATALOG_FILE, **filters) -> Optional[str]:
+    """Path of the newest dataset matching ``filters`` (see ``find_datasets``), or None."""
+    found = find_datasets(limit=1, catalog=catalog, **filters)
+    return found[0]['path'] if found else None
+
+
+def dataset_details(dataset_id: int, catalog: str = CATALOG_FILE) -> Optional[Dict[str, Any]]:
+    """One dataset with its SKU list, files and stored config."""
+    with closing(connect(catalog)) as conn:
+        row = conn.execute("SELECT * FROM datasets WHERE id = ?", (dataset_id,)).fetchone()
+        if row is None:
+            return None
+        details = dict(row)
+        details['config'] = json.loads(details['config']) if details['config'] else None
+        details['skus'] = [r[0] for r in conn.execute(
+            "SELECT sku FROM dataset_skus WHERE dataset_id = ? ORDER BY sku", (dataset_id,))]
+        details['files'] = [dict(r) for r in conn.execute(
+            "SELECT role, path, rows, bytes, sha256, min_date, max_date FROM dataset_files "
+            "WHERE dataset_id = ? ORDER BY role, path", (dataset_id,))]
+    return details
+
+
+def verify_dataset(dataset_id: int, catalog: str = CATALOG_FILE) -> List[str]:
+    """Paths of the dataset's files that are missing or no longer match their checksum."""
+    details = dataset_details(dataset_id, catalog)
+    if details is None:
+        raise KeyError(f"No dataset with id {dataset_id}")
+    return [f['path'] for f in details['files']
+            if not os.path.exists(f['path']) or (f['sha256'] and file_checksum(f['path']) != f['sha256'])]
+
+
+def register_existing(path: str, generator: Optional[str] = None, catalog: str = CATALOG_FILE) -> int:
+    """Register a Shopify-layout file that was generated before the catalog existed.
+
+    Rows, SKUs and the date range are read with the parallel scanner.
+    """
+    from csv_scanner import scan_csv
+    from output_writer import compression_from_suffix
+
+    scan = scan_csv(path, ('sku_day_units',))
+    units = scan['sku_day_units']
+    skus = [s for s in units.index.get_level_values('sku').unique() if s]
+    days = units.index.get_level_values('date')
+    return register_dataset(path, SHOPIFY_ORDERS, generator=generator, rows=scan['rows'], skus=skus,
+                            start_date=min(days) if len(days) else None, end_date=max(days) if len(days) else None,
+                            compression=compression_from_suffix(path), catalog=catalog)
+
+
+def add_lookup_arguments(parser: argparse.ArgumentParser):
+    """``--seed`` / ``--config-hash`` / ``--sku`` / ``--covers`` filters shared by the analysis scripts."""
+    parser.add_argument('--seed', type=int, help="Catalog lookup: dataset generated with this seed")
+    parser.add_argument('--config-hash', help="Catalog lookup: config hash (or prefix)")
+    parser.add_argument('--sku', help="Catalog lookup: dataset containing this SKU")
+    parser.add_argument('--covers', metavar='YYYY-MM-DD', help="Catalog lookup: dataset covering this day")
+    parser.add_argument('--catalog', default=CATALOG_FILE, help=f"Catalog database (default: {CATALOG_FILE})")
+
+
+def lookup_from_args(args, kind: str = SHOPIFY_ORDERS, layout: str = 'file') -> Optional[str]:
+    """Newest catalog dataset matching the ``add_lookup_arguments`` filters."""
+    return latest_dataset(catalog=args.catalog, kind=kind, layout=layout, seed=args.seed,
+                          config_hash=args.config_hash, sku=args.sku, covers=args.covers)
+
+
+def _print_datasets(datasets: List[Dict[str, Any]]):
+    if not datasets:
+        print("❌ No matching datasets in the catalog")
+        return
+    for d in datasets:
+        rows = f"{d['rows']:,}" if d['rows'] is not None else '?'
+        print(f"#{d['id']:<5} {d['created_at']}  {d['kind']:<14} {d['start_date'] or '?'}..{d['end_date'] or '?'}  "
+              f"{rows:>12} rows  {d['num_skus']:>5} SKUs  seed={d['seed']}  "
+              f"config={(d['config_hash'] or '-')[:12]}  {d['path']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local catalog of generated datasets")
+    parser.add_argument('--catalog', default=CATALOG_FILE, help=f"Catalog database (default: {CATALOG_FILE})")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    find = commands.add_parser('list', help="List datasets, newest first, optionally filtered")
+    find.add_argument('--kind', choices=(SHOPIFY_ORDERS, DAILY_SALES))
+    find.add_argument('--generator')
+    find.add_argument('--seed', type=int)
+    find.add_argument('--config-hash')
+    find.add_argument('--sku')
+    find.add_argument('--covers', metavar='YYYY-MM-DD')
+    find.add_argument('--all', action='store_true', help="Include entries whose files were deleted")
+    find.add_argument('--limit', type=int, default=20)
+
+    show = commands.add_parser('show', help="Show one dataset with its files and SKUs")
+    show.add_argument('id', type=int)
+    show.add_argument('--verify', action='store_true', help="Re-check file checksums")
+
+    register = commands.add_parser('register', help="Register an existing Shopify-layout export")
+    register.add_argument('path')
+    register.add_argument('--generator')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        _print_datasets(find_datasets(args.kind, args.generator, config_hash=args.config_hash, seed=args.seed,
+                                      sku=args.sku, covers=args.covers, existing=not args.all,
+                                      limit=args.limit, catalog=args.catalog))
+    elif args.command == 'show':
+        details = dataset_details(args.id, args.catalog)
+        if details is None:
+            print(f"❌ No dataset #{args.id}")
+            return
+        _print_datasets([{k: details[k] for k in DATASET_FIELDS}])
+        print(f"   SKUs ({len(details['skus'])}): {', '.join(details['skus'][:20])}"
+              f"{' ...' if len(details['skus']) > 20 else ''}")
+        for f in details['files']:
+            print(f"   [{f['role']}] {f['path']} ({f['bytes'] or 0:,} bytes, sha256 {(f['sha256'] or '')[:12]})")
+        if args.verify:
+            changed = verify_dataset(args.id, args.catalog)
+            print("✅ All files match their checksums" if not changed else
+                  "⚠️  Missing or modified: " + ', '.join(changed))
+    else:
+        dataset_id = register_existing(args.path, args.generator, args.catalog)
+        print(f"✅ Registered {args.path} as dataset #{dataset_id}")
+
+
+if __name__ == '__main__':
+    main()
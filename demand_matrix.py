@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+SKU x Day Demand Matrices for Forezia Mock Data
+Dense units / revenue / discount-rate matrices and holiday flags saved as .npy files, so backtest
+workers share one page-cached copy through np.load(mmap_mode='r') instead of re-parsing CSVs
+"""
+
+import argparse
+import os
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, Iterable, Optional, Sequence
+
+import holidays
+import numpy as np
+import pandas as pd
+
+from csv_scanner import (Aggregate, DATE_COLUMN, DEFAULT_WORKERS, SKU_COLUMN, order_day, register_aggregate,
+                         scan_csv)
+
+# Array name -> dtype; units / revenue / discount_rate are (skus, days), holiday / promotion are (days,).
+# skus.npy (unicode) and dates.npy (datetime64[D]) label the two axes.
+ARRAY_DTYPES = {
+    'units': np.int32,
+    'revenue': np.float64,
+    'discount_rate': np.float32,  # units-weighted mean discount ratio (0 on days without sales)
+    'holiday': np.bool_,          # always the public holiday calendar (HOLIDAY_COUNTRY)
+    'promotion': np.bool_,        # producer-specific promotion days
+}
+DAY_ARRAYS = ('dates', 'holiday', 'promotion')
+HOLIDAY_COUNTRY = 'US'
+
+
+def holiday_flags(dates: Sequence, country: str = HOLIDAY_COUNTRY) -> np.ndarray:
+    """Boolean flag per day for the country's public holidays."""
+    days = pd.DatetimeIndex(dates)
+    if not len(days):
+        return np.zeros(0, dtype=np.bool_)
+    calendar = holidays.country_holidays(country, years=range(days.min().year, days.max().year + 1))
+    return days.normalize().isin(pd.DatetimeIndex(list(calendar.keys())))
+
+
+def _save(path: str, array: np.ndarray):
+    # Written next to the target and renamed, so readers never map a half-written file
+    tmp = f"{path}.tmp-{os.getpid()}.npy"
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+def write_demand_matrix(out_dir: str, skus: Sequence[str], dates: Sequence, units: np.ndarray,
+                        revenue: Optional[np.ndarray] = None, discount_rate: Optional[np.ndarray] = None,
+                        promotion: Optional[np.ndarray] = None) -> Dict[str, str]:
+    """Save the matrices (``(len(skus), len(dates))``) and index files; returns name -> path.
+
+    ``holiday`` is always the US holiday calendar for ``dates``; other
+    arrays that are not given are not written.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    dates = pd.DatetimeIndex(dates).to_numpy().astype('datetime64[D]')
+    arrays = {
+        'skus': np.asarray(list(skus), dtype=str),
+        'dates': dates,
+        'units': units,
+        'revenue': revenue,
+        'discount_rate': discount_rate,
+        'holiday': holiday_flags(dates),
+        'promotion': promotion,
+    }
+    paths = {}
+    for name, array in arrays.items():
+        if array is None:
+            continue
+        array = np.ascontiguousarray(array, dtype=ARRAY_DTYPES.get(name))
+        expected = (len(dates),) if name in DAY_ARRAYS else (len(skus),) if name == 'skus' \
+            else (len(skus), len(dates))
+        if array.shape != expected:
+            raise ValueError(f"{name}: expected shape {expected}, got {array.shape}")
+        paths[name] = os.path.join(out_dir, f"{name}.npy")
+        _save(paths[name], array)
+    return paths
+
+
+@dataclass
+class DemandMatrix:
+    """Memory-mapped demand arrays; missing optional arrays are None."""
+    skus: np.ndarray
+    dates: np.ndarray
+    units: np.ndarray
+    revenue: Optional[np.ndarray]
+    discount_rate: Optional[np.ndarray]
+    holiday: Optional[np.ndarray]
+    promotion: Optional[np.ndarray]
+
+    def sku_index(self, sku: str) -> int:
+        positions = np.flatnonzero(self.skus == sku)
+        if not len(positions):
+            raise KeyError(sku)
+        return int(positions[0])
+
+
+def load_demand_matrix(path: str, mmap_mode: Optional[str] = 'r') -> DemandMatrix:
+    """Open an exported matrix directory. With ``mmap_mode='r'`` nothing is read up front and
+    every process mapping the same files shares one copy in the page cache."""
+    def load(name):
+        file = os.path.join(path, f"{name}.npy")
+        return np.load(file, mmap_mode=mmap_mode) if os.path.exists(file) else None
+
+    # The index arrays are small and read into memory
+    return DemandMatrix(np.load(os.path.join(path, 'skus.npy')), np.load(os.path.join(path, 'dates.npy')),
+                        load('units'), load('revenue'), load('discount_rate'), load('holiday'),
+                        load('promotion'))
+
+
+# ----------------------------------------------------------------------
+# Building the matrix
+# ----------------------------------------------------------------------
+class DemandAccumulator:
+    """SKU x day totals filled from generator line items as they are produced."""
+
+    def __init__(self, skus: Sequence[str], start_date: datetime, num_days: int):
+        self.skus = list(skus)
+        self.start_date = pd.Timestamp(start_date).normalize()
+        self._sku_index = {sku: i for i, sku in enumerate(self.skus)}
+        self.units = np.zeros((len(self.skus), num_days), dtype=np.int64)
+        self.revenue = np.zeros((len(self.skus), num_days))
+        self.discounted_units = np.zeros((len(self.skus), num_days))
+
+    def add_line_items(self, line_items: Iterable[Dict]):
+        """Record Shopify-layout line item dicts as produced by the generator."""
+        start = self.start_date.date()
+        for item in line_items:
+            row = self._sku_index.get(item.get('Lineitem sku'))
+            if row is None:
+                continue
+            day = (date.fromisoformat(item['Created at'][:10]) - start).days
+            quantity = int(item.get('Lineitem quantity') or 0)
+            ratio = float(item.get('discount_ratio') or 0.0)
+            self.units[row, day] += quantity
+            self.revenue[row, day] += quantity * float(item.get('Lineitem price') or 0.0) * (1 - ratio)
+            self.discounted_units[row, day] += quantity * ratio
+
+    def write(self, out_dir: str) -> Dict[str, str]:
+        dates = pd.date_range(self.start_date, periods=self.units.shape[1], freq='D')
+        return write_demand_matrix(out_dir, self.skus, dates, self.units, self.revenue,
+                                   _discount_rate(self.discounted_units, self.units))
+
+
+def _discount_rate(discounted_units: np.ndarray, units: np.ndarray) -> np.ndarray:
+    return np.divide(discounted_units, units, out=np.zeros(units.shape), where=units > 0)
+
+
+def _sku_day_demand(frame):
+    quantity = pd.to_numeric(frame['Lineitem quantity'], errors='coerce').fillna(0)
+    price = pd.to_numeric(frame['Lineitem price'], errors='coerce').fillna(0.0)
+    ratio = pd.to_numeric(frame['discount_ratio'], errors='coerce').fillna(0.0)
+    values = pd.DataFrame({'units': quantity, 'revenue': quantity * price * (1 - ratio),
+                           'discounted_units': quantity * ratio})
+    return values.groupby([frame[SKU_COLUMN].rename('sku'), order_day(frame).rename('date')]).sum()
+
+
+register_aggregate(Aggregate('sku_day_demand', (SKU_COLUMN, DATE_COLUMN, 'Lineitem quantity', 'Lineitem price',
+                                                'discount_ratio'), _sku_day_demand,
+                             "Units, net revenue and discounted units per SKU and day"))
+
+
+def export_from_orders(path: str, out_dir: str, workers: int = DEFAULT_WORKERS) -> Dict[str, str]:
+    """Build the matrix from a Shopify-layout export (one parallel scan) and save it."""
+    cells = scan_csv(path, ['sku_day_demand'], workers=workers)['sku_day_demand']
+    cells = cells[cells.index.get_level_values('sku') != '']
+    days = pd.to_datetime(cells.index.get_level_values('date'))
+    dates = pd.date_range(days.min(), days.max(), freq='D')
+    skus = sorted(cells.index.get_level_values('sku').unique())
+    grid = pd.MultiIndex.from_product([skus, dates.strftime('%Y-%m-%d')], names=['sku', 'date'])
+    cells = cells.reindex(grid, fill_value=0)
+    shape = (len(skus), len(dates))
+    units = cells['units'].to_numpy().reshape(shape)
+    return write_demand_matrix(out_dir, skus, dates, units, cells['revenue'].to_numpy().reshape(shape),
+                               _discount_rate(cells['discounted_units'].to_numpy().reshape(shape), units))
+
+
+def print_matrix_info(path: str):
+    matrix = load_demand_matrix(path)
+    span = f" ({matrix.dates[0]} to {matrix.dates[-1]})" if len(matrix.dates) else ""
+    print(f"📦 {path}: {len(matrix.skus)} SKUs x {len(matrix.dates)} days{span}")
+    for name in ARRAY_DTYPES:
+        array = getattr(matrix, name)
+        if array is not None:
+            print(f"   - {name}.npy: {array.dtype} {array.shape}, {array.nbytes / 1e6:.1f} MB")
+    print(f"   - Total units: {int(matrix.units.sum()):,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export or inspect memory-mappable SKU x day demand matrices")
+    commands = parser.add_subparsers(dest='command', required=True)
+    export = commands.add_parser('export', help="Build the matrix from a Shopify-layout export")
+    export.add_argument('input', help="Shopify-layout CSV (.csv, .csv.gz or .csv.zst)")
+    export.add_argument('output', help="Directory for the .npy files")
+    export.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    info = commands.add_parser('info', help="Show the arrays in a matrix directory")
+    info.add_argument('path')
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        paths = export_from_orders(args.input, args.output, workers=args.workers)
+        print(f"✅ Demand matrix written: {', '.join(os.path.basename(p) for p in paths.values())}")
+        print_matrix_info(args.output)
+    else:
+        print_matrix_info(args.path)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,23 @@
+import argparse
 import csv
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+import io
 import random
 import re
 import os
+import shutil
+import tempfile
 from datetime import datetime as dt
 
+from output_writer import CompressedCSVWriter, compress_block, resolve_compression, with_compression_suffix
+
+# Defaults; all of these can be overridden on the command line
 INPUT_FILE = 'orders_export copy.csv'
-# Generate a unique output file name based on the input file and current timestamp
-base, ext = os.path.splitext(INPUT_FILE)
-timestamp = dt.now().strftime('%Y%m%d_%H%M%S')
-OUTPUT_FILE = f'{base}_expanded_{timestamp}{ext}'
+# Compress the expanded export ("gzip", "zstd" or None); expanded files run to tens of GB
+OUTPUT_COMPRESSION = 'gzip'
+WRITER_THREADS = 4
+WORKERS = 1  # processes for --workers; each expands a contiguous range of cycles
 START_DATE = datetime(2024, 6, 7, 9, 0, 0)  # Start on June 7th, 2024
 MULTIPLIER = 365  # 1 year
 DATE_FIELDS = [
@@ -19,114 +27,220 @@ ORDER_ID_FIELD = 'Name'
 ORDER_NUM_PATTERN = re.compile(r'#(\d+)')
 ID_FIELD = 'Id'
 
-# Helper to increment date strings, now using a fixed start date
+def default_output_file(input_file, compression=OUTPUT_COMPRESSION):
+    """Unique output file name based on the input file and current timestamp"""
+    base, ext = os.path.splitext(input_file)
+    timestamp = dt.now().strftime('%Y%m%d_%H%M%S')
+    return with_compression_suffix(f'{base}_expanded_{timestamp}{ext}', compression)
 
-def increment_date(date_str, days):
-    if not date_str or date_str.strip() == '':
-        return date_str
-    try:
-        # Try with timezone
-        dt = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S %z')
-        # Replace with start date + days, keep time and tz
-        base = START_DATE.replace(hour=dt.hour, minute=dt.minute, second=dt.second, tzinfo=dt.tzinfo)
-        return (base + timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S %z')
-    except Exception:
-        try:
-            # Try without timezone
-            dt = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
-            base = START_DATE.replace(hour=dt.hour, minute=dt.minute, second=dt.second)
-            return (base + timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
-        except Exception:
-            return date_str
-
-def increment_order_num(order_name, offset):
-    match = ORDER_NUM_PATTERN.match(order_name)
-    if match:
-        num = int(match.group(1)) + offset
-        # Add a cycle-based suffix to ensure uniqueness
-        return f'#{num:04d}_C{offset:02d}'
-    return order_name
-
-def increment_id(id_str, offset):
-    if not id_str or not id_str.isdigit():
-        return id_str
-    return str(int(id_str) + offset * 1000000)
-
-def main():
-    with open(INPUT_FILE, newline='') as infile:
-        reader = list(csv.reader(infile))
-        header = reader[0]
-        rows = reader[1:]
-
-    # Group rows by order number (Name field)
-    orders = []
-    current_order = []
-    last_order_num = None
-    for row in rows:
-        order_num = row[0]
-        if order_num and order_num != last_order_num:
-            if current_order:
-                orders.append(current_order)
-            current_order = [row]
-            last_order_num = order_num
-        else:
-            current_order.append(row)
-    if current_order:
-        orders.append(current_order)
-
-    # Find field indices
-    field_idx = {name: i for i, name in enumerate(header)}
-
-    expanded_rows = []
-    order_offset = 0
-    for cycle in range(MULTIPLIER):
-        for order in orders:
-            # Calculate offset for order number and id
-            order_num_offset = order_offset
-            id_offset = order_offset
-            for row in order:
+def read_template(input_file):
+    """Read the export once and group its rows into orders (header, orders)"""
+    with open(input_file, newline='') as infile:
+        reader = csv.reader(infile)
+        header = next(reader)
+        # Group rows by order number (Name field)
+        orders = []
+        current_order = []
+        last_order_num = None
+        for row in reader:
+            order_num = row[0]
+            if order_num and order_num != last_order_num:
+                if current_order:
+                    orders.append(current_order)
+                current_order = [row]
+                last_order_num = order_num
+            else:
+                current_order.append(row)
+        if current_order:
+            orders.append(current_order)
+    return header, orders
+
+SHOPIFY_TS_FORMAT = '%Y-%m-%d %H:%M:%S %z'
+NAIVE_TS_FORMAT = '%Y-%m-%d %H:%M:%S'
+JITTER_MINUTES = 59  # timezone-aware times get 0-59 random minutes added
+# 'HH:MM' for every minute of the day
+MINUTE_STRINGS = [f'{m // 60:02d}:{m % 60:02d}' for m in range(24 * 60)]
+
+class CompiledTemplate:
+    """Template orders parsed once into a form that renders by arithmetic.
+
+    Every date field is parsed a single time into its minute of day plus a
+    pre-formatted ``:SS +zzzz`` tail. Order numbers and Ids are split into
+    their integer parts. Rendering a cycle is then only the day string,
+    a table lookup for the (jittered) time and integer additions.
+
+    The rules are the same as before. A timezone-aware timestamp moves to
+    ``start_date + cycle`` at its own time of day and then gets 0-59
+    random minutes, which can roll it into the next day. A naive timestamp
+    moves without jitter. Blank and unparseable values are kept as they are.
+    """
+
+    def __init__(self, header, orders, start_date=START_DATE):
+        self.header = header
+        self.start_date = start_date
+        field_idx = {name: i for i, name in enumerate(header)}
+        date_idx = [field_idx[field] for field in DATE_FIELDS if field in field_idx]
+        name_idx = field_idx.get(ORDER_ID_FIELD)
+        id_idx = field_idx.get(ID_FIELD)
+        self.orders = [[self._compile_row(row, date_idx, name_idx, id_idx) for row in order] for order in orders]
+        self.rows_per_cycle = sum(len(order) for order in orders)
+
+    @staticmethod
+    def _compile_row(row, date_idx, name_idx, id_idx):
+        aware, naive = [], []
+        for idx in date_idx:
+            val = row[idx]
+            if not val or not val.strip():
+                continue
+            try:
+                parsed = datetime.strptime(val, SHOPIFY_TS_FORMAT)
+                tail = f':{parsed.second:02d} {parsed.strftime("%z")}'
+                aware.append((idx, parsed.hour * 60 + parsed.minute, tail))
+                continue
+            except ValueError:
+                pass
+            try:
+                naive.append((idx, datetime.strptime(val, NAIVE_TS_FORMAT).strftime(' %H:%M:%S')))
+            except ValueError:
+                pass  # not a timestamp: copied unchanged
+
+        order_num = None
+        if name_idx is not None:
+            match = ORDER_NUM_PATTERN.match(row[name_idx])
+            if match:
+                order_num = int(match.group(1))
+        id_val = None
+        if id_idx is not None and row[id_idx].isdigit():
+            id_val = int(row[id_idx])
+        return row, name_idx, order_num, id_idx, id_val, aware, naive
+
+    def day_string(self, cycle):
+        return (self.start_date + timedelta(days=cycle)).strftime('%Y-%m-%d')
+
+    def render_cycle(self, cycle, order_offset):
+        """Yield the rows of one cycle (one day) of the expansion"""
+        days = (self.day_string(cycle), self.day_string(cycle + 1))
+        today = days[0]
+        randint = random.randint
+        minutes = MINUTE_STRINGS
+        for order in self.orders:
+            # Order number gets a cycle-based suffix to ensure uniqueness
+            suffix = f'_C{order_offset:02d}'
+            id_step = order_offset * 1000000
+            for row, name_idx, order_num, id_idx, id_val, aware, naive in order:
                 new_row = row.copy()
-                # Increment date fields
-                for field in DATE_FIELDS:
-                    if field in field_idx:
-                        idx = field_idx[field]
-                        new_row[idx] = increment_date(new_row[idx], cycle)
-                # Increment order number
-                if ORDER_ID_FIELD in field_idx:
-                    idx = field_idx[ORDER_ID_FIELD]
-                    new_row[idx] = increment_order_num(new_row[idx], order_num_offset)
-                # Increment Id field
-                if ID_FIELD in field_idx:
-                    idx = field_idx[ID_FIELD]
-                    new_row[idx] = increment_id(new_row[idx], id_offset)
-                # Optionally, randomize times a bit
-                for field in DATE_FIELDS:
-                    if field in field_idx:
-                        idx = field_idx[field]
-                        val = new_row[idx]
-                        if val and ':' in val:
-                            try:
-                                # Add random minutes (0-59)
-                                if '+' in val or '-' in val:
-                                    dt = datetime.strptime(val, '%Y-%m-%d %H:%M:%S %z')
-                                    dt += timedelta(minutes=random.randint(0, 59))
-                                    new_row[idx] = dt.strftime('%Y-%m-%d %H:%M:%S %z')
-                                else:
-                                    dt = datetime.strptime(val, '%Y-%m-%d %H:%M:%S')
-                                    dt += timedelta(minutes=random.randint(0, 59))
-                                    new_row[idx] = dt.strftime('%Y-%m-%d %H:%M:%S')
-                            except Exception:
-                                pass
-                expanded_rows.append(new_row)
+                for idx, time_str in naive:
+                    new_row[idx] = today + time_str
+                if order_num is not None:
+                    new_row[name_idx] = f'#{order_num + order_offset:04d}{suffix}'
+                if id_val is not None:
+                    new_row[id_idx] = str(id_val + id_step)
+                for idx, minute, tail in aware:
+                    day, minute = divmod(minute + randint(0, JITTER_MINUTES), 1440)
+                    new_row[idx] = f'{days[day]} {minutes[minute]}{tail}'
+                yield new_row
             order_offset += 1
 
-    with open(OUTPUT_FILE, 'w', newline='') as outfile:
-        writer = csv.writer(outfile)
+def iter_expanded_rows(template, cycles, seed=None):
+    """Lazily yield every expanded row of ``cycles``, cycle by cycle.
+
+    Only the compiled template is held in memory; each cycle's rows are
+    produced on demand, so the output size does not affect memory use.
+    With a ``seed`` every cycle gets its own random stream, so the output
+    does not depend on how cycles are split across workers.
+    """
+    for cycle in cycles:
+        if seed is not None:
+            random.seed(f'{seed}:{cycle}')
+        yield from template.render_cycle(cycle, cycle * len(template.orders))
+
+def cycle_ranges(multiplier, shards):
+    """Split ``range(multiplier)`` into at most ``shards`` contiguous ranges"""
+    shards = max(1, min(shards, multiplier))
+    size, extra = divmod(multiplier, shards)
+    ranges, start = [], 0
+    for i in range(shards):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append(range(start, stop))
+        start = stop
+    return ranges
+
+def write_shard(template, shard_path, cycles, compression=OUTPUT_COMPRESSION, seed=None,
+                writer_threads=1):
+    """Worker task: expand ``cycles`` into a headerless shard file"""
+    if seed is None:
+        random.seed()  # forked workers must not replay the parent's random stream
+    with CompressedCSVWriter(shard_path, compression=compression, workers=writer_threads) as writer:
+        writer.writerows(iter_expanded_rows(template, cycles, seed))
+    return writer.rows_written
+
+def expand_parallel(template, output_file, multiplier=MULTIPLIER, compression=OUTPUT_COMPRESSION,
+                    workers=WORKERS, seed=None):
+    """Expand cycle ranges in worker processes and concatenate the shards in order.
+
+    Every order offset is ``cycle * orders``, so workers need no shared
+    state. Shards are written next to the output file and appended byte
+    for byte after the header; compressed shards are independent gzip
+    members / zstd frames, so the result is one valid stream.
+    """
+    codec = resolve_compression(output_file, compression)
+    ranges = cycle_ranges(multiplier, workers)
+    shard_dir = tempfile.mkdtemp(prefix='.expand_shards_', dir=os.path.dirname(os.path.abspath(output_file)))
+    shard_paths = [os.path.join(shard_dir, f'shard-{i:04d}.part') for i in range(len(ranges))]
+    writer_threads = max(1, WRITER_THREADS // len(ranges))
+    try:
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            futures = [pool.submit(write_shard, template, path, cycles, codec, seed, writer_threads)
+                       for path, cycles in zip(shard_paths, ranges)]
+            rows = sum(future.result() for future in futures)
+
+        header = io.StringIO()
+        csv.writer(header).writerow(template.header)
+        with open(output_file, 'wb') as out:
+            out.write(compress_block(header.getvalue().encode('utf-8'), codec))
+            for path in shard_paths:
+                with open(path, 'rb') as shard:
+                    shutil.copyfileobj(shard, out, 16 * 1024 * 1024)
+    finally:
+        shutil.rmtree(shard_dir, ignore_errors=True)
+    return rows
+
+def expand(input_file, output_file, multiplier=MULTIPLIER, start_date=START_DATE,
+           compression=OUTPUT_COMPRESSION, workers=WORKERS, seed=None):
+    """Expand ``input_file`` into ``multiplier`` daily copies written to ``output_file``"""
+    header, orders = read_template(input_file)
+    template = CompiledTemplate(header, orders, start_date)
+    if workers > 1 and multiplier > 1:
+        return expand_parallel(template, output_file, multiplier, compression, workers, seed)
+    # Rows are handed to a background writer as they are produced
+    with CompressedCSVWriter(output_file, compression=compression, workers=WRITER_THREADS) as writer:
         writer.writerow(header)
-        writer.writerows(expanded_rows)
+        writer.writerows(iter_expanded_rows(template, range(multiplier), seed))
+    return writer.rows_written - 1
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Expand a Shopify order export into a longer daily series")
+    parser.add_argument('input', nargs='?', default=INPUT_FILE, help=f"Template export (default: {INPUT_FILE})")
+    parser.add_argument('output', nargs='?', help="Output file (default: <input>_expanded_<timestamp>.csv[.gz])")
+    parser.add_argument('--multiplier', type=int, default=MULTIPLIER,
+                        help=f"Number of daily copies of the template (default: {MULTIPLIER})")
+    parser.add_argument('--start-date', type=lambda s: datetime.strptime(s, '%Y-%m-%d'),
+                        default=START_DATE, help="First day of the expansion, YYYY-MM-DD (default: 2024-06-07)")
+    parser.add_argument('--compression', choices=['gzip', 'zstd', 'none'], default=OUTPUT_COMPRESSION or 'none')
+    parser.add_argument('--workers', type=int, default=WORKERS,
+                        help="Processes expanding cycle ranges in parallel (default: 1)")
+    parser.add_argument('--seed', type=int, help="Seed for reproducible time jitter (same output for any --workers)")
+    args = parser.parse_args(argv)
+    args.compression = None if args.compression == 'none' else args.compression
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    output_file = with_compression_suffix(args.output, args.compression) if args.output else default_output_file(args.input, args.compression)
+    expand(args.input, output_file, args.multiplier, args.start_date, args.compression, args.workers, args.seed)
 
-    print(f'Expanded data written to {OUTPUT_FILE}')
-    print(f'Original data remains in {INPUT_FILE}')
+    print(f'Expanded data written to {output_file}')
+    print(f'Original data remains in {args.input}')
 
 if __name__ == '__main__':
     main()
@@ -13,10 +13,24 @@ from typing import List, Dict, Tuple
 import math
 import holidays
 import os
+import sqlite3
+
+import numpy as np
+
+from anomalies import SKIPPED_DAY, ZERO_DEMAND_LABELS, ZERO_ORDER_DAY, anomaly_multipliers, write_labels
+from correlated_demand import DemandFactorModel
+from generator_config import BULK_ORDER_QUANTITY, compile_config
+from hierarchy import HierarchyAccumulator
+from shopify_schema import SHOPIFY_COLUMNS
+from output_writer import CompressedCSVWriter, with_compression_suffix
+from partitioned_writer import PartitionedWriter
+from sqlite_export import SQLiteOrderWriter, print_load_stats
+from dataset_catalog import SHOPIFY_ORDERS, partition_files, register_dataset
+from demand_matrix import DemandAccumulator
 
 def load_config():
-    """Load configuration from config.json file."""
-    config_path = os.path.join(os.path.dirname(__file__), 'config.json')
+    """Load configuration from config.json (or the file named by FOREZIA_CONFIG)."""
+    config_path = os.environ.get('FOREZIA_CONFIG') or os.path.join(os.path.dirname(__file__), 'config.json')
     try:
         with open(config_path, 'r') as f:
             return json.load(f)
@@ -27,19 +41,20 @@ def load_config():
         print(f"⚠️  Error parsing config file: {e}. Using default values.")
         return {}
 
-# Load configuration
+# Load configuration and compile it once (fails fast on invalid settings)
 CONFIG = load_config()
+SETTINGS = compile_config(CONFIG, source=os.environ.get('FOREZIA_CONFIG') or 'config.json')
 
 # Configuration Variables - loaded from config.json or using defaults
-NUMBER_OF_DAYS_TO_GENERATE = CONFIG.get('data_generation', {}).get('NUMBER_OF_DAYS_TO_GENERATE', None) # Optional override
-NUMBER_OF_MONTHS = CONFIG.get('data_generation', {}).get('number_of_months', 12)
-AVERAGE_MONTHLY_GROWTH = CONFIG.get('data_generation', {}).get('average_monthly_growth', 0.08)
-WEEKEND_BOOST_FACTOR = CONFIG.get('data_generation', {}).get('weekend_boost_factor', 1.8)
-BASE_DAILY_ORDERS = CONFIG.get('data_generation', {}).get('base_daily_orders', 15)
-SEASONAL_FACTOR = CONFIG.get('data_generation', {}).get('seasonal_factor', 0.3)
-RANDOM_NOISE_FACTOR = CONFIG.get('data_generation', {}).get('random_noise_factor', 0.1)
-VARIABLE_GROWTH_PER_SKU = CONFIG.get('data_generation', {}).get('variable_growth_per_sku', False)
-GROWTH_RANGE = CONFIG.get('data_generation', {}).get('growth_range', [0.02, 0.15])
+NUMBER_OF_DAYS_TO_GENERATE = SETTINGS.number_of_days_to_generate # Optional override
+NUMBER_OF_MONTHS = SETTINGS.number_of_months
+AVERAGE_MONTHLY_GROWTH = SETTINGS.average_monthly_growth
+WEEKEND_BOOST_FACTOR = SETTINGS.weekend_boost_factor
+BASE_DAILY_ORDERS = SETTINGS.base_daily_orders
+SEASONAL_FACTOR = SETTINGS.seasonal_factor
+RANDOM_NOISE_FACTOR = SETTINGS.random_noise_factor
+VARIABLE_GROWTH_PER_SKU = SETTINGS.variable_growth_per_sku
+GROWTH_RANGE = list(SETTINGS.growth_range)
 
 # Random Noise Configuration
 # The RANDOM_NOISE_FACTOR adds controlled randomness to simulate real-world demand fluctuations
@@ -49,11 +64,13 @@ GROWTH_RANGE = CONFIG.get('data_generation', {}).get('growth_range', [0.02, 0.15
 # This affects both daily order counts and individual quantity calculations
 
 # Number of SKUs to generate (loaded from config)
-NUMBER_OF_SKUS = CONFIG.get('data_generation', {}).get('number_of_skus', 50)
+NUMBER_OF_SKUS = SETTINGS.number_of_skus
 
-# Product Category Configuration - NEW FEATURE
-PRODUCT_CATEGORIES = CONFIG.get('product_categories', {})
-ENABLE_CATEGORY_BASED_BEHAVIOR = bool(PRODUCT_CATEGORIES)
+# Product Category Configuration - compiled into per-category parameter tuples
+ENABLE_CATEGORY_BASED_BEHAVIOR = SETTINGS.enable_category_based_behavior
+CATEGORY_NOISE = SETTINGS.category_noise
+CATEGORY_SEASONAL_MULTIPLIER = SETTINGS.category_seasonal_multiplier
+DISCOUNT_CUM_WEIGHTS = SETTINGS.discount_cum_weights
 
 # Enhanced Prophet Learning Patterns
 ENABLE_STRONG_PATTERNS = True  # Enable stronger patterns for Prophet to learn
@@ -62,41 +79,47 @@ CYCLICAL_PATTERNS = True  # Enable cyclical demand patterns
 TREND_STRENGTH = 0.4  # How strong trending signals should be
 
 # Prophet Model Compatibility Settings - loaded from config.json or using defaults
-MIN_SALES_DAYS_PER_SKU = CONFIG.get('prophet_optimization', {}).get('min_sales_days_per_sku', 30)
-MIN_TOTAL_UNITS_PER_SKU = CONFIG.get('prophet_optimization', {}).get('min_total_units_per_sku', 50)
-ENSURE_SKU_DISTRIBUTION = CONFIG.get('prophet_optimization', {}).get('ensure_sku_distribution', True)
-SKU_POPULARITY_WEIGHTS = CONFIG.get('prophet_optimization', {}).get('sku_popularity_weights', True)
+MIN_SALES_DAYS_PER_SKU = SETTINGS.min_sales_days_per_sku
+MIN_TOTAL_UNITS_PER_SKU = SETTINGS.min_total_units_per_sku
+ENSURE_SKU_DISTRIBUTION = SETTINGS.ensure_sku_distribution
+SKU_POPULARITY_WEIGHTS = SETTINGS.sku_popularity_weights
 
 # New Discount Configuration for Prophet Training Data - loaded from config.json
-ENABLE_DISCOUNTS = CONFIG.get('discounts', {}).get('enable_discounts', True)
-
-# Discount ratio configuration - simplified for Prophet model
-config_discount_probs = CONFIG.get('discounts', {}).get('discount_ratio_probabilities', {})
-DISCOUNT_RATIO_PROBABILITIES = {}
-for ratio_str, prob in config_discount_probs.items():
-    DISCOUNT_RATIO_PROBABILITIES[float(ratio_str)] = prob
+ENABLE_DISCOUNTS = SETTINGS.enable_discounts
 
-# Default discount probabilities if not in config
-if not DISCOUNT_RATIO_PROBABILITIES:
-    DISCOUNT_RATIO_PROBABILITIES = {
-        0.00: 0.75,   # 75% of orders have no discount (most common)
-        0.10: 0.08,   # 8% have 10% discount (light promotions)
-        0.15: 0.06,   # 6% have 15% discount
-        0.20: 0.05,   # 5% have 20% discount
-        0.25: 0.03,   # 3% have 25% discount
-        0.30: 0.02,   # 2% have 30% discount (seasonal sales)
-        0.40: 0.005,  # 0.5% have 40% discount (rare big promotions)
-        0.50: 0.005,  # 0.5% have 50% discount (very rare deep promotions)
-    }
+# Discount ratio configuration - simplified for Prophet model (defaults live in generator_config)
+DISCOUNT_RATIOS = list(SETTINGS.discount_ratios)
+DISCOUNT_RATIO_PROBABILITIES = dict(zip(SETTINGS.discount_ratios, SETTINGS.discount_weights))
 
 # Quantity Variety Settings for Better ML Performance - loaded from config.json
-ENABLE_QUANTITY_VARIETY = CONFIG.get('quantity_settings', {}).get('enable_quantity_variety', True)
-MIN_QUANTITY = CONFIG.get('quantity_settings', {}).get('min_quantity', 0)
-MAX_QUANTITY = CONFIG.get('quantity_settings', {}).get('max_quantity', 8)
-STOCK_OUT_PROBABILITY = CONFIG.get('quantity_settings', {}).get('stock_out_probability', 0.05)
-BULK_ORDER_PROBABILITY = CONFIG.get('quantity_settings', {}).get('bulk_order_probability', 0.20)
-LOW_INVENTORY_PROBABILITY = CONFIG.get('quantity_settings', {}).get('low_inventory_probability', 0.15)
-HIGH_DEMAND_SPIKE_PROBABILITY = CONFIG.get('quantity_settings', {}).get('high_demand_spike_probability', 0.10)
+ENABLE_QUANTITY_VARIETY = SETTINGS.enable_quantity_variety
+MIN_QUANTITY = SETTINGS.min_quantity
+MAX_QUANTITY = SETTINGS.max_quantity
+STOCK_OUT_PROBABILITY = SETTINGS.stock_out_probability
+BULK_ORDER_PROBABILITY = SETTINGS.bulk_order_probability
+LOW_INVENTORY_PROBABILITY = SETTINGS.low_inventory_probability
+HIGH_DEMAND_SPIKE_PROBABILITY = SETTINGS.high_demand_spike_probability
+
+# Hierarchy Settings - SKU/category/vendor/total rollups and shared category shocks
+EMIT_ROLLUPS = SETTINGS.emit_rollups
+CATEGORY_SHOCK_STD = SETTINGS.category_shock_std
+
+# Anomaly injection settings (None = disabled); labels go to <output>_anomalies.csv
+ANOMALIES = SETTINGS.anomalies
+
+# Correlated cross-SKU demand (None = disabled): daily SKU multipliers from a factor model
+# with complement and substitute groups per category, replacing the one-SKU daily driver
+CORRELATED_DEMAND = SETTINGS.correlated_demand
+
+# Output Settings - optional compression ("gzip" or "zstd") handled by a background writer
+OUTPUT_COMPRESSION = SETTINGS.output_compression
+OUTPUT_WRITER_THREADS = SETTINGS.output_writer_threads
+# Optional Hive-style layout instead of one file: "month", "sku" or ["sku", "month"]
+OUTPUT_PARTITION_BY = SETTINGS.output_partition_by
+# "csv" or "sqlite" (normalized, indexed tables; see sqlite_export.py)
+OUTPUT_FORMAT = SETTINGS.output_format
+# Also save SKU x day units / revenue / discount / holiday arrays as .npy files in <output>_demand/
+EXPORT_DEMAND_MATRIX = SETTINGS.output_demand_matrix
 
 # Quantity patterns based on product popularity and demand
 QUANTITY_PATTERNS = {
@@ -167,23 +190,9 @@ def generate_toy_products(num_skus):
     vendors = ["Hasbro", "Mattel", "LEGO Group", "Fisher-Price", "Spin Master", "Disney", "Crayola", "K'NEX", "Playmobil", "Various"]
     trends = ["stable", "growing", "declining", "volatile"]
     
-    # Category assignment logic
+    # Category assignment logic (weights compiled from config, normalized to 1.0)
     categories = ["stable_essentials", "normal_retail", "seasonal_trending", "volatile_viral"]
-    category_weights = [0.30, 0.40, 0.20, 0.10]  # Default weights if not in config
-    
-    if ENABLE_CATEGORY_BASED_BEHAVIOR:
-        # Use configured category weights
-        category_weights = []
-        for cat in categories:
-            if cat in PRODUCT_CATEGORIES:
-                category_weights.append(PRODUCT_CATEGORIES[cat].get('percentage_of_skus', 0.25))
-            else:
-                category_weights.append(0.25)
-        
-        # Normalize weights to sum to 1.0
-        total_weight = sum(category_weights)
-        if total_weight > 0:
-            category_weights = [w / total_weight for w in category_weights]
+    category_weights = list(SETTINGS.category_weights)
     
     product_types = [
         "Building Set", "Action Figure", "Doll", "Board Game", "Card Game", "Puzzle", "Art Supplies",
@@ -234,8 +243,16 @@ def generate_toy_products(num_skus):
         }
         products.append(product)
     
+    # Resolve each product's category to its compiled parameter index once
+    for product in products:
+        product["category_id"] = SETTINGS.category_id(product.get("category", "normal_retail"))
+    
     return products
 
+# Seed every random draw; without a configured seed a fresh one is drawn and recorded in the dataset catalog
+RANDOM_SEED = SETTINGS.random_seed if SETTINGS.random_seed is not None else random.SystemRandom().randrange(2 ** 32)
+random.seed(RANDOM_SEED)
+
 # Generate TOY_PRODUCTS based on config
 TOY_PRODUCTS = generate_toy_products(NUMBER_OF_SKUS)
 
@@ -443,11 +460,7 @@ def generate_varied_quantity(product: Dict, date: datetime, sku_history: List[in
     mean_qty = sum(pattern['values']) / len(pattern['values'])
     
     # Get category-specific noise factor
-    category_noise_factor = RANDOM_NOISE_FACTOR
-    if ENABLE_CATEGORY_BASED_BEHAVIOR and product:
-        category = product.get('category', 'normal_retail')
-        if category in PRODUCT_CATEGORIES:
-            category_noise_factor = PRODUCT_CATEGORIES[category].get('random_noise_factor', RANDOM_NOISE_FACTOR)
+    category_noise_factor = CATEGORY_NOISE[get_category_id(product)]
     
     noisy_qty = int(round(base_qty + random.gauss(0, category_noise_factor * max(mean_qty, 1))))
     final_qty = max(MIN_QUANTITY, min(MAX_QUANTITY, noisy_qty))
@@ -476,32 +489,24 @@ def add_realistic_noise(base_value: int, noise_factor: float = None, product: Di
     """Add realistic noise to quantity values using configurable noise factor."""
     if noise_factor is None:
         # Use category-specific noise factor if available
-        if product and ENABLE_CATEGORY_BASED_BEHAVIOR:
-            category = product.get('category', 'normal_retail')
-            if category in PRODUCT_CATEGORIES:
-                noise_factor = PRODUCT_CATEGORIES[category].get('random_noise_factor', RANDOM_NOISE_FACTOR)
-            else:
-                noise_factor = RANDOM_NOISE_FACTOR
-        else:
-            noise_factor = RANDOM_NOISE_FACTOR
+        noise_factor = CATEGORY_NOISE[get_category_id(product)]
     
     noise = random.uniform(-noise_factor, noise_factor)
     noisy_value = int(base_value * (1 + noise))
     return max(1, min(MAX_QUANTITY, noisy_value))
 
+def get_category_id(product: Dict = None) -> int:
+    """Return the compiled category parameter index for a product (fallback when categories are off)."""
+    if not product or not ENABLE_CATEGORY_BASED_BEHAVIOR:
+        return SETTINGS.default_category_id
+    category_id = product.get('category_id')
+    if category_id is None:
+        category_id = SETTINGS.category_id(product.get('category', 'normal_retail'))
+    return category_id
+
 def get_category_seasonal_factor(date: datetime, product: Dict) -> float:
     """Get category-specific seasonal factor."""
-    base_seasonal = calculate_seasonal_factor(date)
-    
-    if not ENABLE_CATEGORY_BASED_BEHAVIOR or not product:
-        return base_seasonal
-    
-    category = product.get('category', 'normal_retail')
-    if category in PRODUCT_CATEGORIES:
-        category_seasonal_multiplier = PRODUCT_CATEGORIES[category].get('seasonal_factor', 0.3) / 0.3  # Normalize to base
-        return base_seasonal * category_seasonal_multiplier
-    
-    return base_seasonal
+    return calculate_seasonal_factor(date) * CATEGORY_SEASONAL_MULTIPLIER[get_category_id(product)]
 
 def get_season_from_date(date: datetime) -> str:
     """Determine season from date for seasonal discount codes."""
@@ -592,81 +597,21 @@ def generate_discount_code(date: datetime, discount_ratio: float, is_holiday: bo
     return code
 
 def generate_discount_ratio(date: datetime, subtotal: float, total_quantity: int, is_holiday: bool = False, product: Dict = None) -> float:
-    """Generate realistic discount ratio for Prophet training data with category-specific behavior."""
+    """Generate realistic discount ratio for Prophet training data with category-specific behavior.
+    
+    The category, weekend, holiday and bulk-order adjustments are pre-applied
+    by generator_config, so this only picks the matching cumulative weights.
+    """
     if not ENABLE_DISCOUNTS or subtotal == 0:
         return 0.0
     
-    # Base distribution with contextual adjustments
-    base_ratios = list(DISCOUNT_RATIO_PROBABILITIES.keys())
-    base_weights = list(DISCOUNT_RATIO_PROBABILITIES.values())
-    
-    # Category-specific discount behavior
-    category_discount_multiplier = 1.0
-    category_max_discount = 1.0
-    
-    if ENABLE_CATEGORY_BASED_BEHAVIOR and product:
-        category = product.get('category', 'normal_retail')
-        discounts_config = CONFIG.get('discounts', {})
-        category_discounts = discounts_config.get('category_specific_discounts', {})
-        
-        if category in category_discounts:
-            category_info = category_discounts[category]
-            # Adjust discount probability based on category
-            discount_prob = category_info.get('discount_probability', 0.25)
-            category_discount_multiplier = discount_prob / 0.25  # Normalize to base 25%
-            
-            # Set maximum discount for category
-            category_max_discount = category_info.get('max_discount', 1.0)
-    
-    # Adjust weights based on context
-    adjusted_weights = base_weights.copy()
-    
-    # Apply category-specific discount behavior
-    for i in range(len(adjusted_weights)):
-        if base_ratios[i] == 0.0:
-            # Reduce no-discount probability for high-discount categories
-            adjusted_weights[i] *= (2.0 - category_discount_multiplier)
-        elif base_ratios[i] > 0.0:
-            # Increase discount probability for high-discount categories
-            adjusted_weights[i] *= category_discount_multiplier
-            
-        # Zero out discounts above category maximum
-        if base_ratios[i] > category_max_discount:
-            adjusted_weights[i] = 0.0
-    
-    # Increase probability of discounts on weekends
-    if date.weekday() >= 5:  # Weekend
-        # Shift probability from 0.0 to higher discount ratios
-        for i in range(len(adjusted_weights)):
-            if base_ratios[i] == 0.0:
-                adjusted_weights[i] *= 0.8  # Reduce no-discount probability
-            elif base_ratios[i] > 0.0:
-                adjusted_weights[i] *= 1.3  # Increase discount probability
-    
-    # Increase probability of discounts on holidays
-    if is_holiday:
-        for i in range(len(adjusted_weights)):
-            if base_ratios[i] == 0.0:
-                adjusted_weights[i] *= 0.6  # Reduce no-discount probability more
-            elif base_ratios[i] >= 0.20:
-                adjusted_weights[i] *= 2.0  # Double higher discount probabilities
-    
-    # Bulk orders get more discounts
-    if total_quantity >= 4:
-        for i in range(len(adjusted_weights)):
-            if base_ratios[i] == 0.0:
-                adjusted_weights[i] *= 0.7
-            elif base_ratios[i] >= 0.15:
-                adjusted_weights[i] *= 1.5
-    
-    # Normalize weights
-    total_weight = sum(adjusted_weights)
-    if total_weight == 0:
+    context = (4 if date.weekday() >= 5 else 0) + (2 if is_holiday else 0) + (1 if total_quantity >= BULK_ORDER_QUANTITY else 0)
+    cum_weights = DISCOUNT_CUM_WEIGHTS[get_category_id(product)][context]
+    if cum_weights is None:
         return 0.0
-    normalized_weights = [w / total_weight for w in adjusted_weights]
     
     # Select discount ratio
-    selected_ratio = random.choices(base_ratios, weights=normalized_weights, k=1)[0]
+    selected_ratio = random.choices(DISCOUNT_RATIOS, cum_weights=cum_weights, k=1)[0]
     
     # Round to 4 decimal places as specified
     return round(selected_ratio, 4)
@@ -751,8 +696,52 @@ def calculate_product_popularity_at_date(product: Dict, date: datetime, start_da
     # Ensure within reasonable bounds
     return max(0.1, min(1.0, effective_popularity))
 
-def generate_order_data(date: datetime, order_id: int, start_date: datetime = None, us_holiday_dates=None) -> List[Dict]:
-    """Generate order data with line items and holiday/stockout flags."""
+def draw_category_shocks() -> Tuple[float, ...]:
+    """Draw one mean-1 log-normal demand shock per category, shared by all its SKUs for a day."""
+    return tuple(math.exp(random.gauss(0, CATEGORY_SHOCK_STD) - CATEGORY_SHOCK_STD ** 2 / 2)
+                 for _ in SETTINGS.category_names)
+
+def pick_products(products: List[Dict], weights: List[float], num_items: int,
+                  demand_model: DemandFactorModel = None) -> List[Dict]:
+    """Weighted picks without repeats for one order.
+
+    ``products`` carry their TOY_PRODUCTS position as ``catalog_index``. With
+    ``demand_model`` each pick drops its substitutes and boosts its complements.
+    """
+    products, weights = list(products), list(weights)
+    selected_products = []
+    for _ in range(num_items):
+        if not products:
+            break
+        try:
+            idx = random.choices(range(len(products)), weights=weights)[0]
+        except (ValueError, IndexError):
+            # Fallback to random selection
+            selected_products.append(random.choice(products))
+            break
+        # Remove selected product to avoid duplicates in same order
+        selected_product = products.pop(idx)
+        weights.pop(idx)
+        selected_products.append(selected_product)
+        if demand_model is not None:
+            basket = demand_model.basket_factor(selected_product['catalog_index'])
+            weights = [w * basket[p['catalog_index']] for p, w in zip(products, weights)]
+            products = [p for p, w in zip(products, weights) if w > 0]
+            weights = [w for w in weights if w > 0]
+    return selected_products
+
+def generate_order_data(date: datetime, order_id: int, start_date: datetime = None, us_holiday_dates=None, category_shocks: Tuple[float, ...] = None, sku_multipliers: List[float] = None, demand_model: DemandFactorModel = None) -> List[Dict]:
+    """Generate order data with line items and holiday/stockout flags.
+    
+    ``category_shocks`` (indexed by category id) scales the selection weight of
+    every SKU in a category, so SKUs of the same category move together (with
+    or without popularity weighting).
+    ``sku_multipliers`` (one per TOY_PRODUCTS entry) applies injected anomalies
+    and correlated demand; a SKU with multiplier 0 is never selected.
+    With ``demand_model``, an order never holds two substitutes and each pick
+    makes its complements likelier for the remaining items (in both selection
+    modes; without popularity weighting the picks are then distinct too).
+    """
     if start_date is None:
         start_date = date
     if us_holiday_dates is None:
@@ -765,38 +754,39 @@ def generate_order_data(date: datetime, order_id: int, start_date: datetime = No
     if SKU_POPULARITY_WEIGHTS and ENSURE_SKU_DISTRIBUTION:
         # Calculate time-adjusted popularity for all products
         products_with_adjusted_popularity = []
-        for product in TOY_PRODUCTS:
+        for i, product in enumerate(TOY_PRODUCTS):
             adjusted_popularity = calculate_product_popularity_at_date(product, date, start_date)
+            if category_shocks:
+                adjusted_popularity *= category_shocks[product.get('category_id', SETTINGS.default_category_id)]
+            if sku_multipliers is not None:
+                if sku_multipliers[i] == 0:
+                    continue
+                adjusted_popularity *= sku_multipliers[i]
             products_with_adjusted_popularity.append({
                 **product,
-                'adjusted_popularity': adjusted_popularity
+                'adjusted_popularity': adjusted_popularity,
+                'catalog_index': i
             })
         
         # Use weighted selection based on adjusted popularity scores
-        products = products_with_adjusted_popularity.copy()
-        weights = [product["adjusted_popularity"] for product in products]
-        selected_products = []
-        
-        for _ in range(num_items):
-            if not products:
-                break
-            
-            try:
-                selected_product = random.choices(products, weights=weights)[0]
-                selected_products.append(selected_product)
-                
-                # Remove selected product to avoid duplicates in same order
-                idx = products.index(selected_product)
-                products.pop(idx)
-                weights.pop(idx)
-            except (ValueError, IndexError):
-                # Fallback to random selection
-                if products:
-                    selected_products.append(random.choice(products))
-                break
+        selected_products = pick_products(products_with_adjusted_popularity,
+                                          [product["adjusted_popularity"] for product in products_with_adjusted_popularity],
+                                          num_items, demand_model)
     else:
-        # Simple random selection without popularity weighting
-        selected_products = random.choices(TOY_PRODUCTS, k=min(num_items, len(TOY_PRODUCTS)))
+        # Without popularity weighting only the day's category shocks and SKU multipliers weight the picks
+        weights = None
+        if category_shocks or sku_multipliers is not None:
+            weights = [(category_shocks[product.get('category_id', SETTINGS.default_category_id)] if category_shocks else 1.0)
+                       * (sku_multipliers[i] if sku_multipliers is not None else 1.0)
+                       for i, product in enumerate(TOY_PRODUCTS)]
+        if demand_model is not None:
+            # Correlated demand needs distinct picks to keep its substitute / complement structure
+            candidates = [{**product, 'catalog_index': i} for i, product in enumerate(TOY_PRODUCTS) if weights[i] > 0]
+            selected_products = pick_products(candidates, [weights[p['catalog_index']] for p in candidates],
+                                              num_items, demand_model)
+        else:
+            # Simple random selection without popularity weighting
+            selected_products = random.choices(TOY_PRODUCTS, weights=weights, k=min(num_items, len(TOY_PRODUCTS)))
     
     line_items = []
     for product in selected_products:
@@ -931,8 +921,12 @@ def generate_order_data(date: datetime, order_id: int, start_date: datetime = No
     
     return line_items
 
-def ensure_minimum_sku_distribution(all_orders: List[Dict], start_date: datetime, end_date: datetime) -> List[Dict]:
-    """Ensure all SKUs meet minimum requirements for Prophet model compatibility."""
+def ensure_minimum_sku_distribution(all_orders: List[Dict], start_date: datetime, end_date: datetime, anomaly_labels=None) -> List[Dict]:
+    """Ensure all SKUs meet minimum requirements for Prophet model compatibility.
+
+    With ``anomaly_labels`` (SKUs x days, as from ``anomaly_multipliers``) no
+    extra orders are placed on a SKU's dropout, stock-out or no-order days.
+    """
     if not ENSURE_SKU_DISTRIBUTION:
         return all_orders
     
@@ -983,6 +977,7 @@ def ensure_minimum_sku_distribution(all_orders: List[Dict], start_date: datetime
         additional_orders = []
         next_order_id = max(int(order.get("Name", "#0").replace("#", "")) for order in all_orders if order.get("Name", "").startswith("#")) + 1
         
+        sku_index = {p["sku"]: i for i, p in enumerate(TOY_PRODUCTS)}
         for sku_info in skus_needing_boost:
             product = sku_info["product"]
             needed_units = sku_info["needed_units"]
@@ -991,6 +986,9 @@ def ensure_minimum_sku_distribution(all_orders: List[Dict], start_date: datetime
             # Generate sales across random dates to meet minimum day requirement
             total_days = (end_date - start_date).days
             date_range = [start_date + timedelta(days=i) for i in range(total_days)]
+            if anomaly_labels is not None:
+                blocked = np.isin(anomaly_labels[sku_index[product["sku"]]], ZERO_DEMAND_LABELS)
+                date_range = [d for i, d in enumerate(date_range) if not blocked[i]]
             selected_dates = random.sample(date_range, min(needed_days, len(date_range)))
             
             units_per_date = max(1, needed_units // max(1, len(selected_dates)))
@@ -1114,6 +1112,20 @@ def ensure_minimum_sku_distribution(all_orders: List[Dict], start_date: datetime
     
     return all_orders
 
+def register_output(output_filename: str, manifest, start_date: datetime, end_date: datetime, rows: int,
+                    extra_files: Dict[str, str]):
+    """Record this run in the dataset catalog; a catalog problem never fails the generation."""
+    try:
+        return register_dataset(
+            output_filename, SHOPIFY_ORDERS, generator='generate_synthetic_orders', config=CONFIG, seed=RANDOM_SEED,
+            start_date=start_date.strftime('%Y-%m-%d'), end_date=end_date.strftime('%Y-%m-%d'), rows=rows,
+            skus=[p['sku'] for p in TOY_PRODUCTS], compression=OUTPUT_COMPRESSION,
+            partitions=partition_files(output_filename, manifest) if manifest else (), extra_files=extra_files,
+            layout='sqlite' if OUTPUT_FORMAT == 'sqlite' else None)
+    except (sqlite3.Error, OSError) as e:
+        print(f"⚠️  Could not register dataset in catalog: {e}")
+        return None
+
 def generate_synthetic_data():
     """Generate the complete synthetic dataset with advanced realism: event spikes, trend drift, heteroskedastic noise, and improved smoothing."""
     print("🚀 Starting synthetic toy sales data generation...")
@@ -1138,9 +1150,10 @@ def generate_synthetic_data():
         
         for category, count in category_counts.items():
             percentage = (count / len(TOY_PRODUCTS)) * 100
-            if category in PRODUCT_CATEGORIES:
-                noise_factor = PRODUCT_CATEGORIES[category].get('random_noise_factor', 0.1)
-                seasonal_factor = PRODUCT_CATEGORIES[category].get('seasonal_factor', 0.3)
+            if category in SETTINGS.configured_categories:
+                category_id = SETTINGS.category_id(category)
+                noise_factor = SETTINGS.category_noise[category_id]
+                seasonal_factor = SETTINGS.category_seasonal_factor[category_id]
                 print(f"   - {category}: {count} SKUs ({percentage:.1f}%) | Noise: ±{noise_factor*100:.0f}% | Seasonal: {seasonal_factor}")
             else:
                 print(f"   - {category}: {count} SKUs ({percentage:.1f}%)")
@@ -1148,7 +1161,8 @@ def generate_synthetic_data():
         print(f"   - Global noise factor: ±{RANDOM_NOISE_FACTOR*100:.0f}%")
         print(f"   - Global seasonal factor: {SEASONAL_FACTOR}")
     
-    end_date = datetime.now() - timedelta(days=1)
+    # Midnight-anchored so order times (08:00-22:59) stay on their generation day
+    end_date = (datetime.now() - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
     
     # Calculate start_date - prioritize NUMBER_OF_DAYS_TO_GENERATE if set, otherwise use months
     if NUMBER_OF_DAYS_TO_GENERATE:
@@ -1168,65 +1182,128 @@ def generate_synthetic_data():
     # Assign a random trend to each SKU for drift
     sku_trends = {p['sku']: random.uniform(-0.02, 0.04) for p in TOY_PRODUCTS}
     sku_means = {p['sku']: p.get('popularity', 0.5) * 15 + 5 for p in TOY_PRODUCTS}
+    # Rows are streamed to a background (or partitioned) writer while generation continues
+    output_basename = f"toy_sales_synthetic_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    if OUTPUT_FORMAT == 'sqlite':
+        output_filename = f"{output_basename}.sqlite"
+        writer = SQLiteOrderWriter(output_filename, fieldnames=SHOPIFY_COLUMNS)
+    elif OUTPUT_PARTITION_BY:
+        output_filename = output_basename
+        writer = PartitionedWriter(output_filename, partition_by=OUTPUT_PARTITION_BY,
+                                   fieldnames=SHOPIFY_COLUMNS, compression=OUTPUT_COMPRESSION)
+    else:
+        output_filename = with_compression_suffix(f"{output_basename}.csv", OUTPUT_COMPRESSION)
+        writer = CompressedCSVWriter(output_filename, fieldnames=SHOPIFY_COLUMNS,
+                                     compression=OUTPUT_COMPRESSION, workers=OUTPUT_WRITER_THREADS)
+    writer.writeheader()
+    rollups = HierarchyAccumulator(TOY_PRODUCTS) if EMIT_ROLLUPS else None
+    demand = DemandAccumulator([p['sku'] for p in TOY_PRODUCTS], start_date,
+                               (end_date - start_date).days + 1) if EXPORT_DEMAND_MATRIX else None
+    # Injected anomalies and correlated demand are SKU multipliers; the day's order count
+    # follows the popularity-weighted multiplier so spikes and stock-outs change volume too
+    popularity = np.array([p.get('popularity', 0.5) for p in TOY_PRODUCTS])
+    anomaly_labels = None
+    if ANOMALIES is not None:
+        num_days = (end_date - start_date).days + 1
+        multipliers, anomaly_labels = anomaly_multipliers(
+            (len(TOY_PRODUCTS), num_days), ANOMALIES, np.random.default_rng(random.getrandbits(64)))
+    demand_model = None
+    if CORRELATED_DEMAND is not None:
+        demand_model = DemandFactorModel([p.get('category', 'unknown') for p in TOY_PRODUCTS], CORRELATED_DEMAND,
+                                         np.random.default_rng(random.getrandbits(64)))
+        # The whole catalog drives the daily order count instead of one random SKU
+        catalog_trend = popularity @ np.array([sku_trends[p['sku']] for p in TOY_PRODUCTS]) / popularity.sum()
+        catalog_mean = popularity @ np.array([sku_means[p['sku']] for p in TOY_PRODUCTS]) / popularity.sum()
+    day_index = -1
     while current_date <= end_date:
+        day_index += 1
         if random.random() < 0.02:
+            if anomaly_labels is not None:
+                anomaly_labels[:, day_index] = SKIPPED_DAY
             current_date += timedelta(days=1)
             prev_orders = None
             continue
         if current_date.month != last_month:
             month_index += 1
             last_month = current_date.month
-        rep_product = random.choice(TOY_PRODUCTS)
-        rep_sku = rep_product["sku"]
-        trend = sku_trends[rep_sku]
-        mean_sales = sku_means[rep_sku]
+        if demand_model is None:
+            rep_product = random.choice(TOY_PRODUCTS)
+            rep_sku = rep_product["sku"]
+            trend = sku_trends[rep_sku]
+            mean_sales = sku_means[rep_sku]
+        else:
+            rep_sku, trend, mean_sales = None, catalog_trend, catalog_mean
         daily_orders = calculate_daily_orders(current_date, month_index, us_holiday_dates, prev_orders, rep_sku, trend, mean_sales)
         if random.random() < 0.02:
             daily_orders = 0
+            if anomaly_labels is not None:
+                anomaly_labels[:, day_index] = ZERO_ORDER_DAY
         prev_orders = daily_orders
+        day_multipliers = multipliers[:, day_index] if anomaly_labels is not None else None
+        if demand_model is not None:
+            correlated = demand_model.sample()
+            day_multipliers = correlated if day_multipliers is None else day_multipliers * correlated
+        sku_multipliers = None
+        if day_multipliers is not None:
+            daily_orders = int(round(daily_orders * (popularity @ day_multipliers) / popularity.sum()))
+            sku_multipliers = day_multipliers.tolist()
+        day_start = len(all_orders)
+        category_shocks = draw_category_shocks() if CATEGORY_SHOCK_STD > 0 else None
         for _ in range(daily_orders):
             order_id = generate_order_id()
-            order_line_items = generate_order_data(current_date, order_id, start_date, us_holiday_dates)
+            order_line_items = generate_order_data(current_date, order_id, start_date, us_holiday_dates, category_shocks, sku_multipliers, demand_model)
             if random.random() < 0.01 and order_line_items:
                 order_line_items[0]["Financial Status"] = "refunded"
                 order_line_items[0]["Total"] = "0.00"
             all_orders.extend(order_line_items)
             total_orders_generated += 1
+        writer.writerows(all_orders[day_start:])
+        if rollups is not None:
+            rollups.add_line_items(all_orders[day_start:])
+        if demand is not None:
+            demand.add_line_items(all_orders[day_start:])
         if current_date.day == 1:
             print(f"📅 Processing {current_date.strftime('%B %Y')} - Orders so far: {total_orders_generated}")
         current_date += timedelta(days=1)
-    all_orders = ensure_minimum_sku_distribution(all_orders, start_date, end_date)
-    output_filename = f"toy_sales_synthetic_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    if all_orders:
-        # Define the specific column order as requested
-        fieldnames = [
-            "Name", "Email", "Financial Status", "Paid at", "Fulfillment Status", "Fulfilled at",
-            "Accepts Marketing", "Currency", "Subtotal", "Shipping", "Taxes", "Total", "Discount Code",
-            "Discount Amount", "discount_ratio", "Shipping Method", "Created at", "Lineitem quantity", "Lineitem name",
-            "Lineitem price", "Lineitem compare at price", "Lineitem sku", "Lineitem requires shipping",
-            "Lineitem taxable", "Lineitem fulfillment status", "Billing Name", "Billing Street",
-            "Billing Address1", "Billing Address2", "Billing Company", "Billing City", "Billing Zip",
-            "Billing Province", "Billing Country", "Billing Phone", "Shipping Name", "Shipping Street",
-            "Shipping Address1", "Shipping Address2", "Shipping Company", "Shipping City", "Shipping Zip",
-            "Shipping Province", "Shipping Country", "Shipping Phone", "Notes", "Note Attributes",
-            "Cancelled at", "Payment Method", "Payment Reference", "Refunded Amount", "Vendor",
-            "Outstanding Balance", "Employee", "Location", "Device ID", "Id", "Tags", "Risk Level",
-            "Source", "Lineitem discount", "Tax 1 Name", "Tax 1 Value", "Tax 2 Name", "Tax 2 Value",
-            "Tax 3 Name", "Tax 3 Value", "Tax 4 Name", "Tax 4 Value", "Tax 5 Name", "Tax 5 Value",
-            # Adding missing fields from the error message
-            "Customer", "Receipt Number", "Billing Province Name", "Lineitem variant id", 
-            "is_holiday", "Updated at", "Payment References", "Shipping Province Name", 
-            "Lineitem variant", "Processed at", "Duties", "Payment ID", "stockout", 
-            "Payment Terms Name", "Phone", "is_weekend", "Next Payment Due At", 
-            "Lineitem product id", "Lineitem grams"
-        ]
-
-        with open(output_filename, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(all_orders)
+    generated_rows = len(all_orders)
+    all_orders = ensure_minimum_sku_distribution(all_orders, start_date, end_date, anomaly_labels)
+    writer.writerows(all_orders[generated_rows:])
+    manifest = writer.close()
+    rollups_filename = anomalies_filename = demand_dir = None
+    extra_files = {}
+    if rollups is not None:
+        rollups.add_line_items(all_orders[generated_rows:])
+        rollups_filename = with_compression_suffix(f"{output_basename}_rollups.csv", OUTPUT_COMPRESSION)
+        rollups.write_csv(rollups_filename, compression=OUTPUT_COMPRESSION)
+    if anomaly_labels is not None:
+        anomalies_filename = with_compression_suffix(f"{output_basename}_anomalies.csv", OUTPUT_COMPRESSION)
+        dates = [start_date + timedelta(days=i) for i in range(anomaly_labels.shape[1])]
+        labelled = write_labels(anomalies_filename, anomaly_labels, [p['sku'] for p in TOY_PRODUCTS],
+                                dates, compression=OUTPUT_COMPRESSION)
+    if demand is not None:
+        demand.add_line_items(all_orders[generated_rows:])
+        demand_dir = f"{output_basename}_demand"
+        extra_files = {f"demand_{name}": path for name, path in demand.write(demand_dir).items()}
+    if OUTPUT_FORMAT == 'sqlite':
+        print_load_stats(manifest, output_filename)
+    dataset_id = register_output(output_filename, manifest if OUTPUT_PARTITION_BY else None, start_date, end_date,
+                                 len(all_orders), {'rollups': rollups_filename, 'anomalies': anomalies_filename,
+                                                   **extra_files})
     print(f"✅ Data generation complete!")
-    print(f"📁 Output file: {output_filename}")
+    if dataset_id is not None:
+        print(f"🗂️  Registered in dataset catalog as #{dataset_id} (seed {RANDOM_SEED})")
+    if OUTPUT_FORMAT == 'sqlite':
+        print(f"📁 Output database: {output_filename} (query with: python sqlite_export.py query {output_filename})")
+    elif OUTPUT_PARTITION_BY:
+        print(f"📁 Output directory: {output_filename}/ (partitioned by {OUTPUT_PARTITION_BY}, see _manifest.json)")
+    else:
+        print(f"📁 Output file: {output_filename}")
+    if rollups is not None:
+        print(f"🧮 Hierarchy rollups (sku/category/vendor/total): {rollups_filename}")
+    if anomaly_labels is not None:
+        print(f"🚨 Anomaly labels ({labelled} SKU-days): {anomalies_filename}")
+    if demand_dir is not None:
+        print(f"🧊 Demand matrix (.npy, load with np.load(..., mmap_mode='r')): {demand_dir}/")
     print(f"🎯 Total orders generated: {total_orders_generated}")
     print(f"📋 Total line items: {len(all_orders)}")
     print(f"💰 Estimated total revenue: ${sum(float(order['Total']) for order in all_orders if order['Total']):.2f}")
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Compiled Configuration for Forezia Mock Data Generator
+Validates config.json strictly and compiles it into a frozen, flat settings object
+"""
+
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from anomalies import AnomalySpec
+from correlated_demand import CorrelationSpec
+from output_writer import resolve_compression
+
+# Categories understood by generate_toy_products (order defines the category ids)
+KNOWN_CATEGORIES = ("stable_essentials", "normal_retail", "seasonal_trending", "volatile_viral")
+DEFAULT_CATEGORY = "normal_retail"
+OUTPUT_FORMATS = ("csv", "sqlite")
+
+# Reference values the per-category multipliers are normalized against
+BASE_SEASONAL_FACTOR = 0.3
+BASE_DISCOUNT_PROBABILITY = 0.25
+BULK_ORDER_QUANTITY = 4
+
+DEFAULT_DISCOUNT_RATIO_PROBABILITIES = {
+    0.00: 0.75,   # 75% of orders have no discount (most common)
+    0.10: 0.08,   # 8% have 10% discount (light promotions)
+    0.15: 0.06,   # 6% have 15% discount
+    0.20: 0.05,   # 5% have 20% discount
+    0.25: 0.03,   # 3% have 25% discount
+    0.30: 0.02,   # 2% have 30% discount (seasonal sales)
+    0.40: 0.005,  # 0.5% have 40% discount (rare big promotions)
+    0.50: 0.005,  # 0.5% have 50% discount (very rare deep promotions)
+}
+
+
+class ConfigError(ValueError):
+    """Raised when a configuration fails validation; lists every problem found."""
+
+    def __init__(self, errors: List[str], source: str = 'config'):
+        self.errors = list(errors)
+        lines = "\n".join(f"  - {e}" for e in self.errors)
+        super().__init__(f"Invalid {source} ({len(self.errors)} error(s)):\n{lines}")
+
+
+@dataclass(frozen=True)
+class _Field:
+    """Schema entry for one scalar configuration value."""
+    kind: str                 # 'int', 'number', 'bool', 'probability', 'range', 'any'
+    default: Any
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    optional: bool = False    # None allowed
+
+
+# Scalar settings per section. Sections with free-form keys
+# (product_categories, discount tables) are validated separately.
+SCHEMA: Dict[str, Dict[str, _Field]] = {
+    'data_generation': {
+        'number_of_skus': _Field('int', 50, minimum=1),
+        'number_of_months': _Field('int', 12, minimum=1),
+        'NUMBER_OF_DAYS_TO_GENERATE': _Field('int', None, minimum=1, optional=True),
+        'average_monthly_growth': _Field('number', 0.08, minimum=-1.0),
+        'weekend_boost_factor': _Field('number', 1.8, minimum=0.0),
+        'base_daily_orders': _Field('number', 15, minimum=0.0),
+        'seasonal_factor': _Field('number', 0.3, minimum=0.0),
+        'random_noise_factor': _Field('number', 0.1, minimum=0.0),
+        'variable_growth_per_sku': _Field('bool', False),
+        'growth_range': _Field('range', [0.02, 0.15]),
+        'random_seed': _Field('int', None, minimum=0, optional=True),  # None = fresh seed, recorded in the catalog
+    },
+    'prophet_optimization': {
+        'min_sales_days_per_sku': _Field('int', 30, minimum=0),
+        'min_total_units_per_sku': _Field('int', 50, minimum=0),
+        'ensure_sku_distribution': _Field('bool', True),
+        'sku_popularity_weights': _Field('bool', True),
+    },
+    'discounts': {
+        'enable_discounts': _Field('bool', True),
+    },
+    'quantity_settings': {
+        'enable_quantity_variety': _Field('bool', True),
+        'min_quantity': _Field('int', 0, minimum=0),
+        'max_quantity': _Field('int', 8, minimum=1),
+        'stock_out_probability': _Field('probability', 0.05),
+        'bulk_order_probability': _Field('probability', 0.20),
+        'low_inventory_probability': _Field('probability', 0.15),
+        'high_demand_spike_probability': _Field('probability', 0.10),
+    },
+    'hierarchy': {
+        'emit_rollups': _Field('bool', False),
+        'category_shock_std': _Field('number', 0.0, minimum=0.0),
+    },
+    'anomalies': {
+        'enabled': _Field('bool', False),
+        'spike_rate': _Field('probability', AnomalySpec.spike_rate),
+        'spike_magnitude': _Field('range', list(AnomalySpec.spike_magnitude)),
+        'level_shift_rate': _Field('probability', AnomalySpec.level_shift_rate),
+        'level_shift_magnitude': _Field('range', list(AnomalySpec.level_shift_magnitude)),
+        'level_shift_days': _Field('range', list(AnomalySpec.level_shift_days)),
+        'dropout_rate': _Field('probability', AnomalySpec.dropout_rate),
+        'stockout_rate': _Field('probability', AnomalySpec.stockout_rate),
+        'stockout_days': _Field('range', list(AnomalySpec.stockout_days)),
+    },
+    'correlated_demand': {
+        'enabled': _Field('bool', False),
+        'market_std': _Field('number', CorrelationSpec.market_std, minimum=0.0),
+        'category_std': _Field('number', CorrelationSpec.category_std, minimum=0.0),
+        'complement_std': _Field('number', CorrelationSpec.complement_std, minimum=0.0),
+        'complement_group_size': _Field('int', CorrelationSpec.complement_group_size, minimum=1),
+        'substitute_std': _Field('number', CorrelationSpec.substitute_std, minimum=0.0),
+        'substitute_group_size': _Field('int', CorrelationSpec.substitute_group_size, minimum=1),
+        'idiosyncratic_std': _Field('number', CorrelationSpec.idiosyncratic_std, minimum=0.0),
+        'persistence': _Field('number', CorrelationSpec.persistence, minimum=0.0, maximum=0.99),
+        'complement_basket_boost': _Field('number', CorrelationSpec.complement_basket_boost, minimum=0.0),
+    },
+    'output': {
+        'compression': _Field('any', None, optional=True),
+        'writer_threads': _Field('int', 2, minimum=1),
+        'partition_by': _Field('any', None, optional=True),
+        'format': _Field('any', 'csv'),
+        'demand_matrix': _Field('bool', False),
+    },
+}
+
+# Keys allowed in sections that also hold free-form tables
+_TABLE_KEYS = {
+    'discounts': {'discount_ratio_probabilities', 'category_specific_discounts'},
+}
+_CATEGORY_KEYS = {
+    'percentage_of_skus': _Field('number', 0.25, minimum=0.0),
+    'random_noise_factor': _Field('number', None, minimum=0.0),
+    'seasonal_factor': _Field('number', BASE_SEASONAL_FACTOR, minimum=0.0),
+    'description': _Field('any', ''),
+    'examples': _Field('any', []),
+}
+_CATEGORY_DISCOUNT_KEYS = {
+    'discount_probability': _Field('probability', BASE_DISCOUNT_PROBABILITY),
+    'max_discount': _Field('probability', 1.0),
+}
+
+
+@dataclass(frozen=True)
+class GeneratorConfig:
+    """Flat, immutable view of config.json used by the generator's hot paths.
+
+    Per-category parameters are stored as tuples indexed by category id
+    (``category_id(name)``); the last id is the fallback used for products
+    without a configured category, so lookups never branch on the config.
+    """
+    # data_generation
+    number_of_skus: int
+    number_of_months: int
+    number_of_days_to_generate: Optional[int]
+    average_monthly_growth: float
+    weekend_boost_factor: float
+    base_daily_orders: float
+    seasonal_factor: float
+    random_noise_factor: float
+    variable_growth_per_sku: bool
+    growth_range: Tuple[float, float]
+    random_seed: Optional[int]
+    # prophet_optimization
+    min_sales_days_per_sku: int
+    min_total_units_per_sku: int
+    ensure_sku_distribution: bool
+    sku_popularity_weights: bool
+    # discounts
+    enable_discounts: bool
+    discount_ratios: Tuple[float, ...]
+    discount_weights: Tuple[float, ...]
+    # quantity_settings
+    enable_quantity_variety: bool
+    min_quantity: int
+    max_quantity: int
+    stock_out_probability: float
+    bulk_order_probability: float
+    low_inventory_probability: float
+    high_demand_spike_probability: float
+    # hierarchy
+    emit_rollups: bool
+    category_shock_std: float
+    # anomalies (None when injection is disabled)
+    anomalies: Optional[AnomalySpec]
+    # correlated cross-SKU demand (None when disabled)
+    correlated_demand: Optional[CorrelationSpec]
+    # output
+    output_compression: Optional[str]
+    output_writer_threads: int
+    output_partition_by: Optional[Any]
+    output_format: str
+    output_demand_matrix: bool
+    # product categories (parallel tuples indexed by category id)
+    enable_category_based_behavior: bool
+    category_names: Tuple[str, ...]
+    configured_categories: Tuple[str, ...]
+    category_weights: Tuple[float, ...]
+    category_noise: Tuple[float, ...]
+    category_seasonal_factor: Tuple[float, ...]
+    category_seasonal_multiplier: Tuple[float, ...]
+    category_discount_multiplier: Tuple[float, ...]
+    category_max_discount: Tuple[float, ...]
+    # cumulative discount weights per category id and context flags
+    # (index: weekend * 4 + holiday * 2 + bulk); None when every weight is 0
+    discount_cum_weights: Tuple[Tuple[Optional[Tuple[float, ...]], ...], ...]
+    category_ids: Mapping[str, int]
+    raw: Mapping[str, Any]
+
+    @property
+    def default_category_id(self) -> int:
+        return len(self.category_names) - 1
+
+    def category_id(self, category: Optional[str]) -> int:
+        """Return the parameter index for a category name (fallback for unknown)."""
+        return self.category_ids.get(category, self.default_category_id)
+
+
+def _check_value(path: str, value: Any, field: _Field, errors: List[str]) -> Any:
+    if value is None:
+        if field.optional:
+            return None
+        errors.append(f"{path}: value is required")
+        return field.default
+    kind = field.kind
+    if kind == 'bool':
+        if not isinstance(value, bool):
+            errors.append(f"{path}: expected true/false, got {value!r}")
+        return value
+    if kind == 'any':
+        return value
+    if kind == 'range':
+        if (not isinstance(value, (list, tuple)) or len(value) != 2
+                or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value)):
+            errors.append(f"{path}: expected [low, high] numbers, got {value!r}")
+            return tuple(field.default)
+        if value[0] > value[1]:
+            errors.append(f"{path}: low {value[0]} is greater than high {value[1]}")
+        return (float(value[0]), float(value[1]))
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        errors.append(f"{path}: expected a number, got {value!r}")
+        return field.default
+    if kind == 'int' and not isinstance(value, int):
+        errors.append(f"{path}: expected an integer, got {value!r}")
+        return field.default
+    minimum, maximum = field.minimum, field.maximum
+    if kind == 'probability':
+        minimum = 0.0 if minimum is None else minimum
+        maximum = 1.0 if maximum is None else maximum
+    if minimum is not None and value < minimum:
+        errors.append(f"{path}: {value} is below the minimum of {minimum}")
+    if maximum is not None and value > maximum:
+        errors.append(f"{path}: {value} is above the maximum of {maximum}")
+    return value
+
+
+def _check_section(name: str, section: Any, fields: Dict[str, _Field], errors: List[str],
+                   extra_keys=()) -> Dict[str, Any]:
+    values = {key: (tuple(f.default) if f.kind == 'range' else f.default) for key, f in fields.items()}
+    if section is None:
+        return values
+    if not isinstance(section, dict):
+        errors.append(f"{name}: expected an object, got {type(section).__name__}")
+        return values
+    for key, value in section.items():
+        if key in fields:
+            values[key] = _check_value(f"{name}.{key}", value, fields[key], errors)
+        elif key not in extra_keys:
+            errors.append(f"{name}.{key}: unknown setting")
+    return values
+
+
+def _compile_discount_probabilities(raw: Any, errors: List[str]) -> Dict[float, float]:
+    if raw is None or raw == {}:
+        return dict(DEFAULT_DISCOUNT_RATIO_PROBABILITIES)
+    if not isinstance(raw, dict):
+        errors.append("discounts.discount_ratio_probabilities: expected an object of ratio -> probability")
+        return dict(DEFAULT_DISCOUNT_RATIO_PROBABILITIES)
+    probabilities = {}
+    for ratio_str, prob in raw.items():
+        path = f"discounts.discount_ratio_probabilities.{ratio_str}"
+        try:
+            ratio = float(ratio_str)
+        except ValueError:
+            errors.append(f"{path}: ratio key is not a number")
+            continue
+        if not 0.0 <= ratio <= 1.0:
+            errors.append(f"{path}: ratio must be between 0 and 1")
+        prob = _check_value(path, prob, _Field('probability', 0.0), errors)
+        probabilities[ratio] = prob
+    total = sum(p for p in probabilities.values() if isinstance(p, (int, float)))
+    if probabilities and abs(total - 1.0) > 0.01:
+        errors.append(f"discounts.discount_ratio_probabilities: probabilities sum to {total:.3f}, should be 1.0")
+    return probabilities
+
+
+def _discount_cum_weights(ratios, weights, multiplier: float, max_discount: float):
+    """Pre-apply every context adjustment of generate_discount_ratio for one category."""
+    tables = []
+    for flags in range(8):
+        is_weekend, is_holiday, is_bulk = bool(flags & 4), bool(flags & 2), bool(flags & 1)
+        adjusted = []
+        for ratio, weight in zip(ratios, weights):
+            w = weight
+            if ratio == 0.0:
+                w *= (2.0 - multiplier)
+            elif ratio > 0.0:
+                w *= multiplier
+            if ratio > max_discount:
+                w = 0.0
+            if is_weekend:
+                if ratio == 0.0:
+                    w *= 0.8
+                elif ratio > 0.0:
+                    w *= 1.3
+            if is_holiday:
+                if ratio == 0.0:
+                    w *= 0.6
+                elif ratio >= 0.20:
+                    w *= 2.0
+            if is_bulk:
+                if ratio == 0.0:
+                    w *= 0.7
+                elif ratio >= 0.15:
+                    w *= 1.5
+            adjusted.append(w)
+        total = sum(adjusted)
+        if total == 0:
+            tables.append(None)
+            continue
+        cumulative, running = [], 0.0
+        for w in adjusted:
+            running += w
+            cumulative.append(running)
+        tables.append(tuple(cumulative))
+    return tuple(tables)
+
+
+def compile_config(raw: Optional[Dict[str, Any]], source: str = 'config') -> GeneratorConfig:
+    """Validate ``raw`` (parsed config.json) and compile it into a GeneratorConfig.
+
+    All problems are collected and raised together as a ConfigError, so a bad
+    config fails before any data is generated.
+    """
+    raw = raw or {}
+    errors: List[str] = []
+    if not isinstance(raw, dict):
+        raise ConfigError(["top level: expected a JSON object"], source)
+
+    known_sections = set(SCHEMA) | {'product_categories'}
+    for section in raw:
+        if section not in known_sections:
+            errors.append(f"{section}: unknown section")
+
+    sections = {
+        name: _check_section(name, raw.get(name), fields, errors, _TABLE_KEYS.get(name, ()))
+        for name, fields in SCHEMA.items()
+    }
+    gen = sections['data_generation']
+    quantity = sections['quantity_settings']
+    anomaly = sections['anomalies']
+    correlation = sections['correlated_demand']
+    output = sections['output']
+
+    if quantity['min_quantity'] > quantity['max_quantity']:
+        errors.append(f"quantity_settings: min_quantity {quantity['min_quantity']} is greater "
+                      f"than max_quantity {quantity['max_quantity']}")
+
+    for key in ('level_shift_days', 'stockout_days'):
+        if anomaly[key][0] < 1:
+            errors.append(f"anomalies.{key}: runs must last at least 1 day, got {list(anomaly[key])}")
+
+    # Output settings
+    compression = None
+    try:
+        compression = resolve_compression('', output['compression'])
+    except (ValueError, ImportError) as e:
+        errors.append(f"output.compression: {e}")
+    partition_by = output['partition_by']
+    if partition_by is not None:
+        keys = [partition_by] if isinstance(partition_by, str) else partition_by
+        if not isinstance(keys, list) or not keys or any(k not in ('sku', 'month') for k in keys):
+            errors.append(f"output.partition_by: expected 'month', 'sku' or a list of them, got {partition_by!r}")
+    if output['format'] not in OUTPUT_FORMATS:
+        errors.append(f"output.format: expected one of {', '.join(OUTPUT_FORMATS)}, got {output['format']!r}")
+    elif output['format'] == 'sqlite' and (partition_by is not None or compression is not None):
+        errors.append("output.format: sqlite output cannot be partitioned or compressed")
+
+    # Discount table
+    discounts_raw = raw.get('discounts') if isinstance(raw.get('discounts'), dict) else {}
+    discount_probabilities = _compile_discount_probabilities(
+        discounts_raw.get('discount_ratio_probabilities'), errors)
+
+    # Product categories
+    categories_raw = raw.get('product_categories') or {}
+    if not isinstance(categories_raw, dict):
+        errors.append("product_categories: expected an object")
+        categories_raw = {}
+    category_values = {}
+    for name, params in categories_raw.items():
+        if name not in KNOWN_CATEGORIES:
+            errors.append(f"product_categories.{name}: unknown category (use one of {', '.join(KNOWN_CATEGORIES)})")
+            continue
+        category_values[name] = _check_section(f"product_categories.{name}", params, _CATEGORY_KEYS, errors)
+
+    category_discounts_raw = discounts_raw.get('category_specific_discounts') or {}
+    if not isinstance(category_discounts_raw, dict):
+        errors.append("discounts.category_specific_discounts: expected an object")
+        category_discounts_raw = {}
+    category_discount_values = {}
+    for name, params in category_discounts_raw.items():
+        if name not in KNOWN_CATEGORIES:
+            errors.append(f"discounts.category_specific_discounts.{name}: unknown category")
+            continue
+        category_discount_values[name] = _check_section(
+            f"discounts.category_specific_discounts.{name}", params, _CATEGORY_DISCOUNT_KEYS, errors)
+
+    if errors:
+        raise ConfigError(errors, source)
+
+    enable_categories = bool(categories_raw)
+    global_noise = gen['random_noise_factor']
+    ratios = tuple(discount_probabilities.keys())
+    weights = tuple(discount_probabilities.values())
+
+    # Parallel per-category parameter tuples; last entry is the fallback
+    names = KNOWN_CATEGORIES + ('__default__',)
+    noise, seasonal, seasonal_mult, discount_mult, max_discount, cat_weights, cum_tables = [], [], [], [], [], [], []
+    for name in names:
+        cat = category_values.get(name) if enable_categories else None
+        noise.append(cat['random_noise_factor'] if cat and cat['random_noise_factor'] is not None else global_noise)
+        seasonal.append(cat['seasonal_factor'] if cat else BASE_SEASONAL_FACTOR)
+        seasonal_mult.append(cat['seasonal_factor'] / BASE_SEASONAL_FACTOR if cat else 1.0)
+        cat_weights.append(cat['percentage_of_skus'] if cat else 0.25)
+        disc = category_discount_values.get(name) if enable_categories else None
+        discount_mult.append(disc['discount_probability'] / BASE_DISCOUNT_PROBABILITY if disc else 1.0)
+        max_discount.append(disc['max_discount'] if disc else 1.0)
+        cum_tables.append(_discount_cum_weights(ratios, weights, discount_mult[-1], max_discount[-1]))
+
+    # generate_toy_products draws categories for generated SKUs with these weights
+    known_weights = cat_weights[:len(KNOWN_CATEGORIES)]
+    if enable_categories:
+        total = sum(known_weights)
+        if total > 0:
+            known_weights = [w / total for w in known_weights]
+    else:
+        known_weights = [0.30, 0.40, 0.20, 0.10]
+
+    return GeneratorConfig(
+        number_of_skus=gen['number_of_skus'],
+        number_of_months=gen['number_of_months'],
+        number_of_days_to_generate=gen['NUMBER_OF_DAYS_TO_GENERATE'],
+        average_monthly_growth=gen['average_monthly_growth'],
+        weekend_boost_factor=gen['weekend_boost_factor'],
+        base_daily_orders=gen['base_daily_orders'],
+        seasonal_factor=gen['seasonal_factor'],
+        random_noise_factor=global_noise,
+        variable_growth_per_sku=gen['variable_growth_per_sku'],
+        growth_range=tuple(gen['growth_range']),
+        random_seed=gen['random_seed'],
+        min_sales_days_per_sku=sections['prophet_optimization']['min_sales_days_per_sku'],
+        min_total_units_per_sku=sections['prophet_optimization']['min_total_units_per_sku'],
+        ensure_sku_distribution=sections['prophet_optimization']['ensure_sku_distribution'],
+        sku_popularity_weights=sections['prophet_optimization']['sku_popularity_weights'],
+        enable_discounts=sections['discounts']['enable_discounts'],
+        discount_ratios=ratios,
+        discount_weights=weights,
+        enable_quantity_variety=quantity['enable_quantity_variety'],
+        min_quantity=quantity['min_quantity'],
+        max_quantity=quantity['max_quantity'],
+        stock_out_probability=quantity['stock_out_probability'],
+        bulk_order_probability=quantity['bulk_order_probability'],
+        low_inventory_probability=quantity['low_inventory_probability'],
+        high_demand_spike_probability=quantity['high_demand_spike_probability'],
+        emit_rollups=sections['hierarchy']['emit_rollups'],
+        category_shock_std=sections['hierarchy']['category_shock_std'],
+        anomalies=AnomalySpec(**{k: v for k, v in anomaly.items() if k != 'enabled'}) if anomaly['enabled'] else None,
+        correlated_demand=(CorrelationSpec(**{k: v for k, v in correlation.items() if k != 'enabled'})
+                           if correlation['enabled'] else None),
+        output_compression=compression,
+        output_writer_threads=output['writer_threads'],
+        output_partition_by=partition_by,
+        output_format=output['format'],
+        output_demand_matrix=output['demand_matrix'],
+        enable_category_based_behavior=enable_categories,
+        category_names=names,
+        configured_categories=tuple(n for n in KNOWN_CATEGORIES if n in category_values),
+        category_weights=tuple(known_weights),
+        category_noise=tuple(noise),
+        category_seasonal_factor=tuple(seasonal),
+        category_seasonal_multiplier=tuple(seasonal_mult),
+        category_discount_multiplier=tuple(discount_mult),
+        category_max_discount=tuple(max_discount),
+        discount_cum_weights=tuple(cum_tables),
+        category_ids=MappingProxyType({name: i for i, name in enumerate(KNOWN_CATEGORIES)}),
+        raw=MappingProxyType(raw),
+    )
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Hierarchy Rollups for Forezia Mock Data
+Accumulates SKU -> category -> vendor -> total aggregates while data is generated
+"""
+
+import csv
+from typing import Dict, Iterable, List, Optional, Sequence
+
+HIERARCHY_LEVELS = ('sku', 'category', 'vendor', 'total')
+TOTAL_KEY = 'total'
+ROLLUP_FIELDNAMES = ['level', 'key', 'date', 'units', 'revenue', 'line_items']
+
+
+class HierarchyAccumulator:
+    """Running SKU-day totals that roll up to category, vendor and total.
+
+    Only the SKU level is updated per line item (one dict update); the upper
+    levels are derived from the SKU-day cells when ``rollups()`` is called,
+    so every level reconciles exactly with the SKU series and no second pass
+    over the generated rows is needed.
+    """
+
+    def __init__(self, products: Iterable[Dict]):
+        self.sku_category = {}
+        self.sku_vendor = {}
+        for product in products:
+            self.sku_category[product['sku']] = product.get('category', 'unknown')
+            self.sku_vendor[product['sku']] = product.get('vendor', 'unknown')
+        # (sku, date) -> [units, revenue, line_items]
+        self._cells: Dict[tuple, List] = {}
+
+    def add(self, sku: str, date: str, units: int, revenue: float):
+        """Record one line item (``date`` as ``YYYY-MM-DD``)."""
+        cell = self._cells.get((sku, date))
+        if cell is None:
+            self._cells[(sku, date)] = [units, revenue, 1]
+        else:
+            cell[0] += units
+            cell[1] += revenue
+            cell[2] += 1
+
+    def add_line_items(self, line_items: Iterable[Dict]):
+        """Record Shopify-layout line item dicts as produced by the generator."""
+        for item in line_items:
+            sku = item.get('Lineitem sku')
+            if not sku:
+                continue
+            total = item.get('Total')
+            self.add(sku, item['Created at'][:10], int(item.get('Lineitem quantity') or 0),
+                     float(total) if total else 0.0)
+
+    def rollups(self, levels: Sequence[str] = HIERARCHY_LEVELS) -> List[Dict]:
+        """Return rollup rows for ``levels`` sorted by level, key and date."""
+        tables = {level: {} for level in levels}
+        for (sku, date), (units, revenue, lines) in self._cells.items():
+            for level in levels:
+                if level == 'sku':
+                    key = sku
+                elif level == 'category':
+                    key = self.sku_category.get(sku, 'unknown')
+                elif level == 'vendor':
+                    key = self.sku_vendor.get(sku, 'unknown')
+                else:
+                    key = TOTAL_KEY
+                cell = tables[level].get((key, date))
+                if cell is None:
+                    tables[level][(key, date)] = [units, revenue, lines]
+                else:
+                    cell[0] += units
+                    cell[1] += revenue
+                    cell[2] += lines
+        rows = []
+        for level in levels:
+            for (key, date), (units, revenue, lines) in sorted(tables[level].items()):
+                rows.append({
+                    'level': level,
+                    'key': key,
+                    'date': date,
+                    'units': units,
+                    'revenue': f"{revenue:.2f}",
+                    'line_items': lines,
+                })
+        return rows
+
+    def write_csv(self, path: str, levels: Sequence[str] = HIERARCHY_LEVELS, compression: Optional[str] = None):
+        """Write all rollup levels to one long CSV (level, key, date, ...)."""
+        from output_writer import CompressedCSVWriter
+
+        with CompressedCSVWriter(path, fieldnames=ROLLUP_FIELDNAMES, compression=compression) as writer:
+            writer.writeheader()
+            writer.writerows(self.rollups(levels))
+
+
+def rollup_matrix(matrix, codes, num_groups: int):
+    """Sum the rows of a ``(items, days)`` matrix into ``(num_groups, days)``.
+
+    ``codes[i]`` is the group index of row ``i``. Used by the vectorized
+    generators to aggregate SKU series to category / vendor level.
+    """
+    import numpy as np
+
+    out = np.zeros((num_groups, matrix.shape[1]), dtype=np.int64)
+    np.add.at(out, np.asarray(codes), matrix)
+    return out
+
+
+def group_codes(values: Sequence[str]):
+    """Return ``(codes, labels)`` for a sequence of group labels (first-seen order)."""
+    labels: List[str] = []
+    index: Dict[str, int] = {}
+    codes = []
+    for value in values:
+        code = index.get(value)
+        if code is None:
+            code = index[value] = len(labels)
+            labels.append(value)
+        codes.append(code)
+    return codes, labels
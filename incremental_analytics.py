@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Incremental Analytics for Growing Order Exports
+Keeps mergeable summary state with the byte offset it covers, so re-runs only scan appended rows
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from csv_scanner import (AGGREGATES, Aggregate, DEFAULT_WORKERS, last_record_end, main_order_rows, order_day,
+                         read_header, register_aggregate, scan_csv)
+from output_writer import resolve_compression
+from sketches import HyperLogLog
+
+STATE_SUFFIX = '.analytics.pkl'
+STATE_VERSION = 1  # bump when the state layout changes
+FINGERPRINT_BYTES = 64 * 1024  # bytes hashed at the start and end of the covered region
+
+
+# ----------------------------------------------------------------------
+# Aggregates (merged across scanner ranges and across runs)
+# ----------------------------------------------------------------------
+def _daily_summary(frame):
+    main = main_order_rows(frame)
+    total = pd.to_numeric(main['Total'], errors='coerce').fillna(0.0)
+    grouped = total.groupby(order_day(main).rename('date'))
+    return pd.DataFrame({'orders': grouped.size(), 'revenue': grouped.sum(),
+                         'min_total': grouped.min(), 'max_total': grouped.max()})
+
+
+def merge_daily(partials: List[pd.DataFrame]) -> pd.DataFrame:
+    """Merge daily summaries: counts and sums add, extremes take min / max."""
+    partials = [p for p in partials if len(p)]
+    if not partials:
+        return pd.DataFrame(columns=['orders', 'revenue', 'min_total', 'max_total'],
+                            index=pd.Index([], name='date'))
+    return pd.concat(partials).groupby(level=0).agg(
+        {'orders': 'sum', 'revenue': 'sum', 'min_total': 'min', 'max_total': 'max'}).sort_index()
+
+
+def _product_lines(frame):
+    names = frame['Lineitem name']
+    return names[names != ''].value_counts().rename('lines')
+
+
+def _vendor_lines(frame):
+    vendors = frame['Vendor']
+    return vendors[vendors != ''].value_counts().rename('lines')
+
+
+def _order_names(frame):
+    names = frame['Name']
+    return HyperLogLog().add(names[names != ''].to_numpy())
+
+
+for _aggregate in (
+    Aggregate('daily_summary', ('Financial Status', 'Created at', 'Total'), _daily_summary,
+              "Orders, revenue and order value range per day", merge=merge_daily),
+    Aggregate('product_lines', ('Lineitem name',), _product_lines, "Line items per product"),
+    Aggregate('vendor_lines', ('Vendor',), _vendor_lines, "Line items per vendor"),
+    Aggregate('order_names', ('Name',), _order_names, "Distinct order names (HyperLogLog)",
+              merge=HyperLogLog.merge_all),
+):
+    register_aggregate(_aggregate)
+
+# Everything the saved state holds
+STATE_AGGREGATES = ('daily_summary', 'product_lines', 'vendor_lines', 'order_names', 'sku_day_units')
+
+
+# ----------------------------------------------------------------------
+# State
+# ----------------------------------------------------------------------
+@dataclass
+class AnalyticsState:
+    """Merged aggregates plus the part of the source file they cover."""
+    offset: int = 0                # bytes covered (always a record boundary)
+    rows: int = 0
+    head_digest: str = ''          # hash of the first bytes of the file
+    tail_digest: str = ''          # hash of the bytes just before ``offset``
+    results: Dict[str, object] = field(default_factory=dict)
+
+    def merge(self, scan: Dict[str, object]):
+        """Fold a scan of newly appended rows into the state."""
+        for name in STATE_AGGREGATES:
+            previous = self.results.get(name)
+            self.results[name] = scan[name] if previous is None else AGGREGATES[name].merge_partials([previous, scan[name]])
+        self.rows += scan['rows']
+
+
+def state_path(path: str) -> str:
+    return path + STATE_SUFFIX
+
+
+def _digest(path: str, start: int, end: int) -> str:
+    with open(path, 'rb') as f:
+        f.seek(max(0, start))
+        return hashlib.sha256(f.read(max(0, end - start))).hexdigest()
+
+
+def _fingerprint(path: str, offset: int):
+    return (_digest(path, 0, min(offset, FINGERPRINT_BYTES)),
+            _digest(path, offset - FINGERPRINT_BYTES, offset))
+
+
+def load_state(path: str) -> Optional[AnalyticsState]:
+    """Saved state for ``path`` if the file still starts with the bytes it covered."""
+    try:
+        with open(state_path(path), 'rb') as f:
+            saved = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if saved.get('version') != STATE_VERSION:
+        return None
+    state = saved['state']
+    if os.path.getsize(path) < state.offset or _fingerprint(path, state.offset) != (state.head_digest, state.tail_digest):
+        return None  # truncated or rewritten: not an append
+    return state
+
+
+def save_state(path: str, state: AnalyticsState):
+    target = state_path(path)
+    tmp = f'{target}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        pickle.dump({'version': STATE_VERSION, 'state': state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, target)
+
+
+def update_analytics(path: str, workers: int = DEFAULT_WORKERS, full: bool = False) -> Dict[str, object]:
+    """Bring the saved state for ``path`` up to date and return it with scan info.
+
+    Only the bytes appended since the last run are scanned; the partial
+    aggregates of the new tail are merged into the saved ones. A file that
+    was truncated or rewritten (or ``full=True``) is rescanned from the
+    start. Compressed files cannot be scanned from an offset and are always
+    rescanned.
+    """
+    compressed = resolve_compression(path) is not None
+    state = None if (full or compressed) else load_state(path)
+    rescanned = state is None
+    if state is None:
+        state = AnalyticsState(offset=read_header(path)[1] if not compressed else 0)
+
+    start = state.offset
+    if compressed:
+        scan = scan_csv(path, STATE_AGGREGATES, workers=workers)
+    else:
+        end = max(last_record_end(path), start)
+        scan = scan_csv(path, STATE_AGGREGATES, workers=workers, start_offset=start, end_offset=end)
+        state.offset = end
+    state.merge(scan)
+    if not compressed:
+        state.head_digest, state.tail_digest = _fingerprint(path, state.offset)
+        save_state(path, state)
+    return {'state': state, 'rescanned': rescanned, 'scanned_bytes': state.offset - start, 'new_rows': scan['rows']}
+
+
+# ----------------------------------------------------------------------
+# Report (same sections as analyze_synthetic_data.py)
+# ----------------------------------------------------------------------
+def print_report(state: AnalyticsState):
+    results = state.results
+    daily = results['daily_summary']
+    orders = int(daily['orders'].sum())
+    revenue = daily['revenue'].sum()
+
+    print(f"\n📊 Basic Statistics:")
+    print(f"   - Total rows: {state.rows:,}")
+    print(f"   - Unique orders (HyperLogLog): ~{results['order_names'].count():,}")
+    if len(daily):
+        print(f"   - Date range: {daily.index.min()} to {daily.index.max()}")
+
+    if orders:
+        print(f"\n💰 Revenue Analysis:")
+        print(f"   - Total revenue: ${revenue:,.2f}")
+        print(f"   - Average order value: ${revenue / orders:.2f}")
+        print(f"   - Min order value: ${daily['min_total'].min():.2f}")
+        print(f"   - Max order value: ${daily['max_total'].max():.2f}")
+
+    print_daily_trends(daily)
+
+    products = results['product_lines'].sort_values(ascending=False, kind='stable')
+    print(f"\n🧸 Product Analysis:")
+    print(f"   - Unique products sold: {len(products)}")
+    print(f"   - Top 5 products:")
+    for i, (product, count) in enumerate(products.head().items(), 1):
+        print(f"     {i}. {product}: {count} units")
+
+    vendors = results['vendor_lines'].sort_values(ascending=False, kind='stable')
+    print(f"\n🏭 Vendor Analysis:")
+    print(f"   - Top 5 vendors:")
+    for i, (vendor, count) in enumerate(vendors.head().items(), 1):
+        print(f"     {i}. {vendor}: {count} line items")
+
+
+def print_daily_trends(daily: pd.DataFrame):
+    """Monthly growth and weekend sections from a ``daily_summary`` frame."""
+    dates = pd.to_datetime(daily.index)
+    monthly = daily['orders'].groupby(dates.to_period('M')).sum()
+    print(f"\n📈 Monthly Growth Analysis:")
+    for i in range(1, len(monthly)):
+        growth = (monthly.iloc[i] - monthly.iloc[i - 1]) / monthly.iloc[i - 1] * 100
+        print(f"   - {monthly.index[i]}: {monthly.iloc[i]:,} orders ({growth:+.1f}% vs prev month)")
+
+    weekend = dates.dayofweek >= 5
+    if len(daily) and weekend.any() and (~weekend).any():
+        weekend_orders = int(daily['orders'][weekend].sum())
+        weekday_orders = int(daily['orders'][~weekend].sum())
+        weekend_boost = (weekend_orders / (len(daily) * 2 / 7)) / (weekday_orders / (len(daily) * 5 / 7))
+        print(f"\n🎯 Weekend Analysis:")
+        print(f"   - Weekend orders: {weekend_orders:,}")
+        print(f"   - Weekday orders: {weekday_orders:,}")
+        print(f"   - Weekend boost factor: {weekend_boost:.2f}x")
+
+
+def analyze_incremental(path: str, workers: int = DEFAULT_WORKERS, full: bool = False):
+    """Update the saved state for ``path`` and print the analysis report."""
+    print(f"🔍 Analyzing synthetic data: {path}")
+    update = update_analytics(path, workers=workers, full=full)
+    mode = "full scan" if update['rescanned'] else "appended rows only"
+    print(f"⚡ {mode}: {update['new_rows']:,} new rows ({update['scanned_bytes'] / 1e6:.1f} MB scanned)")
+    print_report(update['state'])
+    print(f"\n✅ Analysis complete!")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally analyze a growing order export")
+    parser.add_argument('input', help="Shopify-layout CSV")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--full', action='store_true', help="Ignore saved state and rescan the whole file")
+    args = parser.parse_args()
+    analyze_incremental(args.input, workers=args.workers, full=args.full)
+
+
+if __name__ == '__main__':
+    main()
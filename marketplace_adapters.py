@@ -0,0 +1,597 @@
+#!/usr/bin/env python3
+"""
+Marketplace Export Adapters for Forezia Mock Data
+Declarative column-mapping specs compiled into vectorized converters to the Shopify schema
+"""
+
+import argparse
+import json
+import os
+import string
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from output_writer import CompressedCSVWriter, with_compression_suffix
+from shopify_schema import SHOPIFY_COLUMNS
+from sqlite_export import SQLiteOrderWriter, is_sqlite_path
+
+DEFAULT_CHUNK_SIZE = 250000
+DEFAULT_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+SHOPIFY_DATE_FORMAT = '%Y-%m-%d %H:%M:%S -0400'
+
+# Values every adapter computes; column rules refer to them with {"field": ...}
+ORDER_FIELDS = (
+    'order_name', 'financial_status', 'fulfillment_status', 'created_at', 'paid_at',
+    'fulfilled_at', 'customer_name', 'email', 'subtotal', 'total', 'payment_reference',
+)
+LINE_FIELDS = ('price', 'quantity')
+# Exactly one value source per column rule
+RULE_SOURCES = ('const', 'column', 'field', 'template', 'choice', 'random_int')
+RULE_OPTIONS = ('table', 'default', 'first_line', 'required', 'p')
+SPEC_KEYS = {
+    'name': None,
+    'description': '',
+    'order_id': None,
+    'status_column': None,
+    'status_rules': [],
+    'default_status': ['pending', 'unfulfilled'],
+    'skip_statuses': [],
+    'date_column': None,
+    'date_format': None,
+    'year_shift': 0,
+    'fulfillment_delay_days': [1, 3],
+    'amount_column': None,
+    'exchange_rate': 1.0,
+    'quantity_column': None,
+    'customer_column': None,
+    'customer_suffix': ' Customer',
+    'columns': None,
+}
+REQUIRED_SPEC_KEYS = ('name', 'order_id', 'columns')
+
+# Amazon India "Amazon Sale Report" -> Shopify (prices converted INR -> EUR)
+AMAZON_IN_SPEC = {
+    'name': 'amazon_in',
+    'description': 'Amazon India sales report (INR) converted to a EUR Shopify export',
+    'order_id': 'Order ID',
+    'status_column': 'Status',
+    'status_rules': [
+        {'contains': 'Shipped', 'financial': 'paid', 'fulfillment': 'fulfilled'},
+        {'equals': 'Cancelled', 'financial': 'refunded', 'fulfillment': 'restocked'},
+    ],
+    'default_status': ['pending', 'unfulfilled'],
+    'skip_statuses': ['Cancelled'],
+    'date_column': 'Date',
+    'date_format': '%m-%d-%y',
+    'year_shift': 3,
+    'fulfillment_delay_days': [1, 3],
+    'amount_column': 'Amount',
+    'exchange_rate': 88.5,  # INR per EUR (approximate)
+    'quantity_column': 'Qty',
+    'customer_column': 'ship-city',
+    'columns': {
+        'Name': {'field': 'order_name'},
+        'Email': {'field': 'email'},
+        'Financial Status': {'field': 'financial_status'},
+        'Paid at': {'field': 'paid_at'},
+        'Fulfillment Status': {'field': 'fulfillment_status'},
+        'Fulfilled at': {'field': 'fulfilled_at'},
+        'Accepts Marketing': {'const': 'no'},
+        'Currency': {'const': 'EUR'},
+        'Subtotal': {'field': 'subtotal', 'first_line': True},
+        'Shipping': {'const': 0.0, 'first_line': True},
+        'Taxes': {'const': 0.0, 'first_line': True},
+        'Total': {'field': 'total', 'first_line': True},
+        'Discount Amount': {'const': 0.0},
+        'Created at': {'field': 'created_at'},
+        'Lineitem quantity': {'field': 'quantity'},
+        'Lineitem name': {
+            'column': 'Category',
+            'table': {
+                'T-shirt': ['The Minimal Snowboard', 'The Multi-location Snowboard', 'The Videographer Snowboard'],
+                'Shirt': ['The Collection Snowboard: Hydrogen', 'The Collection Snowboard: Oxygen', 'The Complete Snowboard - Ice'],
+                'Blazzer': ['The Inventory Not Tracked Snowboard'],
+                'Trousers': ['Selling Plans Ski Wax - Selling Plans Ski Wax', 'Selling Plans Ski Wax - Special Selling Plans Ski Wax'],
+                'Perfume': ['Gift Card - $100', 'Gift Card - $50', 'Gift Card - $25'],
+                'Socks': ['Gift Card - $10'],
+                'Shoes': ['Gift Card - $10'],
+                'Wallet': ['Gift Card - $10'],
+            },
+            'default': ['The Multi-location Snowboard'],
+        },
+        'Lineitem price': {'field': 'price'},
+        'Lineitem sku': {'template': 'SKU-{Category}-{Size}', 'required': ['Size']},
+        'Lineitem requires shipping': {'column': 'Category', 'table': {'Perfume': 'false', 'Wallet': 'false'}, 'default': 'true'},
+        'Lineitem taxable': {'const': 'true'},
+        'Lineitem fulfillment status': {'field': 'fulfillment_status', 'table': {'fulfilled': 'fulfilled'}, 'default': 'pending'},
+        'Billing Name': {'field': 'customer_name', 'first_line': True},
+        'Billing Address1': {'column': 'ship-city', 'first_line': True},
+        'Billing City': {'column': 'ship-city', 'first_line': True},
+        'Billing Zip': {'column': 'ship-postal-code', 'first_line': True},
+        'Billing Province': {'column': 'ship-state', 'first_line': True},
+        'Billing Country': {'column': 'ship-country', 'first_line': True},
+        'Shipping Name': {'field': 'customer_name', 'first_line': True},
+        'Shipping Address1': {'column': 'ship-city', 'first_line': True},
+        'Shipping City': {'column': 'ship-city', 'first_line': True},
+        'Shipping Zip': {'column': 'ship-postal-code', 'first_line': True},
+        'Shipping Province': {'column': 'ship-state', 'first_line': True},
+        'Shipping Country': {'column': 'ship-country', 'first_line': True},
+        'Payment Method': {'const': 'manual'},
+        'Payment Reference': {'field': 'payment_reference', 'first_line': True},
+        'Refunded Amount': {'const': 0.0},
+        'Vendor': {'choice': ['Snowboard Vendor', 'Test Cycle Sense App', 'Hydrogen Vendor']},
+        'Outstanding Balance': {'const': 0.0},
+        'Employee': {'const': 'Luis Guimaraes'},
+        'Location': {'choice': ['Shop location', ''], 'p': [0.7, 0.3]},
+        'Id': {'random_int': [6630000000000, 6650000000000]},
+        'Risk Level': {'const': 'Low'},
+        'Source': {'const': 'shopify_draft_order'},
+        'Lineitem discount': {'const': 0.0},
+        'Billing Province Name': {'column': 'ship-state', 'first_line': True},
+        'Shipping Province Name': {'column': 'ship-state', 'first_line': True},
+        'Payment ID': {'field': 'payment_reference', 'first_line': True},
+        'Payment References': {'field': 'payment_reference', 'first_line': True},
+    },
+}
+
+ADAPTERS: Dict[str, 'MarketplaceAdapter'] = {}
+
+
+class AdapterSpecError(ValueError):
+    """Raised when an adapter spec is invalid; lists every problem found."""
+
+    def __init__(self, name: str, errors: List[str]):
+        self.errors = errors
+        details = "\n".join(f"  - {e}" for e in errors)
+        super().__init__(f"Invalid adapter spec '{name}' ({len(errors)} error(s)):\n{details}")
+
+
+def _template_columns(template: str) -> List[str]:
+    return [field for _, field, _, _ in string.Formatter().parse(template) if field]
+
+
+def _validate_spec(spec: Dict) -> List[str]:
+    errors = []
+    for key in REQUIRED_SPEC_KEYS:
+        if not spec.get(key):
+            errors.append(f"{key}: required")
+    for key in spec:
+        if key not in SPEC_KEYS:
+            errors.append(f"{key}: unknown spec key")
+    for i, rule in enumerate(spec.get('status_rules') or []):
+        if ('contains' in rule) == ('equals' in rule):
+            errors.append(f"status_rules[{i}]: needs exactly one of 'contains' or 'equals'")
+        if 'financial' not in rule or 'fulfillment' not in rule:
+            errors.append(f"status_rules[{i}]: needs 'financial' and 'fulfillment'")
+    if spec.get('status_rules') and not spec.get('status_column'):
+        errors.append("status_rules: needs status_column")
+    delay = spec.get('fulfillment_delay_days', SPEC_KEYS['fulfillment_delay_days'])
+    if len(delay) != 2 or delay[0] > delay[1]:
+        errors.append("fulfillment_delay_days: must be [min, max]")
+    if not spec.get('exchange_rate', 1.0) or spec.get('exchange_rate', 1.0) <= 0:
+        errors.append("exchange_rate: must be > 0")
+
+    for column, rule in (spec.get('columns') or {}).items():
+        where = f"columns['{column}']"
+        if column not in SHOPIFY_COLUMNS:
+            errors.append(f"{where}: not a Shopify schema column")
+        if not isinstance(rule, dict):
+            errors.append(f"{where}: rule must be an object")
+            continue
+        sources = [key for key in RULE_SOURCES if key in rule]
+        if len(sources) != 1:
+            errors.append(f"{where}: needs exactly one of {', '.join(RULE_SOURCES)}")
+        for key in rule:
+            if key not in RULE_SOURCES and key not in RULE_OPTIONS:
+                errors.append(f"{where}: unknown option '{key}'")
+        field = rule.get('field')
+        if field is not None and field not in ORDER_FIELDS + LINE_FIELDS:
+            errors.append(f"{where}: unknown field '{field}'")
+        if field in ('price', 'subtotal', 'total') and not spec.get('amount_column'):
+            errors.append(f"{where}: field '{field}' needs amount_column")
+        if field in ('created_at', 'paid_at', 'fulfilled_at') and not spec.get('date_column'):
+            errors.append(f"{where}: field '{field}' needs date_column")
+        if field in ('customer_name', 'email') and not spec.get('customer_column'):
+            errors.append(f"{where}: field '{field}' needs customer_column")
+        if 'choice' in rule and 'p' in rule and len(rule['p']) != len(rule['choice']):
+            errors.append(f"{where}: 'p' must have one weight per choice")
+        if 'random_int' in rule and len(rule['random_int']) != 2:
+            errors.append(f"{where}: random_int must be [low, high)")
+    return errors
+
+
+class MarketplaceAdapter:
+    """A compiled adapter spec: turns chunks of one export format into Shopify rows.
+
+    Compiling resolves everything that does not depend on the data once:
+    the source columns to parse (nothing else is read), status rules,
+    lookup tables (flattened so random picks among several values are one
+    vectorized draw) and the per-column rules in Shopify schema order.
+    ``transform`` then works on whole columns of a chunk at a time.
+    """
+
+    def __init__(self, spec: Dict):
+        errors = _validate_spec(spec)
+        if errors:
+            raise AdapterSpecError(spec.get('name', '?'), errors)
+        self.spec = {key: spec.get(key, default) for key, default in SPEC_KEYS.items()}
+        self.name = self.spec['name']
+        self.rules = [(column, spec['columns'][column]) for column in SHOPIFY_COLUMNS
+                      if column in spec['columns']]
+        self.skip_statuses = list(self.spec['skip_statuses'])
+        self.source_dtypes = self._source_dtypes()
+
+    def _source_dtypes(self) -> Dict[str, str]:
+        spec = self.spec
+        dtypes = {spec['order_id']: 'str'}
+        for key in ('status_column', 'date_column', 'customer_column'):
+            if spec[key]:
+                dtypes[spec[key]] = 'str'
+        for key in ('amount_column', 'quantity_column'):
+            if spec[key]:
+                dtypes[spec[key]] = 'float64'
+        for _, rule in self.rules:
+            if 'column' in rule:
+                dtypes.setdefault(rule['column'], 'str')
+            if 'template' in rule:
+                for column in _template_columns(rule['template']):
+                    dtypes.setdefault(column, 'str')
+            for column in rule.get('required', []):
+                dtypes.setdefault(column, 'str')
+        return dtypes
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def iter_chunks(self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+        """Yield chunks of ``path`` that only contain complete orders.
+
+        The rows of the last order in each chunk are carried over to the
+        next one, so an order that straddles a chunk boundary is converted in
+        one piece (exports list the items of an order next to each other).
+        """
+        order_id = self.spec['order_id']
+        wanted = self.source_dtypes
+        carry = None
+        for chunk in pd.read_csv(path, chunksize=chunk_size, dtype=wanted, usecols=lambda c: c in wanted):
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            tail = (chunk[order_id] == chunk[order_id].iloc[-1]).to_numpy()
+            tail &= np.logical_and.accumulate(tail[::-1])[::-1]  # only the trailing run
+            carry = chunk[tail]
+            if (~tail).any():
+                yield chunk[~tail]
+        if carry is not None and len(carry):
+            yield carry
+
+    def _group(self, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray, np.ndarray]:
+        """Gather items by order (first-appearance order) and flag kept items."""
+        codes, order_ids = pd.factorize(chunk[self.spec['order_id']])
+        order_sort = np.argsort(codes, kind='stable')
+        chunk = chunk.iloc[order_sort].reset_index(drop=True)
+        codes = codes[order_sort]
+        if self.skip_statuses and self.spec['status_column']:
+            keep = (~chunk[self.spec['status_column']].isin(self.skip_statuses)).to_numpy()
+        else:
+            keep = np.ones(len(chunk), dtype=bool)
+        return chunk, codes, np.asarray(order_ids, dtype=object), keep
+
+    def count_orders(self, chunk: pd.DataFrame) -> int:
+        """Number of orders in ``chunk`` that produce at least one Shopify line."""
+        _, codes, order_ids, keep = self._group(chunk)
+        return int((np.bincount(codes, weights=keep, minlength=len(order_ids)) > 0).sum())
+
+    # ------------------------------------------------------------------
+    # Conversion
+    # ------------------------------------------------------------------
+    def transform(self, chunk: pd.DataFrame, first_order_number: int, rng: np.random.Generator) -> pd.DataFrame:
+        """Convert a chunk of complete orders into Shopify schema rows.
+
+        Order-level values come from the first source row of each order (even
+        if it is skipped); skipped items are dropped and orders left without
+        items do not use an order number.
+        """
+        spec = self.spec
+        chunk, codes, order_ids, keep = self._group(chunk)
+        num_orders = len(order_ids)
+        order_start = np.r_[True, codes[1:] != codes[:-1]] if len(codes) else np.zeros(0, dtype=bool)
+        first = chunk[order_start]
+
+        orders = {}
+        financial, fulfillment = self._statuses(first)
+        orders['financial_status'], orders['fulfillment_status'] = financial, fulfillment
+        if spec['date_column']:
+            created_at = _lookup(first[spec['date_column']], self._convert_date).to_numpy(dtype=object)
+            orders['created_at'] = created_at
+            orders['paid_at'] = np.where(financial == 'paid', created_at, '')
+            orders['fulfilled_at'] = self._fulfilled_at(created_at, fulfillment == 'fulfilled', rng)
+        if spec['customer_column']:
+            names = (first[spec['customer_column']].str.title() + spec['customer_suffix']).fillna('')
+            emails = names.str.lower().str.replace(' ', '.', regex=False).str.replace(',', '', regex=False) + '@example.com'
+            orders['customer_name'] = names.to_numpy(dtype=object)
+            orders['email'] = emails.where(names != '', '').to_numpy(dtype=object)
+        orders['payment_reference'] = ('r' + pd.Series(order_ids, dtype=object).astype(str)
+                                       .str.replace('-', '', regex=False).str[:25]).to_numpy(dtype=object)
+
+        lines = {}
+        if spec['amount_column']:
+            price = (pd.to_numeric(chunk[spec['amount_column']], errors='coerce') / spec['exchange_rate']).round(2).fillna(0.0).to_numpy()
+            subtotal = np.bincount(codes, weights=np.where(keep, price, 0.0), minlength=num_orders).round(2)
+            orders['subtotal'] = orders['total'] = subtotal
+            lines['price'] = price[keep]
+        has_items = np.bincount(codes, weights=keep, minlength=num_orders) > 0
+        order_number = first_order_number + np.cumsum(has_items) - 1
+        orders['order_name'] = ('#' + order_number.astype(str).astype(object))
+
+        items = chunk[keep].reset_index(drop=True)
+        item_codes = codes[keep]
+        n = len(items)
+        first_line = np.r_[True, item_codes[1:] != item_codes[:-1]] if n else np.zeros(0, dtype=bool)
+        if spec['quantity_column']:
+            lines['quantity'] = pd.to_numeric(items[spec['quantity_column']], errors='coerce').fillna(1).astype(int).to_numpy()
+        else:
+            lines['quantity'] = np.ones(n, dtype=int)
+
+        out = {}
+        for column, rule in self.rules:
+            values, present = self._rule_values(rule, items, item_codes, orders, lines, n, rng)
+            if 'table' in rule:
+                values = _map_table(values, rule['table'], rule.get('default', ''), rng)
+            if rule.get('first_line'):
+                present = first_line if present is None else (first_line & present)
+            if present is not None:
+                masked = np.full(n, '', dtype=object)
+                masked[present] = np.asarray(values, dtype=object)[present]
+                values = masked
+            out[column] = values
+        return pd.DataFrame(out, index=pd.RangeIndex(n)).reindex(columns=SHOPIFY_COLUMNS, fill_value='')
+
+    def _statuses(self, first: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        spec = self.spec
+        default = tuple(spec['default_status'])
+        if not spec['status_column']:
+            return (np.full(len(first), default[0], dtype=object), np.full(len(first), default[1], dtype=object))
+
+        def resolve(status):
+            for rule in spec['status_rules']:
+                if ('contains' in rule and rule['contains'] in status) or rule.get('equals') == status:
+                    return rule['financial'], rule['fulfillment']
+            return default
+
+        resolved = _lookup(first[spec['status_column']].fillna(''), resolve)
+        return (np.array([s[0] for s in resolved], dtype=object), np.array([s[1] for s in resolved], dtype=object))
+
+    def _convert_date(self, value) -> str:
+        """Convert one source date to the Shopify format (now() if unparseable)."""
+        try:
+            if self.spec['date_format']:
+                date_obj = datetime.strptime(value, self.spec['date_format'])
+            else:
+                date_obj = pd.Timestamp(value).to_pydatetime()
+            if self.spec['year_shift']:
+                date_obj = date_obj.replace(year=date_obj.year + self.spec['year_shift'])
+            return date_obj.strftime(SHOPIFY_DATE_FORMAT)
+        except (TypeError, ValueError):
+            return datetime.now().strftime(SHOPIFY_DATE_FORMAT)
+
+    def _fulfilled_at(self, created_at: np.ndarray, fulfilled: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        out = np.full(len(created_at), '', dtype=object)
+        if fulfilled.any():
+            low, high = self.spec['fulfillment_delay_days']
+            created = pd.to_datetime(pd.Series(created_at[fulfilled]).str[:19], format='%Y-%m-%d %H:%M:%S')
+            delay = pd.to_timedelta(rng.integers(low, high + 1, int(fulfilled.sum())), unit='D')
+            out[fulfilled] = (created + delay).dt.strftime(SHOPIFY_DATE_FORMAT).to_numpy(dtype=object)
+        return out
+
+    def _rule_values(self, rule: Dict, items: pd.DataFrame, item_codes: np.ndarray, orders: Dict, lines: Dict,
+                     n: int, rng: np.random.Generator):
+        """Return ``(values, present_mask)`` for one column rule (mask None = all present)."""
+        if 'const' in rule:
+            return np.full(n, rule['const'], dtype=object), None
+        if 'column' in rule:
+            values = items[rule['column']]
+            # Missing values stay blank unless a lookup table supplies a default
+            present = None if 'table' in rule else values.notna().to_numpy()
+            return values.fillna('').to_numpy(dtype=object), present
+        if 'field' in rule:
+            field = rule['field']
+            if field in lines:
+                return lines[field], None
+            return orders[field][item_codes], None
+        if 'template' in rule:
+            parts = []
+            for literal, column, _, _ in string.Formatter().parse(rule['template']):
+                if literal:
+                    parts.append(literal)
+                if column:
+                    parts.append(items[column].astype(str))
+            values = parts[0]
+            for part in parts[1:]:
+                values = values + part
+            present = np.ones(n, dtype=bool)
+            for column in rule.get('required', []):
+                present &= items[column].notna().to_numpy()
+            return np.broadcast_to(np.asarray(values, dtype=object), (n,)), present
+        if 'choice' in rule:
+            choices = np.array(rule['choice'], dtype=object)
+            return choices[rng.choice(len(choices), size=n, p=rule.get('p'))], None
+        low, high = rule['random_int']
+        return rng.integers(low, high, n), None
+
+
+def _lookup(values: pd.Series, fn) -> pd.Series:
+    """Apply ``fn`` once per distinct value and map the results back (lookup table)."""
+    table = {value: fn(value) for value in values.unique()}
+    return values.map(table)
+
+
+def _map_table(values, table: Dict, default, rng: np.random.Generator) -> np.ndarray:
+    """Map values through ``table``; list entries pick one element at random per row."""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object).fillna(''))
+    entries = [table.get(value, default) for value in uniques]
+    entries = [entry if isinstance(entry, list) else [entry] for entry in entries]
+    if not entries:
+        return np.array([], dtype=object)
+    # Flatten every entry into one table + offsets so the lookup is one gather
+    flat = np.array([value for entry in entries for value in entry], dtype=object)
+    lengths = np.array([len(entry) for entry in entries])
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    if (lengths > 1).any():
+        picks = (rng.random(len(codes)) * lengths[codes]).astype(np.int64)
+    else:
+        picks = 0
+    return flat[offsets[codes] + picks]
+
+
+# ----------------------------------------------------------------------
+# Registry
+# ----------------------------------------------------------------------
+def register_adapter(spec: Dict) -> MarketplaceAdapter:
+    """Compile ``spec`` and register it under its name."""
+    adapter = MarketplaceAdapter(spec)
+    ADAPTERS[adapter.name] = adapter
+    return adapter
+
+
+def load_adapter_spec(path: str) -> MarketplaceAdapter:
+    """Compile and register an adapter spec stored as JSON."""
+    with open(path, 'r') as f:
+        return register_adapter(json.load(f))
+
+
+def get_adapter(name: str) -> MarketplaceAdapter:
+    if name not in ADAPTERS:
+        raise KeyError(f"Unknown adapter '{name}'. Available: {', '.join(sorted(ADAPTERS))}")
+    return ADAPTERS[name]
+
+
+register_adapter(AMAZON_IN_SPEC)
+
+
+# ----------------------------------------------------------------------
+# Streaming pipeline
+# ----------------------------------------------------------------------
+def _chunk_rng(seed: Optional[int], index: int) -> np.random.Generator:
+    # Per-chunk streams: output is reproducible regardless of the worker count
+    return np.random.default_rng(None if seed is None else [seed, index])
+
+
+def _convert_chunk_to_csv(adapter: MarketplaceAdapter, chunk: pd.DataFrame, first_order_number: int,
+                          seed: Optional[int], index: int) -> Tuple[bytes, int]:
+    """Worker task: convert one chunk and format it as CSV bytes."""
+    converted = adapter.transform(chunk, first_order_number, _chunk_rng(seed, index))
+    text = converted.to_csv(index=False, header=False, lineterminator='\n')
+    return text.encode('utf-8'), len(converted)
+
+
+def _convert_chunk(adapter: MarketplaceAdapter, chunk: pd.DataFrame, first_order_number: int,
+                   seed: Optional[int], index: int) -> Tuple[pd.DataFrame, int]:
+    """Worker task: convert one chunk (for the SQLite backend, which loads frames)."""
+    converted = adapter.transform(chunk, first_order_number, _chunk_rng(seed, index))
+    return converted, len(converted)
+
+
+def convert_export(adapter: MarketplaceAdapter, input_path: str, output_path: str,
+                   workers: int = DEFAULT_WORKERS, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   compression: Optional[str] = None, seed: Optional[int] = None,
+                   first_order_number: int = 1001) -> Dict:
+    """Convert a marketplace export to a Shopify CSV in a streaming pipeline.
+
+    The main process reads complete-order chunks and assigns each chunk its
+    first order number (a cheap vectorized count), so chunks can be converted
+    and formatted independently in worker processes. Results are written in
+    input order through ``CompressedCSVWriter``; at most ``2 * workers``
+    chunks are in flight, which keeps memory bounded. An ``output_path``
+    ending in ``.sqlite`` / ``.db`` is loaded into a database instead
+    (``sqlite_export.SQLiteOrderWriter``).
+    """
+    if is_sqlite_path(output_path):
+        if compression:
+            raise ValueError("SQLite output cannot be compressed")
+        writer = SQLiteOrderWriter(output_path, fieldnames=SHOPIFY_COLUMNS)
+        convert, write = _convert_chunk, writer.write_frame
+        write_header = writer.writeheader
+    else:
+        output_path = with_compression_suffix(output_path, compression)
+        writer = CompressedCSVWriter(output_path, fieldnames=SHOPIFY_COLUMNS, compression=compression)
+        convert, write = _convert_chunk_to_csv, writer.write_bytes
+        # Header from pandas too, so the whole file keeps to_csv's LF line endings
+        write_header = lambda: writer.write_frame(pd.DataFrame(columns=SHOPIFY_COLUMNS))
+    order_number = first_order_number
+    lines = 0
+    chunks = 0
+    pending = deque()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    with writer:
+        write_header()
+
+        def write_next():
+            nonlocal lines
+            data, rows = pending.popleft().result()
+            write(data)
+            lines += rows
+
+        try:
+            for index, chunk in enumerate(adapter.iter_chunks(input_path, chunk_size)):
+                if pool is None:
+                    data, rows = convert(adapter, chunk, order_number, seed, index)
+                    write(data)
+                    lines += rows
+                else:
+                    pending.append(pool.submit(convert, adapter, chunk, order_number, seed, index))
+                    if len(pending) >= 2 * workers:
+                        write_next()
+                order_number += adapter.count_orders(chunk)
+                chunks += 1
+            while pending:
+                write_next()
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    return {
+        'adapter': adapter.name,
+        'output': output_path,
+        'orders': order_number - first_order_number,
+        'lines': lines,
+        'chunks': chunks,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert a marketplace export to the Shopify order schema")
+    parser.add_argument('input', help="Marketplace export CSV")
+    parser.add_argument('output', help="Shopify CSV to write (or a .sqlite / .db database)")
+    parser.add_argument('--format', help="Adapter name (default: amazon_in, or the --spec adapter)")
+    parser.add_argument('--spec', help="JSON adapter spec to register (its name is used unless --format is given)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--compression', choices=['gzip', 'zstd'], default=None)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--list', action='store_true', help="List available adapters and exit")
+    args = parser.parse_args()
+
+    adapter = load_adapter_spec(args.spec) if args.spec else None
+    if args.list:
+        for name, registered in sorted(ADAPTERS.items()):
+            print(f"  {name}: {registered.spec['description']}")
+        return
+    if args.format or adapter is None:
+        adapter = get_adapter(args.format or 'amazon_in')
+
+    print(f"🔄 Converting {args.input} with adapter '{adapter.name}' ({args.workers} worker(s))...")
+    stats = convert_export(adapter, args.input, args.output, workers=args.workers, chunk_size=args.chunk_size,
+                           compression=args.compression, seed=args.seed)
+    print(f"✅ Converted {stats['orders']} orders to {stats['lines']} Shopify order lines "
+          f"in {stats['chunks']} chunk(s)")
+    print(f"📁 Output saved to: {stats['output']}")
+
+
+if __name__ == '__main__':
+    main()
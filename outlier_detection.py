@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Outlier Detection for Forezia Mock Data
+Vectorized IQR / z-score / percentile / Hampel detection and treatment over SKUs x days matrices
+"""
+
+import warnings
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+METHODS = ('iqr', 'zscore', 'percentile', 'hampel')
+TREATMENTS = ('remove', 'cap', 'median', 'interpolate')
+DEFAULT_THRESHOLDS = {
+    'iqr': 1.5,          # Q1 - t*IQR, Q3 + t*IQR
+    'zscore': 3.0,       # |x - mean| / std > t
+    'percentile': 0.01,  # below the t and above the 1 - t quantile
+    'hampel': 3.0,       # |x - rolling median| > t * 1.4826 * rolling MAD
+}
+DEFAULT_WINDOW = 7  # days in the centered Hampel window
+MAD_SCALE = 1.4826  # MAD -> standard deviation for normal data
+HAMPEL_BLOCK_CELLS = 1 << 22  # rolling windows materialized per block (bounds memory)
+
+
+# ----------------------------------------------------------------------
+# Statistics: per row, or pooled over rows that share a group code
+# ----------------------------------------------------------------------
+def _lerp(a, b, t):
+    """Linear interpolation computed exactly like numpy's 'linear' quantiles."""
+    diff = b - a
+    out = a + diff * t
+    return np.where(t >= 0.5, b - diff * (1 - t), out)
+
+
+def row_quantiles(matrix: np.ndarray, qs: Sequence[float]) -> np.ndarray:
+    """Quantiles of every row, ignoring NaN; returns ``(len(qs), rows)``.
+
+    One ``np.sort`` along days serves all rows and all quantiles (NaN sort
+    last, so each row's valid count gives its quantile positions).
+    """
+    ordered = np.sort(matrix, axis=1)
+    counts = np.sum(~np.isnan(matrix), axis=1)
+    out = np.full((len(qs), matrix.shape[0]), np.nan)
+    has_values = counts > 0
+    rows = np.flatnonzero(has_values)
+    for i, q in enumerate(qs):
+        position = (counts[has_values] - 1) * q
+        lo = np.floor(position).astype(np.int64)
+        hi = np.minimum(lo + 1, counts[has_values] - 1)
+        out[i, has_values] = _lerp(ordered[rows, lo], ordered[rows, hi], position - lo)
+    return out
+
+
+def grouped_quantiles(matrix: np.ndarray, groups: np.ndarray, qs: Sequence[float],
+                      num_groups: Optional[int] = None) -> np.ndarray:
+    """Quantiles pooled over all rows of each group; returns ``(len(qs), num_groups)``.
+
+    All values are sorted once by (group, value); every group's quantiles are
+    then read at computed offsets, so there is no per-group Python work.
+    """
+    groups = np.asarray(groups, dtype=np.int64)
+    num_groups = int(groups.max()) + 1 if num_groups is None else num_groups
+    codes = np.broadcast_to(groups[:, None], matrix.shape).reshape(-1)
+    values = matrix.reshape(-1)
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    order = np.lexsort((values, codes))
+    values = values[order]
+    counts = np.bincount(codes, minlength=num_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    out = np.full((len(qs), num_groups), np.nan)
+    has_values = counts > 0
+    for i, q in enumerate(qs):
+        position = (counts[has_values] - 1) * q
+        lo = np.floor(position).astype(np.int64)
+        hi = np.minimum(lo + 1, counts[has_values] - 1)
+        base = starts[has_values]
+        out[i, has_values] = _lerp(values[base + lo], values[base + hi], position - lo)
+    return out
+
+
+def _quantiles(matrix, qs, groups, num_groups):
+    """Per-row quantiles broadcast per row, pooled over ``groups`` if given."""
+    if groups is None:
+        return row_quantiles(matrix, qs)
+    return grouped_quantiles(matrix, groups, qs, num_groups)[:, np.asarray(groups)]
+
+
+def _mean_std(matrix, groups, num_groups):
+    """Mean and sample std (ddof=1, as pandas) per row or per group, ignoring NaN."""
+    valid = ~np.isnan(matrix)
+    filled = np.where(valid, matrix, 0.0)
+    if groups is None:
+        n = valid.sum(axis=1)
+        total = filled.sum(axis=1)
+        mean = np.divide(total, n, out=np.full(len(n), np.nan), where=n > 0)
+        sq = np.where(valid, (matrix - mean[:, None]) ** 2, 0.0).sum(axis=1)
+    else:
+        groups = np.asarray(groups)
+        n = np.bincount(groups, weights=valid.sum(axis=1), minlength=num_groups)
+        total = np.bincount(groups, weights=filled.sum(axis=1), minlength=num_groups)
+        mean = np.divide(total, n, out=np.full(len(n), np.nan), where=n > 0)
+        sq_rows = np.where(valid, (matrix - mean[groups][:, None]) ** 2, 0.0).sum(axis=1)
+        sq = np.bincount(groups, weights=sq_rows, minlength=num_groups)
+    std = np.sqrt(np.divide(sq, n - 1, out=np.full(len(n), np.nan), where=n > 1))
+    if groups is not None:
+        mean, std = mean[groups], std[groups]
+    return mean, std
+
+
+def rolling_median_mad(matrix: np.ndarray, window: int = DEFAULT_WINDOW) -> Tuple[np.ndarray, np.ndarray]:
+    """Centered rolling median and median absolute deviation along days.
+
+    Windows are truncated at the series edges and NaN cells are ignored.
+    Rows are processed in blocks so only ``HAMPEL_BLOCK_CELLS`` window
+    cells are materialized at a time.
+    """
+    rows, days = matrix.shape
+    half = window // 2
+    padded = np.pad(matrix.astype(float), ((0, 0), (half, window - 1 - half)), constant_values=np.nan)
+    median = np.empty((rows, days))
+    mad = np.empty((rows, days))
+    block = max(1, HAMPEL_BLOCK_CELLS // max(1, days * window))
+    for start in range(0, rows, block):
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN windows stay NaN
+            windows = np.lib.stride_tricks.sliding_window_view(padded[start:start + block], window, axis=1)
+            med = np.nanmedian(windows, axis=2)
+            median[start:start + block] = med
+            mad[start:start + block] = np.nanmedian(np.abs(windows - med[:, :, None]), axis=2)
+    return median, mad
+
+
+# ----------------------------------------------------------------------
+# Detection and treatment
+# ----------------------------------------------------------------------
+def outlier_bounds(matrix: np.ndarray, method: str = 'iqr', threshold: Optional[float] = None,
+                   groups: Optional[Sequence[int]] = None, window: int = DEFAULT_WINDOW) -> Tuple[np.ndarray, np.ndarray]:
+    """Lower and upper bounds, broadcastable against ``matrix``.
+
+    Parameters
+    ----------
+    matrix : ndarray
+        Series x days values; NaN marks missing days.
+    method : str
+        ``'iqr'``, ``'zscore'``, ``'percentile'`` or ``'hampel'``.
+    threshold : float, optional
+        Method threshold, see ``DEFAULT_THRESHOLDS``.
+    groups : sequence of int, optional
+        Group code per row (e.g. the SKU's category). Rows sharing a code
+        share bounds computed from all their values pooled. Without it
+        every row (SKU) gets its own bounds. Hampel bounds are always local
+        to the series.
+    window : int
+        Hampel window length in days.
+
+    Returns
+    -------
+    tuple of ndarray
+        ``(lower, upper)`` of shape ``(rows, 1)`` or, for Hampel,
+        ``(rows, days)``.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown outlier method '{method}'. Use one of: {', '.join(METHODS)}")
+    threshold = DEFAULT_THRESHOLDS[method] if threshold is None else threshold
+    matrix = np.asarray(matrix, dtype=float)
+    num_groups = None if groups is None else int(np.max(groups)) + 1
+
+    if method == 'iqr':
+        q1, q3 = _quantiles(matrix, [0.25, 0.75], groups, num_groups)
+        iqr = q3 - q1
+        lower, upper = q1 - threshold * iqr, q3 + threshold * iqr
+    elif method == 'percentile':
+        lower, upper = _quantiles(matrix, [threshold, 1 - threshold], groups, num_groups)
+    elif method == 'zscore':
+        mean, std = _mean_std(matrix, groups, num_groups)
+        lower, upper = mean - threshold * std, mean + threshold * std
+    else:
+        median, mad = rolling_median_mad(matrix, window)
+        return median - threshold * MAD_SCALE * mad, median + threshold * MAD_SCALE * mad
+    return lower[:, None], upper[:, None]
+
+
+def detect_outliers(matrix: np.ndarray, method: str = 'iqr', threshold: Optional[float] = None,
+                    groups: Optional[Sequence[int]] = None, window: int = DEFAULT_WINDOW) -> np.ndarray:
+    """Boolean mask of outlier cells (missing cells are never outliers)."""
+    matrix = np.asarray(matrix, dtype=float)
+    lower, upper = outlier_bounds(matrix, method, threshold, groups, window)
+    with np.errstate(invalid='ignore'):
+        return (matrix < lower) | (matrix > upper)
+
+
+def interpolate_rows(matrix: np.ndarray, missing: np.ndarray) -> np.ndarray:
+    """Linearly interpolate the ``missing`` cells of every row along days.
+
+    Each cell looks up its previous and next valid day through running
+    max / min index scans, so all rows are filled at once. Cells before the
+    first or after the last valid day take the nearest valid value; rows
+    with no valid day stay NaN.
+    """
+    rows, days = matrix.shape
+    valid = ~missing & ~np.isnan(matrix)
+    idx = np.broadcast_to(np.arange(days), (rows, days))
+    prev_idx = np.maximum.accumulate(np.where(valid, idx, -1), axis=1)
+    next_idx = np.minimum.accumulate(np.where(valid, idx, days)[:, ::-1], axis=1)[:, ::-1]
+    has_prev, has_next = prev_idx >= 0, next_idx < days
+    row_idx = np.arange(rows)[:, None]
+    prev_val = matrix[row_idx, np.clip(prev_idx, 0, days - 1)]
+    next_val = matrix[row_idx, np.clip(next_idx, 0, days - 1)]
+    both = has_prev & has_next
+    weight = np.where(both, (idx - prev_idx) / np.maximum(next_idx - prev_idx, 1), 0.0)
+    filled = np.where(both, prev_val + (next_val - prev_val) * weight,
+                      np.where(has_prev, prev_val, np.where(has_next, next_val, np.nan)))
+    return np.where(missing, filled, matrix)
+
+
+def treat_outliers(matrix: np.ndarray, mask: np.ndarray, treatment: str = 'interpolate',
+                   bounds: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                   groups: Optional[Sequence[int]] = None) -> np.ndarray:
+    """Return a float copy of ``matrix`` with the ``mask`` cells treated.
+
+    ``remove`` sets outliers to NaN, ``cap`` clips them to ``bounds``,
+    ``median`` replaces them with the median of the non-outlier values of
+    their row (or group, or the rolling median if ``bounds`` are Hampel
+    bounds) and ``interpolate`` fills them linearly from neighbouring days.
+    """
+    if treatment not in TREATMENTS:
+        raise ValueError(f"Unknown outlier treatment '{treatment}'. Use one of: {', '.join(TREATMENTS)}")
+    matrix = np.asarray(matrix, dtype=float)
+    if treatment == 'remove':
+        return np.where(mask, np.nan, matrix)
+    if treatment == 'interpolate':
+        return interpolate_rows(matrix, mask)
+    if treatment == 'cap':
+        if bounds is None:
+            raise ValueError("cap treatment needs the detection bounds")
+        lower, upper = bounds
+        return np.where(mask, np.clip(matrix, lower, upper), matrix)
+    if bounds is not None and np.shape(bounds[0]) == matrix.shape:
+        # Hampel: the rolling median is the bounds' midpoint
+        replacement = (bounds[0] + bounds[1]) / 2
+    else:
+        clean = np.where(mask, np.nan, matrix)
+        num_groups = None if groups is None else int(np.max(groups)) + 1
+        replacement = _quantiles(clean, [0.5], groups, num_groups)[0][:, None]
+    return np.where(mask, replacement, matrix)
+
+
+def handle_outliers(matrix: np.ndarray, method: str = 'iqr', threshold: Optional[float] = None,
+                    treatment: str = 'interpolate', groups: Optional[Sequence[int]] = None,
+                    window: int = DEFAULT_WINDOW) -> Tuple[np.ndarray, np.ndarray]:
+    """Detect and treat outliers of every series in one pass; returns ``(treated, mask)``."""
+    matrix = np.asarray(matrix, dtype=float)
+    bounds = outlier_bounds(matrix, method, threshold, groups, window)
+    with np.errstate(invalid='ignore'):
+        mask = (matrix < bounds[0]) | (matrix > bounds[1])
+    return treat_outliers(matrix, mask, treatment, bounds, groups), mask
+
+
+# ----------------------------------------------------------------------
+# Long (Prophet-style) frames
+# ----------------------------------------------------------------------
+def long_to_matrix(df: pd.DataFrame, column: str = 'y', series_col: Optional[str] = None,
+                   date_col: str = 'ds'):
+    """Pivot a long frame into a dense series x days matrix (NaN = missing).
+
+    Returns ``(matrix, series_codes, day_codes, series_labels)`` where the
+    codes locate every input row in the matrix.
+    """
+    if series_col is None:
+        series_codes, series_labels = np.zeros(len(df), dtype=np.int64), np.array(['all'], dtype=object)
+    else:
+        series_codes, series_labels = pd.factorize(df[series_col], sort=True)
+    day_codes, _ = pd.factorize(pd.to_datetime(df[date_col]), sort=True)
+    num_days = int(day_codes.max()) + 1 if len(day_codes) else 0
+    flat = series_codes * num_days + day_codes
+    if len(np.unique(flat)) != len(flat):
+        raise ValueError(f"Rows are not unique per {series_col or 'series'} and {date_col}; pass series_col")
+    matrix = np.full((len(series_labels), num_days), np.nan)
+    matrix.reshape(-1)[flat] = df[column].to_numpy(dtype=float)
+    return matrix, series_codes, day_codes, series_labels
+
+
+def remove_outliers(df: pd.DataFrame, column: str = 'y', method: str = 'iqr', threshold: Optional[float] = None,
+                    category_col: Optional[str] = None, remove: bool = False, replace_with: str = 'interpolate',
+                    series_col: Optional[str] = None, date_col: str = 'ds',
+                    window: int = DEFAULT_WINDOW) -> pd.DataFrame:
+    """Detect and handle outliers in a long ``ds``/``y`` frame, grouped by series.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Long frame with one row per series and day.
+    column : str
+        Value column to clean.
+    method, threshold, window
+        See ``outlier_bounds``.
+    category_col : str, optional
+        Pool the bounds over all series of a category. Without
+        ``series_col`` each category is one series.
+    remove : bool
+        Drop outlier rows instead of replacing their values.
+    replace_with : str
+        ``'interpolate'``, ``'median'`` or ``'cap'`` when not removing.
+    series_col : str, optional
+        Column identifying a series (e.g. ``'sku'``); defaults to
+        ``category_col`` and otherwise treats the frame as one series.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Copy of ``df`` with outliers dropped or replaced, plus an
+        ``is_outlier`` column when rows are kept.
+    """
+    series_col = series_col or category_col
+    matrix, series_codes, day_codes, labels = long_to_matrix(df, column, series_col, date_col)
+    groups = None
+    if category_col is not None and category_col != series_col:
+        first_rows = pd.Series(np.arange(len(df))).groupby(series_codes).first().to_numpy()
+        groups, _ = pd.factorize(df[category_col].to_numpy()[first_rows])
+    treatment = 'remove' if remove else replace_with
+    treated, mask = handle_outliers(matrix, method, threshold, treatment, groups, window)
+
+    row_mask = mask[series_codes, day_codes]
+    if remove:
+        return df.loc[~row_mask].copy()
+    result = df.copy()
+    result[column] = treated[series_codes, day_codes]
+    result['is_outlier'] = row_mask
+    return result
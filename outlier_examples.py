@@ -2,24 +2,33 @@
 Outlier Handling in Forezia Time Series Data
 --------------------------------------------
 
-This example shows how to use the outlier handling functionality in the Forezia forecasting script.
+This example shows how to use outlier_detection.py on the mock SKU data
+(python realist_mock_data_generator.py writes mock_toys_all_skus.csv).
 
 Example usage:
 
-# Basic usage with default parameters (IQR method, replace outliers with interpolated values)
-python ds4.py --input ds4.csv --handle-outliers
+from outlier_detection import remove_outliers, handle_outliers
 
-# Skip outlier handling
-python ds4.py --input ds4.csv --no-outlier-handling
+# Basic usage with default parameters (IQR per SKU, replace outliers with interpolated values)
+clean = remove_outliers(df, series_col='sku')
 
 # Use Z-score method instead of IQR
-python ds4.py --input ds4.csv --outlier-method zscore --outlier-threshold 3.0
+clean = remove_outliers(df, series_col='sku', method='zscore', threshold=3.0)
 
 # Remove outliers instead of replacing them
-python ds4.py --input ds4.csv --outlier-treatment remove
+clean = remove_outliers(df, series_col='sku', remove=True)
 
 # Use percentile method with custom threshold (1% and 99% percentiles)
-python ds4.py --input ds4.csv --outlier-method percentile --outlier-threshold 0.01
+clean = remove_outliers(df, series_col='sku', method='percentile', threshold=0.01)
+
+# Rolling Hampel filter (7-day median +/- 3 scaled MADs), capped to the bounds
+clean = remove_outliers(df, series_col='sku', method='hampel', replace_with='cap')
+
+# Pool the bounds over all SKUs of a category
+clean = remove_outliers(df, series_col='sku', category_col='category')
+
+# Already have a SKUs x days matrix? Detect and treat every row in one pass
+treated, mask = handle_outliers(matrix, method='iqr', treatment='interpolate')
 
 For more information about outlier detection methods:
 
@@ -40,6 +49,11 @@ For more information about outlier detection methods:
    - Threshold is the percentile value (e.g., 0.01 for 1st and 99th percentiles)
    - More intuitive for non-technical users
 
+4. Hampel Method:
+   - Compares each day with the median of a centered rolling window (7 days)
+   - Default threshold is 3.0 scaled MADs (median absolute deviations)
+   - Robust to trends and seasonality, flags local spikes and drops
+
 Tips for handling outliers in time series data:
 
 1. First visualize your data to understand what kind of outliers you have:
@@ -60,23 +74,22 @@ Tips for handling outliers in time series data:
 # Simple example of using the remove_outliers function directly
 import pandas as pd
 import matplotlib.pyplot as plt
-from ds4 import load_data, clean_data, remove_outliers
+from outlier_detection import outlier_bounds, long_to_matrix, remove_outliers
 
-# 1. Load and clean the data
-df = load_data('ds4.csv')
-df_clean = clean_data(df)
+# 1. Load the data (one ds/y series per SKU)
+df_clean = pd.read_csv('mock_toys_all_skus.csv', parse_dates=['ds'])
+series_col = 'sku' if 'sku' in df_clean.columns else None
+category_col = 'category' if 'category' in df_clean.columns else None
 
 # 2. Identify outliers without removing them (for visualization)
 if 'y' in df_clean.columns:
-    # Calculate outlier thresholds
-    Q1 = df_clean['y'].quantile(0.25)
-    Q3 = df_clean['y'].quantile(0.75)
-    IQR = Q3 - Q1
-    lower_bound = Q1 - 1.5 * IQR
-    upper_bound = Q3 + 1.5 * IQR
-    
+    # Calculate outlier thresholds for every SKU at once
+    matrix, series_codes, day_codes, _ = long_to_matrix(df_clean, 'y', series_col)
+    lower_bound, upper_bound = outlier_bounds(matrix, 'iqr', 1.5)
+
     # Create masks
-    outlier_mask = (df_clean['y'] < lower_bound) | (df_clean['y'] > upper_bound)
+    outlier_mask = ((df_clean['y'] < lower_bound[series_codes, 0]) |
+                    (df_clean['y'] > upper_bound[series_codes, 0]))
     outliers = df_clean[outlier_mask]
     
     # Visualize
@@ -100,7 +113,8 @@ df_interpolated = remove_outliers(
     column='y',
     method='iqr',
     threshold=1.5,
-    category_col='category' if 'category' in df_clean.columns else None,
+    category_col=category_col,
+    series_col=series_col,
     remove=False,
     replace_with='interpolate'
 )
@@ -111,7 +125,8 @@ df_removed = remove_outliers(
     column='y',
     method='zscore',
     threshold=3.0,
-    category_col='category' if 'category' in df_clean.columns else None,
+    category_col=category_col,
+    series_col=series_col,
     remove=True
 )
 
@@ -121,23 +136,24 @@ df_median = remove_outliers(
     column='y',
     method='percentile',
     threshold=0.01,  # 1% and 99% percentiles
-    category_col='category' if 'category' in df_clean.columns else None,
+    category_col=category_col,
+    series_col=series_col,
     remove=False,
     replace_with='median'
 )
 
-# 4. Compare the results visually if we have category data
-if 'category' in df_clean.columns:
-    # Pick a specific category to compare
-    categories = df_clean['category'].unique()
-    if len(categories) > 0:
-        category = categories[0]
+# 4. Compare the results visually for one SKU
+if series_col:
+    # Pick a specific SKU to compare
+    skus = df_clean[series_col].unique()
+    if len(skus) > 0:
+        category = skus[0]
         
-        # Filter data for this category
-        cat_original = df_clean[df_clean['category'] == category]
-        cat_interpolated = df_interpolated[df_interpolated['category'] == category]
-        cat_removed = df_removed[df_removed['category'] == category]
-        cat_median = df_median[df_median['category'] == category]
+        # Filter data for this SKU
+        cat_original = df_clean[df_clean[series_col] == category]
+        cat_interpolated = df_interpolated[df_interpolated[series_col] == category]
+        cat_removed = df_removed[df_removed[series_col] == category]
+        cat_median = df_median[df_median[series_col] == category]
         
         plt.figure(figsize=(12, 10))
         
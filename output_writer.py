@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Compressed CSV Output for Forezia Mock Data
+Background writer that overlaps row formatting, compression and disk I/O
+"""
+
+import csv
+import gzip
+import hashlib
+import io
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Sequence
+
+try:
+    import zstandard
+except ImportError:  # zstd output is optional
+    zstandard = None
+
+# Supported compression codecs and the file suffix each one adds
+COMPRESSION_SUFFIXES = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+COMPRESSION_ALIASES = {
+    'gz': 'gzip',
+    'gzip': 'gzip',
+    'zst': 'zstd',
+    'zstd': 'zstd',
+    'none': None,
+    '': None,
+}
+DEFAULT_LEVELS = {
+    'gzip': 6,
+    'zstd': 3,
+}
+
+DEFAULT_BATCH_SIZE = 5000   # rows per formatted/compressed block
+DEFAULT_WORKERS = 2         # compression threads (zlib/zstd release the GIL)
+DEFAULT_MAX_PENDING = 8     # bounded queue of blocks waiting to hit the disk
+
+
+def compression_from_suffix(path: str) -> Optional[str]:
+    """Return the codec a path's suffix (.gz / .zst) implies, without checking it is available."""
+    for codec, suffix in COMPRESSION_SUFFIXES.items():
+        if path.endswith(suffix):
+            return codec
+    return None
+
+
+def resolve_compression(path: str, compression: Optional[str] = None) -> Optional[str]:
+    """Return the codec name for an explicit setting or the file suffix.
+
+    Raises ImportError when the codec (zstd) is not installed, so a bad
+    setting or ``.zst`` path fails before any work is done.
+    """
+    if compression is None:
+        codec = compression_from_suffix(path)
+    else:
+        key = str(compression).lower()
+        if key not in COMPRESSION_ALIASES:
+            raise ValueError(f"Unsupported compression '{compression}'. Use one of: none, gzip, zstd")
+        codec = COMPRESSION_ALIASES[key]
+    if codec == 'zstd' and zstandard is None:
+        raise ImportError("zstd files require the 'zstandard' package (pip install zstandard)")
+    return codec
+
+
+def with_compression_suffix(path: str, compression: Optional[str]) -> str:
+    """Append the codec suffix (.gz / .zst) to a path if it is missing."""
+    codec = resolve_compression(path, compression)
+    if codec is None:
+        return path
+    suffix = COMPRESSION_SUFFIXES[codec]
+    return path if path.endswith(suffix) else path + suffix
+
+
+def compress_block(data: bytes, compression: Optional[str], level: Optional[int] = None) -> bytes:
+    """Compress one block as a self-contained gzip member or zstd frame.
+
+    Concatenated gzip members and zstd frames are valid single streams, so
+    blocks compressed independently can simply be written back to back.
+    """
+    if compression is None:
+        return data
+    if level is None:
+        level = DEFAULT_LEVELS[compression]
+    if compression == 'gzip':
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    return zstandard.ZstdCompressor(level=level).compress(data)
+
+
+def open_compressed_text(path: str, mode: str = 'rt', compression: Optional[str] = None):
+    """Open a plain, gzip or zstd file in text mode based on its suffix."""
+    codec = resolve_compression(path, compression)
+    if codec == 'gzip':
+        return gzip.open(path, mode, encoding='utf-8', newline='')
+    if codec == 'zstd':
+        return zstandard.open(path, mode, encoding='utf-8', newline='')
+    return open(path, mode.replace('t', ''), encoding='utf-8', newline='')
+
+
+class CompressedCSVWriter:
+    """CSV writer that formats and compresses rows off the main thread.
+
+    Rows are collected into batches on the calling thread. Each batch is
+    handed to a small thread pool which turns it into CSV text, encodes it
+    and compresses it into an independent block. A single writer thread
+    drains the finished blocks in submission order and writes them to disk.
+    The queue between the two is bounded, so a slow disk applies
+    back-pressure to the producer instead of buffering the whole dataset.
+
+    Works with plain lists (``csv.writer``), dicts (``csv.DictWriter`` when
+    ``fieldnames`` is given) and pandas DataFrames (``write_frame``).
+    """
+
+    def __init__(self, path: str, fieldnames: Optional[Sequence[str]] = None,
+                 compression: Optional[str] = None, level: Optional[int] = None,
+                 workers: int = DEFAULT_WORKERS, batch_size: int = DEFAULT_BATCH_SIZE,
+                 max_pending: int = DEFAULT_MAX_PENDING, restval: str = '',
+                 append: bool = False):
+        self.path = path
+        self.fieldnames = list(fieldnames) if fieldnames is not None else None
+        self.compression = resolve_compression(path, compression)
+        self.level = level
+        self.batch_size = max(1, batch_size)
+        self.restval = restval
+        self.rows_written = 0
+        self.bytes_written = 0
+
+        self._sha256 = hashlib.sha256()
+        self._batch: List = []
+        self._header_written = append
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._file = open(path, 'ab' if append else 'wb')
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='csv-compress')
+        self._pending: "queue.Queue" = queue.Queue(maxsize=max(1, max_pending))
+        self._drain_thread = threading.Thread(target=self._drain, name='csv-writer', daemon=True)
+        self._drain_thread.start()
+
+    # ------------------------------------------------------------------
+    # Public API (mirrors csv.writer / csv.DictWriter)
+    # ------------------------------------------------------------------
+    def writeheader(self):
+        """Write the header row built from ``fieldnames``."""
+        if self.fieldnames is None:
+            raise ValueError("writeheader() needs fieldnames")
+        self._submit(self._format_rows, [self.fieldnames], False)
+        self._header_written = True
+
+    def writerow(self, row):
+        """Queue one row (list or dict)."""
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_size:
+            self._flush_batch()
+
+    def writerows(self, rows: Iterable):
+        """Queue many rows (lists or dicts)."""
+        for row in rows:
+            self._batch.append(row)
+            if len(self._batch) >= self.batch_size:
+                self._flush_batch()
+
+    def write_frame(self, df, header: Optional[bool] = None):
+        """Queue a pandas DataFrame in batch-sized slices.
+
+        The header is written on the first call unless one was already
+        written (or ``header=False`` is passed).
+        """
+        self._flush_batch()
+        if header is None:
+            header = not self._header_written
+        if header:
+            if self.fieldnames is None:
+                self.fieldnames = [str(c) for c in df.columns]
+            self._submit(self._format_frame, df.iloc[0:0], True)
+            self._header_written = True
+        for start in range(0, len(df), self.batch_size):
+            self._submit(self._format_frame, df.iloc[start:start + self.batch_size], False)
+
+    def write_bytes(self, data: bytes):
+        """Queue raw, already-encoded CSV bytes (compressed like any other block)."""
+        self._flush_batch()
+        self._submit(self._encode_bytes, data)
+
+    @property
+    def sha256(self) -> str:
+        """Hex digest of the bytes written so far (valid after ``close``)."""
+        return self._sha256.hexdigest()
+
+    def close(self):
+        """Flush pending rows, wait for the writer thread and close the file."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._flush_batch()
+        finally:
+            self._pending.put(None)
+            self._drain_thread.join()
+            self._pool.shutdown(wait=True)
+            self._file.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _flush_batch(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        self._submit(self._format_rows, batch, True)
+
+    def _submit(self, fn, *args):
+        if self._error is not None:
+            raise self._error
+        # put() blocks once max_pending blocks are in flight (back-pressure)
+        self._pending.put(self._pool.submit(fn, *args))
+
+    def _format_rows(self, rows: List, count_rows: bool):
+        buffer = io.StringIO()
+        if rows and isinstance(rows[0], dict):
+            writer = csv.DictWriter(buffer, fieldnames=self.fieldnames, restval=self.restval)
+        else:
+            writer = csv.writer(buffer)
+        writer.writerows(rows)
+        data = compress_block(buffer.getvalue().encode('utf-8'), self.compression, self.level)
+        return data, len(rows) if count_rows else 0
+
+    def _format_frame(self, frame, is_header: bool):
+        # Frames keep pandas' LF line endings (rows from csv.writer use CRLF as before)
+        text = frame.to_csv(index=False, header=is_header, lineterminator='\n')
+        data = compress_block(text.encode('utf-8'), self.compression, self.level)
+        return data, 0 if is_header else len(frame)
+
+    def _encode_bytes(self, data: bytes):
+        return compress_block(data, self.compression, self.level), 0
+
+    def _drain(self):
+        while True:
+            future = self._pending.get()
+            if future is None:
+                break
+            if self._error is not None:
+                continue  # keep draining so producers never block forever
+            try:
+                data, rows = future.result()
+                self._file.write(data)
+                self._sha256.update(data)
+                self.bytes_written += len(data)
+                self.rows_written += rows
+            except BaseException as e:  # surfaced to the producer on next submit/close
+                self._error = e
+
+
+def write_csv_rows(path: str, header: Optional[Sequence[str]], rows: Iterable,
+                   compression: Optional[str] = None, **writer_kwargs) -> CompressedCSVWriter:
+    """Convenience wrapper: write ``header`` + ``rows`` and return the closed writer."""
+    writer = CompressedCSVWriter(path, fieldnames=header, compression=compression, **writer_kwargs)
+    with writer:
+        if header is not None:
+            writer.writeheader()
+        writer.writerows(rows)
+    return writer
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Partitioned CSV Output for Forezia Mock Data
+Writes Hive-style ``month=YYYY-MM/`` and/or ``sku=.../`` partitions in one pass
+and records a manifest so downstream jobs only read the partitions they need.
+"""
+
+import csv
+import hashlib
+import io
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from urllib.parse import quote
+
+from output_writer import COMPRESSION_SUFFIXES, compress_block, resolve_compression
+
+MANIFEST_FILE = '_manifest.json'
+PARTITION_KEYS = ('sku', 'month')
+DEFAULT_BUFFER_ROWS = 50000
+
+
+def _normalize_partition_by(partition_by: Union[str, Sequence[str]]) -> Tuple[str, ...]:
+    keys = (partition_by,) if isinstance(partition_by, str) else tuple(partition_by)
+    if not keys:
+        raise ValueError("partition_by needs at least one key")
+    for key in keys:
+        if key not in PARTITION_KEYS:
+            raise ValueError(f"Unsupported partition key '{key}'. Use any of: {', '.join(PARTITION_KEYS)}")
+    return keys
+
+
+def _date_string(value) -> str:
+    """Return the ``YYYY-MM-DD`` part of a timestamp string or datetime-like value."""
+    if hasattr(value, 'strftime'):
+        return value.strftime('%Y-%m-%d')
+    return str(value)[:10]
+
+
+class _PartitionState:
+    """Running statistics for one partition file."""
+
+    def __init__(self, keys: Dict[str, str], rel_path: str):
+        self.keys = keys
+        self.rel_path = rel_path
+        self.rows = 0
+        self.bytes = 0
+        self.min_date: Optional[str] = None
+        self.max_date: Optional[str] = None
+        self.sha256 = hashlib.sha256()
+        self.header_written = False
+
+    def update_dates(self, lo: Optional[str], hi: Optional[str]):
+        if lo and (self.min_date is None or lo < self.min_date):
+            self.min_date = lo
+        if hi and (self.max_date is None or hi > self.max_date):
+            self.max_date = hi
+
+    def to_manifest(self) -> Dict:
+        return {
+            "path": self.rel_path,
+            "keys": self.keys,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "min_date": self.min_date,
+            "max_date": self.max_date,
+            "sha256": self.sha256.hexdigest(),
+        }
+
+
+class PartitionedWriter:
+    """Split rows into Hive-style partitions and write a manifest on close.
+
+    Rows (dicts) or DataFrames are bucketed by partition key in a single pass.
+    Buckets are buffered in memory and appended to their partition file once
+    ``buffer_rows`` rows are pending, so partitions receive few, large writes
+    and only one file is open at a time. Each write is compressed as an
+    independent block, which keeps appended gzip/zstd files valid streams.
+
+    The manifest (``_manifest.json``) lists every partition with its key
+    values, row count, date bounds, size and SHA-256 checksum.
+    """
+
+    def __init__(self, root: str, partition_by: Union[str, Sequence[str]] = 'month',
+                 fieldnames: Optional[Sequence[str]] = None,
+                 date_column: str = 'Created at', sku_column: str = 'Lineitem sku',
+                 compression: Optional[str] = None, buffer_rows: int = DEFAULT_BUFFER_ROWS,
+                 overwrite: bool = False):
+        self.root = root
+        self.partition_by = _normalize_partition_by(partition_by)
+        self.fieldnames = list(fieldnames) if fieldnames is not None else None
+        self.date_column = date_column
+        self.sku_column = sku_column
+        self.compression = resolve_compression('', compression)
+        self.buffer_rows = max(1, buffer_rows)
+        self.file_name = 'part-0.csv' + (COMPRESSION_SUFFIXES[self.compression] if self.compression else '')
+
+        self._partitions: Dict[Tuple[str, ...], _PartitionState] = {}
+        self._buffers: Dict[Tuple[str, ...], List] = {}
+        self._buffered = 0
+        self._closed = False
+        self._prepare_root(overwrite)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def writeheader(self):
+        """No-op: each partition file gets its own header."""
+
+    def writerow(self, row: Dict):
+        self.writerows([row])
+
+    def writerows(self, rows: Iterable[Dict]):
+        """Bucket dict rows by partition key (one pass over ``rows``)."""
+        if self.fieldnames is None:
+            raise ValueError("PartitionedWriter needs fieldnames to write dict rows")
+        for row in rows:
+            date_str = str(row.get(self.date_column, '') or '')
+            key = tuple(
+                (str(row.get(self.sku_column, '') or '') if k == 'sku' else date_str[:7])
+                for k in self.partition_by
+            )
+            bucket = self._buffers.get(key)
+            if bucket is None:
+                bucket = self._buffers[key] = []
+            bucket.append(row)
+            self._buffered += 1
+        if self._buffered >= self.buffer_rows:
+            self.flush()
+
+    def write_frame(self, df):
+        """Write a DataFrame, grouping it by partition key once."""
+        self.flush()
+        if self.fieldnames is None:
+            self.fieldnames = [str(c) for c in df.columns]
+        key_series = []
+        for key in self.partition_by:
+            if key == 'sku':
+                key_series.append(df[self.sku_column].astype(str))
+            else:
+                dates = df[self.date_column]
+                if hasattr(dates, 'dt'):
+                    key_series.append(dates.dt.strftime('%Y-%m'))
+                else:
+                    key_series.append(dates.astype(str).str[:7])
+        for key, part in df.groupby(key_series, sort=False):
+            key = key if isinstance(key, tuple) else (key,)
+            self._write_frame_part(tuple(str(k) for k in key), part)
+
+    def flush(self):
+        """Append all buffered dict rows to their partition files."""
+        buffers, self._buffers, self._buffered = self._buffers, {}, 0
+        for key, rows in buffers.items():
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=self.fieldnames, restval='')
+            state = self._state_for(key)
+            if not state.header_written:
+                writer.writeheader()
+            writer.writerows(rows)
+            dates = [_date_string(r.get(self.date_column)) for r in rows if r.get(self.date_column)]
+            state.update_dates(min(dates) if dates else None, max(dates) if dates else None)
+            self._append(state, buffer.getvalue(), len(rows))
+
+    def close(self) -> Dict:
+        """Flush buffers and write the manifest; returns the manifest dict."""
+        if self._closed:
+            return self.manifest()
+        self.flush()
+        self._closed = True
+        manifest = self.manifest()
+        tmp_path = os.path.join(self.root, MANIFEST_FILE + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.root, MANIFEST_FILE))
+        return manifest
+
+    def manifest(self) -> Dict:
+        partitions = [state.to_manifest() for state in self._partitions.values()]
+        partitions.sort(key=lambda p: p['path'])
+        return {
+            "created_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "partition_by": list(self.partition_by),
+            "date_column": self.date_column,
+            "sku_column": self.sku_column,
+            "compression": self.compression,
+            "columns": self.fieldnames,
+            "total_rows": sum(p['rows'] for p in partitions),
+            "partitions": partitions,
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        return False
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _prepare_root(self, overwrite: bool):
+        manifest_path = os.path.join(self.root, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            if not overwrite:
+                raise FileExistsError(f"Partitioned dataset already exists at {self.root}")
+            # Only remove files the previous manifest says we own
+            old = load_manifest(self.root)
+            for partition in old.get('partitions', []):
+                path = os.path.join(self.root, partition['path'])
+                if os.path.exists(path):
+                    os.remove(path)
+            os.remove(manifest_path)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _state_for(self, key: Tuple[str, ...]) -> _PartitionState:
+        state = self._partitions.get(key)
+        if state is None:
+            dirs = [f"{name}={quote(value, safe='-_.')}" for name, value in zip(self.partition_by, key)]
+            rel_path = '/'.join(dirs + [self.file_name])
+            os.makedirs(os.path.join(self.root, *dirs), exist_ok=True)
+            full_path = os.path.join(self.root, *rel_path.split('/'))
+            if os.path.exists(full_path):
+                os.remove(full_path)  # stale file not covered by a manifest
+            state = self._partitions[key] = _PartitionState(dict(zip(self.partition_by, key)), rel_path)
+        return state
+
+    def _write_frame_part(self, key: Tuple[str, ...], part):
+        state = self._state_for(key)
+        text = part.to_csv(index=False, header=not state.header_written, lineterminator='\n')
+        if len(part):
+            dates = part[self.date_column].dropna()
+            if len(dates):
+                if hasattr(dates, 'dt'):
+                    state.update_dates(_date_string(dates.min()), _date_string(dates.max()))
+                else:
+                    day_strings = dates.astype(str).str[:10]
+                    state.update_dates(day_strings.min(), day_strings.max())
+        self._append(state, text, len(part))
+
+    def _append(self, state: _PartitionState, text: str, rows: int):
+        data = compress_block(text.encode('utf-8'), self.compression)
+        with open(os.path.join(self.root, *state.rel_path.split('/')), 'ab') as f:
+            f.write(data)
+        state.header_written = True
+        state.sha256.update(data)
+        state.bytes += len(data)
+        state.rows += rows
+
+
+def load_manifest(root: str) -> Dict:
+    """Load the manifest of a partitioned dataset."""
+    with open(os.path.join(root, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def select_partitions(root: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                      **key_filters) -> List[Dict]:
+    """Return manifest entries matching key filters and an optional date window.
+
+    ``key_filters`` map partition keys to a value or a collection of values,
+    e.g. ``select_partitions(root, sku='TOY-LEGO-001')`` or
+    ``select_partitions(root, month=['2025-01', '2025-02'])``.
+    """
+    manifest = load_manifest(root)
+    wanted = {}
+    for key, value in key_filters.items():
+        wanted[key] = {value} if isinstance(value, str) else {str(v) for v in value}
+    selected = []
+    for partition in manifest['partitions']:
+        if any(partition['keys'].get(k) not in values for k, values in wanted.items()):
+            continue
+        if start_date and partition['max_date'] and partition['max_date'] < start_date:
+            continue
+        if end_date and partition['min_date'] and partition['min_date'] > end_date:
+            continue
+        selected.append(partition)
+    return selected
+
+
+def read_partitions(root: str, columns: Optional[List[str]] = None, verify: bool = False, **filters):
+    """Read only the partitions matching ``filters`` into one DataFrame.
+
+    With ``verify=True`` each file's SHA-256 is checked against the manifest.
+    """
+    import pandas as pd
+
+    frames = []
+    for partition in select_partitions(root, **filters):
+        path = os.path.join(root, *partition['path'].split('/'))
+        if verify:
+            with open(path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            if digest != partition['sha256']:
+                raise ValueError(f"Checksum mismatch for partition {partition['path']}")
+        frames.append(pd.read_csv(path, usecols=columns))
+    if not frames:
+        return pd.DataFrame(columns=columns or load_manifest(root).get('columns') or [])
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Cached Pipeline Runner for Forezia Mock Data
+Runs generate -> expand -> smooth -> analyze / visualize as a DAG whose stage outputs are
+stored under a hash of their inputs, so unchanged stages are skipped on re-runs
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from csv_scanner import DEFAULT_WORKERS
+from dataset_catalog import file_checksum, latest_dataset
+
+CACHE_DIR = '.pipeline_cache'
+RECORD_FILE = '_stage.json'
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SEED = 0  # stages must be deterministic to be cached, so runs are always seeded
+
+# Stage parameters that are part of the cache key (runtime options such as workers are not)
+STAGE_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    'expand': {'multiplier': 30, 'start_date': '2024-06-07', 'compression': None},
+    'smooth': {'min_days': 30, 'window': 7, 'max_change': 2, 'today': '2025-06-09'},
+    'analyze': {},
+    'visualize': {'points': 200, 'method': 'lttb'},
+}
+
+
+# ----------------------------------------------------------------------
+# Stages and results
+# ----------------------------------------------------------------------
+@dataclass(frozen=True)
+class Stage:
+    """One pipeline step.
+
+    ``run(out_dir, inputs, params, options)`` writes its outputs into
+    ``out_dir`` and returns ``{artifact name: path relative to out_dir}``.
+    ``inputs`` maps each dependency's name to its ``StageResult``. Bump
+    ``version`` when a code change alters the stage's output.
+    """
+    name: str
+    run: Callable[[str, Dict[str, 'StageResult'], Dict[str, Any], Dict[str, Any]], Dict[str, str]]
+    deps: Tuple[str, ...] = ()
+    version: int = 1
+
+
+@dataclass
+class StageResult:
+    stage: str
+    key: str
+    directory: str
+    artifacts: Dict[str, str]                  # name -> path relative to ``directory``
+    hashes: Dict[str, str]                     # name -> content hash
+    cached: bool = False
+    seconds: float = 0.0
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, self.artifacts[name])
+
+
+def content_hash(path: str) -> str:
+    """SHA-256 of a file, or of every file (relative path + checksum) under a directory."""
+    if not os.path.isdir(path):
+        return file_checksum(path)
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for name in sorted(files):
+            full = os.path.join(root, name)
+            digest.update(f"{os.path.relpath(full, path)}:{file_checksum(full)}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+def stage_key(stage: Stage, params: Mapping[str, Any], inputs: Mapping[str, StageResult]) -> str:
+    """Cache key: stage name and version, its parameters and the content hashes of its inputs."""
+    payload = {'stage': stage.name, 'version': stage.version, 'params': params,
+               'inputs': {name: inputs[name].hashes for name in sorted(inputs)}}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+# ----------------------------------------------------------------------
+# Built-in stages
+# ----------------------------------------------------------------------
+def _generate(out_dir, inputs, params, options):
+    config_path = os.path.join(out_dir, 'config.json')
+    with open(config_path, 'w', encoding='utf-8') as f:
+        json.dump(params['config'], f, indent=2, sort_keys=True)
+    catalog = os.path.join(out_dir, 'datasets.sqlite')
+    env = dict(os.environ, FOREZIA_CONFIG=config_path, FOREZIA_CATALOG=catalog)
+    with open(os.path.join(out_dir, 'generate.log'), 'w', encoding='utf-8') as log:
+        subprocess.run([sys.executable, os.path.join(PACKAGE_DIR, 'generate_synthetic_orders.py')],
+                       cwd=out_dir, env=env, stdout=log, stderr=subprocess.STDOUT, check=True)
+    orders = latest_dataset(catalog=catalog)
+    artifacts = {'orders': os.path.relpath(orders, out_dir)}
+    for role in ('rollups', 'anomalies'):
+        sidecar = orders.replace('.csv', f'_{role}.csv')
+        if os.path.exists(sidecar):
+            artifacts[role] = os.path.relpath(sidecar, out_dir)
+    return artifacts
+
+
+def _expand(out_dir, inputs, params, options):
+    from datetime import datetime
+    from expand_orders_csv import expand
+    from output_writer import with_compression_suffix
+
+    output = with_compression_suffix('orders_expanded.csv', params['compression'])
+    expand(inputs['generate'].path('orders'), os.path.join(out_dir, output), params['multiplier'],
+           datetime.strptime(params['start_date'], '%Y-%m-%d'), params['compression'],
+           workers=options['workers'], seed=params['seed'])
+    return {'orders': output}
+
+
+def _smooth(out_dir, inputs, params, options):
+    from smooth_orders_csv import smooth_file
+
+    smooth_file(inputs['expand'].path('orders'), os.path.join(out_dir, 'orders_smoothed.csv'), None,
+                params['min_days'], params['window'], params['max_change'], date.fromisoformat(params['today']))
+    return {'orders': 'orders_smoothed.csv'}
+
+
+def _analyze(out_dir, inputs, params, options):
+    from analyze_synthetic_data import analyze_synthetic_data
+
+    with open(os.path.join(out_dir, 'report.txt'), 'w', encoding='utf-8') as report, \
+            contextlib.redirect_stdout(report):
+        analyze_synthetic_data(inputs['smooth'].path('orders'))
+    return {'report': 'report.txt'}
+
+
+def _visualize(out_dir, inputs, params, options):
+    from sku_gallery import create_gallery
+
+    create_gallery(inputs['generate'].path('orders'), os.path.join(out_dir, 'gallery'),
+                   points=params['points'], method=params['method'], workers=options['workers'])
+    return {'gallery': 'gallery'}
+
+
+STAGES: Dict[str, Stage] = {}
+
+
+def register_stage(stage: Stage) -> Stage:
+    """Add a stage to ``STAGES`` (replacing one with the same name)."""
+    STAGES[stage.name] = stage
+    return stage
+
+
+for _stage in (
+    Stage('generate', _generate),
+    Stage('expand', _expand, ('generate',)),
+    Stage('smooth', _smooth, ('expand',), version=2),  # v2: today also pins fulfilment dates
+    Stage('analyze', _analyze, ('smooth',)),
+    Stage('visualize', _visualize, ('generate',)),
+):
+    register_stage(_stage)
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+def stage_order(targets: Iterable[str], stages: Mapping[str, Stage] = STAGES) -> List[str]:
+    """Dependencies-first order of every stage the ``targets`` need."""
+    order, visiting = [], set()
+
+    def visit(name):
+        if name in order:
+            return
+        if name not in stages:
+            raise KeyError(f"Unknown stage '{name}'. Available: {', '.join(stages)}")
+        if name in visiting:
+            raise ValueError(f"Stage dependency cycle through '{name}'")
+        visiting.add(name)
+        for dep in stages[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        order.append(name)
+
+    for target in targets:
+        visit(target)
+    return order
+
+
+def _load_result(directory: str) -> Optional[StageResult]:
+    try:
+        with open(os.path.join(directory, RECORD_FILE), encoding='utf-8') as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not all(os.path.exists(os.path.join(directory, p)) for p in record['artifacts'].values()):
+        return None
+    return StageResult(record['stage'], record['key'], directory, record['artifacts'], record['hashes'], cached=True)
+
+
+def run_stage(stage: Stage, params: Dict[str, Any], inputs: Dict[str, StageResult], cache_dir: str = CACHE_DIR,
+              options: Optional[Dict[str, Any]] = None, force: bool = False) -> StageResult:
+    """Reuse the cached output for this stage's key, or run it into a fresh cache entry.
+
+    The stage runs in a temporary directory that is renamed into place only
+    after it succeeded, so a failed or interrupted run never leaves a
+    half-written entry behind.
+    """
+    key = stage_key(stage, params, inputs)
+    directory = os.path.abspath(os.path.join(cache_dir, stage.name, key[:16]))
+    if not force:
+        cached = _load_result(directory)
+        if cached is not None:
+            return cached
+
+    tmp = f'{directory}.tmp-{os.getpid()}'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    started = time.perf_counter()
+    try:
+        artifacts = stage.run(tmp, inputs, params, options or {'workers': DEFAULT_WORKERS})
+        artifacts = {name: os.path.relpath(os.path.join(tmp, p), tmp) for name, p in artifacts.items()}
+        hashes = {name: content_hash(os.path.join(tmp, p)) for name, p in artifacts.items()}
+        with open(os.path.join(tmp, RECORD_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'stage': stage.name, 'key': key, 'params': params, 'artifacts': artifacts, 'hashes': hashes,
+                       'inputs': {name: r.key for name, r in inputs.items()},
+                       'created_at': time.strftime('%Y-%m-%d %H:%M:%S')}, f, indent=2, default=str)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.replace(tmp, directory)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return StageResult(stage.name, key, directory, artifacts, hashes, seconds=time.perf_counter() - started)
+
+
+def stage_params(config: Mapping[str, Any], seed: int, as_of: str,
+                 overrides: Optional[Mapping[str, Mapping[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+    """Cache-key parameters of every built-in stage for one scenario config."""
+    config = json.loads(json.dumps(config))  # deep copy
+    config.setdefault('data_generation', {})['random_seed'] = seed
+    # The pipeline passes one plain CSV between stages
+    config.setdefault('output', {}).update(partition_by=None, compression=None, format='csv')
+    params = {'generate': {'config': config, 'as_of': as_of}}  # generator dates end yesterday
+    for name, defaults in STAGE_DEFAULTS.items():
+        params[name] = {**defaults, **(overrides or {}).get(name, {})}
+    params['expand']['seed'] = seed
+    return params
+
+
+def check_params(order: Sequence[str], params: Mapping[str, Mapping[str, Any]]):
+    """Reject parameter combinations that would make a stage produce empty output."""
+    if 'smooth' in order and 'expand' in order:
+        # expand places each copy of the generated history on one day, so it spans `multiplier` days
+        multiplier, min_days = params['expand']['multiplier'], params['smooth']['min_days']
+        if multiplier < min_days:
+            raise ValueError(f"expand multiplier {multiplier} spans fewer days than smooth.min_days {min_days}; "
+                             f"every SKU would be dropped (use --multiplier {min_days} or more)")
+
+
+def run_pipeline(config: Mapping[str, Any], targets: Sequence[str] = ('analyze',), seed: int = DEFAULT_SEED,
+                 cache_dir: str = CACHE_DIR, workers: int = DEFAULT_WORKERS, force: Iterable[str] = (),
+                 overrides: Optional[Mapping[str, Mapping[str, Any]]] = None) -> Dict[str, StageResult]:
+    """Run (or reuse) every stage the ``targets`` need; returns stage name -> result.
+
+    ``force`` names stages to re-run even when cached. Downstream stages are
+    then only re-run if the forced stage's output bytes changed.
+    """
+    params = stage_params(config, seed, date.today().isoformat(), overrides)
+    order = stage_order(targets)
+    check_params(order, params)
+    force = set(force)
+    results: Dict[str, StageResult] = {}
+    for name in order:
+        stage = STAGES[name]
+        inputs = {dep: results[dep] for dep in stage.deps}
+        result = run_stage(stage, params.get(name, {}), inputs, cache_dir, {'workers': workers}, name in force)
+        status = "cached" if result.cached else f"ran in {result.seconds:.1f}s"
+        print(f"{'⏭️ ' if result.cached else '✅'} {name:<10} {status:<14} {result.key[:12]}  {result.directory}")
+        results[name] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the generate/expand/smooth/analyze/visualize pipeline with caching")
+    parser.add_argument('--config', action='append',
+                        help="Scenario config (repeatable for a sweep; default: config.json)")
+    parser.add_argument('--target', action='append', choices=sorted(STAGES),
+                        help="Stage(s) to produce, with their dependencies (default: analyze)")
+    parser.add_argument('--seed', type=int, help="Seed for generate and expand (default: the config's random_seed, else 0)")
+    parser.add_argument('--multiplier', type=int, help="Expand multiplier")
+    parser.add_argument('--force', action='append', default=[], help="Re-run this stage even if cached")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+
+    overrides = {'expand': {'multiplier': args.multiplier}} if args.multiplier else None
+    for config_file in args.config or [os.path.join(PACKAGE_DIR, 'config.json')]:
+        with open(config_file, encoding='utf-8') as f:
+            config = json.load(f)
+        seed = args.seed
+        if seed is None:
+            seed = config.get('data_generation', {}).get('random_seed')
+        seed = DEFAULT_SEED if seed is None else seed
+        print(f"🚀 Pipeline for {config_file} (seed {seed})")
+        try:
+            check_params(stage_order(args.target or ['analyze']), stage_params(config, seed, '', overrides))
+        except ValueError as e:
+            parser.error(str(e))
+        results = run_pipeline(config, args.target or ['analyze'], seed, args.cache_dir, args.workers,
+                               args.force, overrides)
+        for name in args.target or ['analyze']:
+            for artifact in results[name].artifacts:
+                print(f"📁 {name}.{artifact}: {results[name].path(artifact)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -8,14 +8,37 @@ Facebook Prophet.
 
 The function supports basic trend, weekly and yearly seasonality,
 random noise and optional promotion spikes on specific dates.
+
+``generate_mock_sku_sales_batch`` produces many SKUs at once as a
+SKUs x days matrix, which is how large benchmark catalogs are built.
+``generate_mock_sku_sales_hierarchy`` adds category / vendor / total
+rollups (and optional category-level shocks shared by their SKUs).
+All three accept an ``AnomalySpec`` to inject labelled spikes, level
+shifts, dropouts and stock-outs (see ``anomalies.py``). The hierarchy
+generator also takes a ``CorrelationSpec`` for correlated cross-SKU
+demand with complement and substitute groups (see ``correlated_demand.py``).
 """
 
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Sequence, Union
 
 import numpy as np
 import pandas as pd
 
+from anomalies import AnomalySpec, inject_anomalies, write_labels
+from correlated_demand import CorrelationSpec, DemandFactorModel
+from hierarchy import group_codes, rollup_matrix
+from partitioned_writer import PartitionedWriter
+
+# Set to AnomalySpec() to inject labelled anomalies into the mock toy data
+ANOMALY_SPEC: AnomalySpec | None = None
+# Set to CorrelationSpec() for correlated demand with complement / substitute groups per category
+CORRELATION_SPEC: CorrelationSpec | None = None
+# Seed for the mock toy data; None draws a fresh one (recorded in the dataset catalog)
+RANDOM_SEED: int | None = None
+# Directory for memory-mappable SKU x day units / holiday / promotion .npy arrays (see demand_matrix.py); None skips it
+DEMAND_MATRIX_DIR: str | None = None
+
 
 def generate_mock_sku_sales(
     sku: str,
@@ -27,6 +50,8 @@ def generate_mock_sku_sales(
     noise_std: float = 1.0,
     promotion_days: List[str] | None = None,
     holiday_boost: float = 2.0,
+    anomalies: AnomalySpec | None = None,
+    labels_file: str | None = None,
 ) -> pd.DataFrame:
     """Generate daily sales for a SKU with realistic patterns.
 
@@ -48,6 +73,10 @@ def generate_mock_sku_sales(
         Dates with promotional boosts.
     holiday_boost : float, optional
         Additional sales amount applied on ``promotion_days``.
+    anomalies : AnomalySpec | None, optional
+        Inject spikes, level shifts, dropouts and stock-out runs.
+    labels_file : str | None, optional
+        Where to write the ``sku``/``date``/``anomaly`` label sidecar.
 
     Returns
     -------
@@ -55,109 +84,407 @@ def generate_mock_sku_sales(
         DataFrame containing ``ds`` (date), ``y`` (sales) and ``sku``.
     """
 
-    date_range = pd.date_range(start=start_date, end=end_date, freq="D")
+    df = generate_mock_sku_sales_batch(
+        [sku],
+        start_date,
+        end_date,
+        base_sales,
+        seasonality_strength=seasonality_strength,
+        trend_slope=trend_slope,
+        noise_std=noise_std,
+        promotion_days=promotion_days,
+        holiday_boost=holiday_boost,
+        anomalies=anomalies,
+        labels_file=labels_file,
+    )
+    df["y"] = df["y"].astype(int)
+    df["sku"] = df["sku"].astype(object)
+    return df
+
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+def _per_sku(values: ArrayLike, num_skus: int, name: str) -> np.ndarray:
+    """Broadcast a scalar or per-SKU sequence to a ``(num_skus, 1)`` column."""
+    arr = np.asarray(values, dtype=float)
+    if arr.ndim == 0:
+        arr = np.full(num_skus, float(arr))
+    if arr.shape != (num_skus,):
+        raise ValueError(f"{name} must be a scalar or have one value per SKU ({num_skus})")
+    return arr[:, None]
+
+
+def apply_anomalies(
+    matrix: np.ndarray,
+    date_range: pd.DatetimeIndex,
+    skus: Sequence[str],
+    anomalies: AnomalySpec | None,
+    labels_file: str | None = None,
+    rng: np.random.Generator | None = None,
+) -> np.ndarray:
+    """Inject ``anomalies`` into a sales matrix and write their labels.
+
+    Returns ``matrix`` unchanged when ``anomalies`` is ``None``.
+    """
+    if anomalies is None:
+        return matrix
+    matrix, labels = inject_anomalies(matrix, anomalies, rng)
+    if labels_file:
+        write_labels(labels_file, labels, skus, date_range)
+    return matrix
+
+
+def promotion_index(date_range: pd.DatetimeIndex, promotion_days: List[str] | None) -> np.ndarray:
+    """Return the positions of ``promotion_days`` inside ``date_range``."""
+    if not promotion_days:
+        return np.empty(0, dtype=np.intp)
+    positions = date_range.get_indexer(pd.to_datetime(promotion_days))
+    return np.unique(positions[positions >= 0])
+
+
+def generate_mock_sku_sales_matrix(
+    num_skus: int,
+    date_range: pd.DatetimeIndex,
+    base_sales: ArrayLike,
+    seasonality_strength: ArrayLike = 0.3,
+    trend_slope: ArrayLike = 0.05,
+    noise_std: ArrayLike = 1.0,
+    promotion_days: List[str] | None = None,
+    holiday_boost: ArrayLike = 2.0,
+    rng: np.random.Generator | None = None,
+    category_codes: Sequence[int] | None = None,
+    category_shock_std: float = 0.0,
+    correlation: CorrelationSpec | None = None,
+) -> np.ndarray:
+    """Generate a ``(num_skus, num_days)`` int32 matrix of daily sales.
+
+    Same model as ``generate_mock_sku_sales``; the calendar terms are
+    computed once for all SKUs and promotions are applied by index.
+    ``rng`` defaults to NumPy's global random state.
+
+    With ``category_codes`` and ``category_shock_std > 0`` a daily
+    log-normal multiplier ``m = exp(s * z - s**2 / 2)`` (mean 1) is drawn
+    per category and scales the ``base_sales`` of each of its SKUs, i.e.
+    adds ``base_sales * (m - 1)``, which correlates SKUs within a category.
+    With ``category_codes`` and ``correlation``, each SKU also gets
+    ``base_sales * (m - 1)`` from a ``DemandFactorModel`` multiplier ``m``.
+    """
     num_days = len(date_range)
+    base = _per_sku(base_sales, num_skus, "base_sales")
+    strength = _per_sku(seasonality_strength, num_skus, "seasonality_strength")
+    slope = _per_sku(trend_slope, num_skus, "trend_slope")
+    std = _per_sku(noise_std, num_skus, "noise_std")
+    boost = _per_sku(holiday_boost, num_skus, "holiday_boost")
+
+    # Shared calendar terms: linear ramp and weekly + yearly-like seasonality
+    ramp = np.linspace(0, num_days, num_days)
+    seasonal = (
+        np.sin(2 * np.pi * date_range.dayofweek.to_numpy() / 7)
+        + np.sin(2 * np.pi * date_range.dayofyear.to_numpy() / 365.25)
+    )
+
+    # Build the matrix in place to keep a single float buffer alive
+    normal = rng.standard_normal if rng is not None else np.random.standard_normal
+    sales = normal((num_skus, num_days))
+    sales *= std
+    sales += base
+    sales += slope * ramp
+    sales += strength * seasonal
+
+    if category_codes is not None and category_shock_std > 0:
+        codes = np.asarray(category_codes)
+        shocks = np.exp(normal((int(codes.max()) + 1, num_days)) * category_shock_std - category_shock_std ** 2 / 2)
+        sales += base * (shocks[codes] - 1)
+
+    if category_codes is not None and correlation is not None:
+        model = DemandFactorModel(category_codes, correlation, rng)
+        sales += base * (model.sample_days(num_days) - 1)
+
+    promo_idx = promotion_index(date_range, promotion_days)
+    if promo_idx.size:
+        sales[:, promo_idx] += boost
 
-    # Linear trend
-    trend = np.linspace(0, trend_slope * num_days, num_days)
+    np.clip(sales, 0, None, out=sales)
+    np.round(sales, out=sales)
+    return sales.astype(np.int32)
 
-    # Weekly seasonality (higher on weekends)
-    weekly = np.sin(2 * np.pi * date_range.dayofweek / 7) * seasonality_strength
 
-    # Yearly-like seasonality
-    monthly = (
-        np.sin(2 * np.pi * date_range.dayofyear / 365.25) * seasonality_strength
+def generate_mock_sku_sales_batch(
+    skus: Sequence[str],
+    start_date: str,
+    end_date: str,
+    base_sales: ArrayLike,
+    seasonality_strength: ArrayLike = 0.3,
+    trend_slope: ArrayLike = 0.05,
+    noise_std: ArrayLike = 1.0,
+    promotion_days: List[str] | None = None,
+    holiday_boost: ArrayLike = 2.0,
+    layout: str = "long",
+    rng: np.random.Generator | None = None,
+    anomalies: AnomalySpec | None = None,
+    labels_file: str | None = None,
+) -> pd.DataFrame:
+    """Generate daily sales for many SKUs in one vectorized computation.
+
+    Parameters
+    ----------
+    skus : sequence of str
+        SKU identifiers, one row of the output matrix each.
+    start_date, end_date : str
+        Date range in ``YYYY-MM-DD`` format.
+    base_sales, seasonality_strength, trend_slope, noise_std, holiday_boost
+        Scalars applied to every SKU, or arrays with one value per SKU.
+    promotion_days : list[str] | None, optional
+        Dates with promotional boosts (shared by all SKUs).
+    layout : {"long", "wide"}, optional
+        ``"long"`` returns ``ds``/``y``/``sku`` rows ordered by SKU then
+        date (``sku`` is categorical); ``"wide"`` returns one column per
+        SKU indexed by ``ds``.
+    rng : numpy.random.Generator | None, optional
+        Random generator; defaults to NumPy's global random state.
+    anomalies : AnomalySpec | None, optional
+        Inject labelled anomalies into every SKU series.
+    labels_file : str | None, optional
+        Where to write the ``sku``/``date``/``anomaly`` label sidecar.
+
+    Returns
+    -------
+    pandas.DataFrame
+        Sales for all SKUs, built directly from the matrix without concat.
+    """
+    if layout not in ("long", "wide"):
+        raise ValueError("layout must be 'long' or 'wide'")
+    skus = list(skus)
+    date_range = pd.date_range(start=start_date, end=end_date, freq="D")
+    matrix = generate_mock_sku_sales_matrix(
+        len(skus),
+        date_range,
+        base_sales,
+        seasonality_strength=seasonality_strength,
+        trend_slope=trend_slope,
+        noise_std=noise_std,
+        promotion_days=promotion_days,
+        holiday_boost=holiday_boost,
+        rng=rng,
     )
+    matrix = apply_anomalies(matrix, date_range, skus, anomalies, labels_file, rng)
+    if layout == "wide":
+        wide = pd.DataFrame(matrix.T, index=date_range, columns=skus)
+        wide.index.name = "ds"
+        return wide
+    return sales_matrix_to_long(matrix, date_range, skus)
+
+
+def generate_mock_sku_sales_hierarchy(
+    products: Sequence[dict],
+    start_date: str,
+    end_date: str,
+    seasonality_strength: ArrayLike = 0.3,
+    trend_slope: ArrayLike = 0.05,
+    noise_std: ArrayLike = 1.0,
+    promotion_days: List[str] | None = None,
+    holiday_boost: ArrayLike = 2.0,
+    category_shock_std: float = 0.0,
+    rng: np.random.Generator | None = None,
+    anomalies: AnomalySpec | None = None,
+    labels_file: str | None = None,
+    correlation: CorrelationSpec | None = None,
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Generate SKU sales plus coherent category, vendor and total rollups.
 
-    # Random noise
-    noise = np.random.normal(0, noise_std, num_days)
+    Parameters
+    ----------
+    products : sequence of dict
+        Product records with ``sku``, ``category``, ``vendor`` and
+        ``base_sales`` (e.g. ``generate_toy_products`` output with a
+        ``base_sales`` value added).
+    category_shock_std : float, optional
+        Log-scale standard deviation of the daily category multiplier on
+        each SKU's ``base_sales`` (mean 1). ``0`` keeps SKUs independent.
+    correlation : CorrelationSpec | None, optional
+        Correlated demand from a factor model with complement and
+        substitute groups drawn inside each category.
+    anomalies, labels_file
+        Anomalies are injected before the rollups are summed, so every
+        level includes them.
+
+    Other parameters are as for ``generate_mock_sku_sales_batch``.
+
+    Returns
+    -------
+    tuple[pandas.DataFrame, pandas.DataFrame]
+        The long SKU frame (``ds``, ``y``, ``sku``) and a long rollup frame
+        with ``level``, ``key``, ``ds`` and ``y`` for the ``category``,
+        ``vendor`` and ``total`` levels. Rollups are sums of the final
+        integer SKU series, so every level reconciles exactly.
+    """
+    skus = [p["sku"] for p in products]
+    category_codes, categories = group_codes([p.get("category", "unknown") for p in products])
+    vendor_codes, vendors = group_codes([p.get("vendor", "unknown") for p in products])
+    date_range = pd.date_range(start=start_date, end=end_date, freq="D")
+    matrix = generate_mock_sku_sales_matrix(
+        len(skus),
+        date_range,
+        [p["base_sales"] for p in products],
+        seasonality_strength=seasonality_strength,
+        trend_slope=trend_slope,
+        noise_std=noise_std,
+        promotion_days=promotion_days,
+        holiday_boost=holiday_boost,
+        rng=rng,
+        category_codes=category_codes,
+        category_shock_std=category_shock_std,
+        correlation=correlation,
+    )
+    matrix = apply_anomalies(matrix, date_range, skus, anomalies, labels_file, rng)
 
-    promo_effect = np.zeros(num_days)
-    if promotion_days:
-        for promo_day in promotion_days:
-            idx = date_range == pd.to_datetime(promo_day)
-            promo_effect[idx] = holiday_boost
+    levels = [
+        ("category", rollup_matrix(matrix, category_codes, len(categories)), categories),
+        ("vendor", rollup_matrix(matrix, vendor_codes, len(vendors)), vendors),
+        ("total", matrix.sum(axis=0, dtype=np.int64)[None, :], ["total"]),
+    ]
+    num_days = len(date_range)
+    rollups = pd.DataFrame({
+        "level": np.repeat([name for name, _, keys in levels for _ in keys], num_days),
+        "key": np.repeat([key for _, _, keys in levels for key in keys], num_days),
+        "ds": np.tile(date_range.to_numpy(), sum(len(keys) for _, _, keys in levels)),
+        "y": np.concatenate([totals.reshape(-1) for _, totals, _ in levels]),
+    })
+    return sales_matrix_to_long(matrix, date_range, skus), rollups
 
-    sales = base_sales + trend + weekly + monthly + promo_effect + noise
-    sales = np.clip(sales, 0, None).round()
 
-    return pd.DataFrame({"ds": date_range, "y": sales.astype(int), "sku": sku})
+def sales_matrix_to_long(matrix: np.ndarray, date_range: pd.DatetimeIndex, skus: Sequence[str]) -> pd.DataFrame:
+    """Flatten a SKUs x days matrix into the long ``ds``/``y``/``sku`` layout."""
+    num_skus, num_days = matrix.shape
+    return pd.DataFrame({
+        "ds": np.tile(date_range.to_numpy(), num_skus),
+        "y": matrix.reshape(-1),
+        "sku": pd.Categorical.from_codes(
+            np.repeat(np.arange(num_skus, dtype=np.int32), num_days), categories=list(skus)
+        ),
+    })
 
 
 if __name__ == "__main__":
     # Define 10 toy variations
     toy_skus = [
-        {"sku": "TOY-LEGO-001", "name": "Classic LEGO City Set", "base_sales": 5},
-        {"sku": "TOY-LEGO-002", "name": "LEGO Star Wars Set", "base_sales": 8},
-        {"sku": "TOY-BARBIE-001", "name": "Barbie Dreamhouse", "base_sales": 4},
-        {"sku": "TOY-HOTWHEELS-001", "name": "Hot Wheels Track Set", "base_sales": 6},
-        {"sku": "TOY-NERF-001", "name": "Nerf Elite Blaster", "base_sales": 7},
-        {"sku": "TOY-PUZZLE-001", "name": "1000 Piece Jigsaw Puzzle", "base_sales": 3},
-        {"sku": "TOY-MONOPOLY-001", "name": "Monopoly Board Game", "base_sales": 5},
-        {"sku": "TOY-PLAYDOH-001", "name": "Play-Doh Creative Set", "base_sales": 4},
-        {"sku": "TOY-TRANSFORMER-001", "name": "Transformers Action Figure", "base_sales": 6},
-        {"sku": "TOY-POKEMON-001", "name": "Pokemon Trading Card Game", "base_sales": 9}
+        {"sku": "TOY-LEGO-001", "name": "Classic LEGO City Set", "base_sales": 5, "category": "stable_essentials", "vendor": "LEGO Group"},
+        {"sku": "TOY-LEGO-002", "name": "LEGO Star Wars Set", "base_sales": 8, "category": "normal_retail", "vendor": "LEGO Group"},
+        {"sku": "TOY-BARBIE-001", "name": "Barbie Dreamhouse", "base_sales": 4, "category": "normal_retail", "vendor": "Mattel"},
+        {"sku": "TOY-HOTWHEELS-001", "name": "Hot Wheels Track Set", "base_sales": 6, "category": "normal_retail", "vendor": "Mattel"},
+        {"sku": "TOY-NERF-001", "name": "Nerf Elite Blaster", "base_sales": 7, "category": "normal_retail", "vendor": "Hasbro"},
+        {"sku": "TOY-PUZZLE-001", "name": "1000 Piece Jigsaw Puzzle", "base_sales": 3, "category": "stable_essentials", "vendor": "Ravensburger"},
+        {"sku": "TOY-MONOPOLY-001", "name": "Monopoly Board Game", "base_sales": 5, "category": "stable_essentials", "vendor": "Hasbro"},
+        {"sku": "TOY-PLAYDOH-001", "name": "Play-Doh Creative Set", "base_sales": 4, "category": "stable_essentials", "vendor": "Hasbro"},
+        {"sku": "TOY-TRANSFORMER-001", "name": "Transformers Action Figure", "base_sales": 6, "category": "normal_retail", "vendor": "Hasbro"},
+        {"sku": "TOY-POKEMON-001", "name": "Pokemon Trading Card Game", "base_sales": 9, "category": "volatile_viral", "vendor": "Pokémon Company"}
     ]
     
-    # Generate data for all toys and combine into one dataset
-    all_data = []
-    
-    for toy in toy_skus:
-        print(f"Generating data for {toy['name']} ({toy['sku']})...")
-        df = generate_mock_sku_sales(
-            sku=toy['sku'],
-            start_date="2023-01-01",
-            end_date="2025-06-15",
-            base_sales=toy['base_sales'],
-            seasonality_strength=2.5,
-            trend_slope=0.01,
-            noise_std=1.2,
-            promotion_days=[
-                # 2023 US National Holidays
-                "2023-01-01",  # New Year's Day
-                "2023-01-16",  # Martin Luther King Jr. Day
-                "2023-02-20",  # Presidents' Day
-                "2023-05-29",  # Memorial Day
-                "2023-06-19",  # Juneteenth
-                "2023-07-04",  # Independence Day
-                "2023-09-04",  # Labor Day
-                "2023-10-09",  # Columbus Day
-                "2023-11-11",  # Veterans Day
-                "2023-11-23",  # Thanksgiving
-                "2023-12-25",  # Christmas Day
-                
-                # 2024 US National Holidays
-                "2024-01-01",  # New Year's Day
-                "2024-01-15",  # Martin Luther King Jr. Day
-                "2024-02-19",  # Presidents' Day
-                "2024-05-27",  # Memorial Day
-                "2024-06-19",  # Juneteenth
-                "2024-07-04",  # Independence Day
-                "2024-09-02",  # Labor Day
-                "2024-10-14",  # Columbus Day
-                "2024-11-11",  # Veterans Day
-                "2024-11-28",  # Thanksgiving
-                "2024-12-25",  # Christmas Day
-                
-                # 2025 US National Holidays (up to current date)
-                "2025-01-01",  # New Year's Day
-                "2025-01-20",  # Martin Luther King Jr. Day
-                "2025-02-17",  # Presidents' Day
-                "2025-05-26",  # Memorial Day
-            ],
-            holiday_boost=10,
-        )
-        all_data.append(df)
+    # Generate data for all toys in one vectorized batch
+    promotion_days = [
+        # 2023 US National Holidays
+        "2023-01-01",  # New Year's Day
+        "2023-01-16",  # Martin Luther King Jr. Day
+        "2023-02-20",  # Presidents' Day
+        "2023-05-29",  # Memorial Day
+        "2023-06-19",  # Juneteenth
+        "2023-07-04",  # Independence Day
+        "2023-09-04",  # Labor Day
+        "2023-10-09",  # Columbus Day
+        "2023-11-11",  # Veterans Day
+        "2023-11-23",  # Thanksgiving
+        "2023-12-25",  # Christmas Day
+        
+        # 2024 US National Holidays
+        "2024-01-01",  # New Year's Day
+        "2024-01-15",  # Martin Luther King Jr. Day
+        "2024-02-19",  # Presidents' Day
+        "2024-05-27",  # Memorial Day
+        "2024-06-19",  # Juneteenth
+        "2024-07-04",  # Independence Day
+        "2024-09-02",  # Labor Day
+        "2024-10-14",  # Columbus Day
+        "2024-11-11",  # Veterans Day
+        "2024-11-28",  # Thanksgiving
+        "2024-12-25",  # Christmas Day
+        
+        # 2025 US National Holidays (up to current date)
+        "2025-01-01",  # New Year's Day
+        "2025-01-20",  # Martin Luther King Jr. Day
+        "2025-02-17",  # Presidents' Day
+        "2025-05-26",  # Memorial Day
+    ]
+
+    params = dict(
+        start_date="2023-01-01",
+        end_date="2025-06-15",
+        seasonality_strength=2.5,
+        trend_slope=0.01,
+        noise_std=1.2,
+        promotion_days=promotion_days,
+        holiday_boost=10,
+        category_shock_std=0.15,
+    )
+    seed = RANDOM_SEED if RANDOM_SEED is not None else int(np.random.SeedSequence().entropy % 2 ** 32)
+
+    print(f"Generating data for {len(toy_skus)} toys...")
+    combined_df, rollups_df = generate_mock_sku_sales_hierarchy(
+        toy_skus,
+        **params,
+        anomalies=ANOMALY_SPEC,
+        labels_file="mock_toys_anomalies.csv",
+        correlation=CORRELATION_SPEC,
+        rng=np.random.default_rng(seed),
+    )
     
-    # Combine all toy data into one CSV
-    combined_df = pd.concat(all_data, ignore_index=True)
+    # Write all toy data into one CSV
     combined_df.to_csv("mock_toys_all_skus.csv", index=False)
     print(f"✅ mock_toys_all_skus.csv created with {len(toy_skus)} toy variations")
     print(f"📊 Total records: {len(combined_df)}")
-    
-    # Also create individual CSV files for each toy
-    for toy in toy_skus:
-        toy_data = combined_df[combined_df['sku'] == toy['sku']]
-        filename = f"mock_{toy['sku'].lower().replace('-', '_')}.csv"
-        toy_data.to_csv(filename, index=False)
-        print(f"✅ {filename} created")
+    rollups_df.to_csv("mock_toys_rollups.csv", index=False)
+    print(f"✅ mock_toys_rollups.csv created with category, vendor and total rollups")
+    if ANOMALY_SPEC is not None:
+        print(f"🚨 mock_toys_anomalies.csv created with injected anomaly labels")
+    demand_files = {}
+    if DEMAND_MATRIX_DIR is not None:
+        from demand_matrix import write_demand_matrix
+
+        # Long rows are ordered by SKU then date, so y reshapes straight into the matrix
+        date_range = pd.date_range(start=params["start_date"], end=params["end_date"], freq="D")
+        promotion = np.zeros(len(date_range), dtype=bool)
+        promotion[promotion_index(date_range, promotion_days)] = True
+        units = combined_df["y"].to_numpy().reshape(len(toy_skus), len(date_range))
+        paths = write_demand_matrix(DEMAND_MATRIX_DIR, [p["sku"] for p in toy_skus], date_range, units,
+                                    promotion=promotion)
+        demand_files = {f"demand_{name}": path for name, path in paths.items()}
+        print(f"🧊 {DEMAND_MATRIX_DIR}/ created with memory-mappable units, holiday and promotion arrays")
+
+    # Also write one Hive-style partition per toy (single pass, with manifest)
+    writer = PartitionedWriter("mock_toys_partitioned", partition_by="sku", date_column="ds",
+                               sku_column="sku", overwrite=True)
+    writer.write_frame(combined_df)
+    manifest = writer.close()
+    for partition in manifest["partitions"]:
+        print(f"✅ mock_toys_partitioned/{partition['path']} created ({partition['rows']} rows)")
+
+    from dataclasses import asdict
+    from dataset_catalog import DAILY_SALES, partition_files, register_dataset
+
+    # The single file and the per-SKU partitions are two layouts of the same run
+    run_info = dict(
+        kind=DAILY_SALES, generator="realist_mock_data_generator",
+        config={"products": toy_skus, **params, "anomalies": asdict(ANOMALY_SPEC) if ANOMALY_SPEC else None,
+                "correlation": asdict(CORRELATION_SPEC) if CORRELATION_SPEC else None},
+        seed=seed, start_date=params["start_date"], end_date=params["end_date"], rows=len(combined_df),
+        skus=[p["sku"] for p in toy_skus],
+    )
+    dataset_id = register_dataset(
+        "mock_toys_all_skus.csv", **run_info,
+        extra_files={"rollups": "mock_toys_rollups.csv",
+                     "anomalies": "mock_toys_anomalies.csv" if ANOMALY_SPEC is not None else None,
+                     **demand_files},
+    )
+    partitioned_id = register_dataset(
+        "mock_toys_partitioned", **run_info, partitions=partition_files("mock_toys_partitioned", manifest))
+    print(f"🗂️  Registered in dataset catalog as #{dataset_id} and #{partitioned_id} (partitioned, seed {seed})")
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Shopify Order Export Schema for Forezia Mock Data
+Single column definition shared by the synthetic generator and the marketplace adapters
+"""
+
+# Prophet helper fields added by the synthetic generator (blank in converted exports)
+SYNTHETIC_HELPER_COLUMNS = ("discount_ratio", "is_holiday", "stockout", "is_weekend")
+
+# Output column order (Shopify order export layout plus Prophet helper fields)
+SHOPIFY_COLUMNS = [
+    "Name", "Email", "Financial Status", "Paid at", "Fulfillment Status", "Fulfilled at",
+    "Accepts Marketing", "Currency", "Subtotal", "Shipping", "Taxes", "Total", "Discount Code",
+    "Discount Amount", "discount_ratio", "Shipping Method", "Created at", "Lineitem quantity", "Lineitem name",
+    "Lineitem price", "Lineitem compare at price", "Lineitem sku", "Lineitem requires shipping",
+    "Lineitem taxable", "Lineitem fulfillment status", "Billing Name", "Billing Street",
+    "Billing Address1", "Billing Address2", "Billing Company", "Billing City", "Billing Zip",
+    "Billing Province", "Billing Country", "Billing Phone", "Shipping Name", "Shipping Street",
+    "Shipping Address1", "Shipping Address2", "Shipping Company", "Shipping City", "Shipping Zip",
+    "Shipping Province", "Shipping Country", "Shipping Phone", "Notes", "Note Attributes",
+    "Cancelled at", "Payment Method", "Payment Reference", "Refunded Amount", "Vendor",
+    "Outstanding Balance", "Employee", "Location", "Device ID", "Id", "Tags", "Risk Level",
+    "Source", "Lineitem discount", "Tax 1 Name", "Tax 1 Value", "Tax 2 Name", "Tax 2 Value",
+    "Tax 3 Name", "Tax 3 Value", "Tax 4 Name", "Tax 4 Value", "Tax 5 Name", "Tax 5 Value",
+    # Fields present in newer Shopify exports
+    "Customer", "Receipt Number", "Billing Province Name", "Lineitem variant id", 
+    "is_holiday", "Updated at", "Payment References", "Shipping Province Name", 
+    "Lineitem variant", "Processed at", "Duties", "Payment ID", "stockout", 
+    "Payment Terms Name", "Phone", "is_weekend", "Next Payment Due At", 
+    "Lineitem product id", "Lineitem grams"
+]
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Mergeable Sketches for Forezia Mock Data
+Fixed-size summaries that are built per chunk or worker and merged afterwards
+"""
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+HLL_PRECISION = 14  # 2**14 registers: ~0.8% standard error in 16 KB
+
+
+def hash_values(values) -> np.ndarray:
+    """Stable 64-bit hashes of ``values`` (same on every run and process)."""
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+
+
+def _swar_popcount(x: np.ndarray) -> np.ndarray:
+    """Set bits of every uint64 with the classic SWAR reduction (for NumPy < 2.0)."""
+    x = x - ((x >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+
+_popcount = getattr(np, 'bitwise_count', _swar_popcount)  # np.bitwise_count needs NumPy >= 2.0
+
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    """Exact bit length of every uint64 (smear the top bit down, then popcount)."""
+    x = x.copy()
+    for shift in (1, 2, 4, 8, 16, 32):
+        x |= x >> np.uint64(shift)
+    return _popcount(x).astype(np.int64)
+
+
+class HyperLogLog:
+    """HyperLogLog distinct counter; ``merge`` takes the register-wise maximum."""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, values):
+        """Add an array-like of values (hashed with ``hash_values``)."""
+        if len(values):
+            self.add_hashes(hash_values(values))
+        return self
+
+    def add_hashes(self, hashes: np.ndarray):
+        p = self.precision
+        index = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        rank = (64 - p) - _bit_length(rest) + 1
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other: 'HyperLogLog'):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    @classmethod
+    def merge_all(cls, sketches: Iterable['HyperLogLog']) -> 'HyperLogLog':
+        merged = None
+        for sketch in sketches:
+            merged = cls(sketch.precision).merge(sketch) if merged is None else merged.merge(sketch)
+        return merged if merged is not None else cls()
+
+    def count(self) -> int:
+        """Estimated number of distinct values."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)  # linear counting for small cardinalities
+        return int(round(estimate))
+
+    def __len__(self):
+        return self.count()
+
+
+TDIGEST_COMPRESSION = 500  # ~compression / 2 centroids; larger = more accurate, still a few KB
+TDIGEST_BUFFER = 50000  # values buffered before they are folded into centroids
+
+
+class TDigest:
+    """Mergeable t-digest for streaming quantiles.
+
+    Values and centroids are sorted together and binned by the k1 scale
+    function ``k(q) = delta / (2 pi) * asin(2q - 1)``: everything in the same
+    unit of ``k`` becomes one centroid. Centroids stay small near q = 0 and
+    q = 1, so tail quantiles such as p99 stay accurate, and compression is a
+    handful of vectorized NumPy calls.
+    """
+
+    def __init__(self, compression: float = TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+        self._buffer = []
+        self._buffered = 0
+
+    @property
+    def count(self) -> float:
+        self._flush()
+        return float(self.weights.sum())
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values):
+            self.min = min(self.min, values.min())
+            self.max = max(self.max, values.max())
+            self._buffer.append(values)
+            self._buffered += len(values)
+            if self._buffered >= TDIGEST_BUFFER:
+                self._flush()
+        return self
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        values = np.concatenate(self._buffer)
+        self._buffer, self._buffered = [], 0
+        self._compress(np.concatenate([self.means, values]),
+                       np.concatenate([self.weights, np.ones(len(values))]))
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+        # k-scale position of each centroid's left edge; one bin per unit of k
+        q = (np.cumsum(weights) - weights) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(np.clip(2 * q - 1, -1, 1))
+        bins = np.floor(k - k[0]).astype(np.int64)
+        self.weights = np.bincount(bins, weights=weights)
+        keep = self.weights > 0
+        self.means = np.bincount(bins, weights=means * weights)[keep] / self.weights[keep]
+        self.weights = self.weights[keep]
+
+    def merge(self, other: 'TDigest'):
+        other._flush()
+        self._flush()
+        if len(other.weights):
+            self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+            self._compress(np.concatenate([self.means, other.means]),
+                           np.concatenate([self.weights, other.weights]))
+        return self
+
+    @classmethod
+    def merge_all(cls, digests: Iterable['TDigest']) -> 'TDigest':
+        merged = None
+        for digest in digests:
+            merged = cls(digest.compression).merge(digest) if merged is None else merged.merge(digest)
+        return merged if merged is not None else cls()
+
+    def quantile(self, q):
+        """Estimated quantile(s) for ``q`` in [0, 1] (NaN when empty)."""
+        self._flush()
+        q = np.asarray(q, dtype=float)
+        if not len(self.weights):
+            return np.full(q.shape, np.nan) if q.ndim else np.nan
+        total = self.weights.sum()
+        # Interpolate between centroid centres, anchored at the exact min / max
+        centres = np.concatenate([[0.0], np.cumsum(self.weights) - self.weights / 2, [total]])
+        means = np.concatenate([[self.min], self.means, [self.max]])
+        result = np.interp(q * total, centres, means)
+        return result if q.ndim else float(result)
+
+
+def _index_hashes(hashes: np.ndarray, depth: int, width: int) -> np.ndarray:
+    """``(depth, n)`` column indexes from one 64-bit hash (double hashing)."""
+    h1 = hashes & np.uint64(0xFFFFFFFF)
+    h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+    rows = np.arange(depth, dtype=np.uint64)[:, None]
+    return ((h1[None, :] + rows * h2[None, :]) % np.uint64(width)).astype(np.int64)
+
+
+class CountMinSketch:
+    """Count-min sketch: frequency estimates that never undercount; merge adds tables."""
+
+    def __init__(self, width: int = 2048, depth: int = 5):
+        self.width, self.depth = width, depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def add(self, keys, counts=None):
+        """Add ``keys`` (array-like), each with its count (default 1)."""
+        if not len(keys):
+            return self
+        index = _index_hashes(hash_values(keys), self.depth, self.width)
+        counts = np.ones(len(keys), dtype=np.int64) if counts is None else np.asarray(counts, dtype=np.int64)
+        for row in range(self.depth):
+            np.add.at(self.table[row], index[row], counts)
+        return self
+
+    def estimate(self, keys) -> np.ndarray:
+        if not len(keys):
+            return np.empty(0, dtype=np.int64)
+        index = _index_hashes(hash_values(keys), self.depth, self.width)
+        return self.table[np.arange(self.depth)[:, None], index].min(axis=0)
+
+    def merge(self, other: 'CountMinSketch'):
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("Cannot merge count-min sketches of different shapes")
+        self.table += other.table
+        return self
+
+
+class TopK:
+    """Heavy hitters: a count-min sketch plus the ``capacity`` keys with the highest estimates."""
+
+    def __init__(self, k: int = 10, capacity: int = 200, width: int = 2048, depth: int = 5):
+        self.k, self.capacity = k, capacity
+        self.sketch = CountMinSketch(width, depth)
+        self.candidates = np.empty(0, dtype=object)
+
+    def add(self, keys, counts=None):
+        """Add keys; a chunk's ``value_counts()`` can be passed as ``(index, values)``."""
+        keys = np.asarray(keys, dtype=object)
+        if len(keys):
+            self.sketch.add(keys, counts)
+            self._prune(np.concatenate([self.candidates, pd.unique(keys)]))
+        return self
+
+    def _prune(self, keys: np.ndarray):
+        keys = pd.unique(keys)
+        estimates = self.sketch.estimate(keys)
+        keep = np.argsort(-estimates, kind='stable')[:self.capacity]
+        self.candidates = np.asarray(keys, dtype=object)[keep]
+
+    def merge(self, other: 'TopK'):
+        self.sketch.merge(other.sketch)
+        self._prune(np.concatenate([self.candidates, other.candidates]))
+        return self
+
+    @classmethod
+    def merge_all(cls, sketches: Iterable['TopK']) -> 'TopK':
+        merged = None
+        for sketch in sketches:
+            if merged is None:
+                merged = cls(sketch.k, sketch.capacity, sketch.sketch.width, sketch.sketch.depth)
+            merged.merge(sketch)
+        return merged if merged is not None else cls()
+
+    def top(self, k: int = None) -> pd.Series:
+        """The ``k`` most frequent keys with their estimated counts."""
+        estimates = pd.Series(self.sketch.estimate(self.candidates), index=self.candidates, dtype='int64')
+        return estimates.sort_values(ascending=False, kind='stable').head(k or self.k)
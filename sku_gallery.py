@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+SKU Chart Gallery for Forezia Mock Data
+Downsampled per-SKU and per-group small multiples, rendered in parallel into an HTML/PNG gallery
+"""
+
+import argparse
+import csv
+import html
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from csv_scanner import Aggregate, DEFAULT_WORKERS, SKU_COLUMN, register_aggregate, scan_csv
+from hierarchy import group_codes
+from output_writer import open_compressed_text
+
+DOWNSAMPLE_METHODS = ('lttb', 'minmax', 'none')
+DEFAULT_POINTS = 200      # points kept per series; a panel is only a few hundred pixels wide
+PANEL_COLUMNS = 6
+PANEL_ROWS = 4
+PAGE_DPI = 80
+LONG_COLUMNS = ('sku', 'ds', 'y')
+GROUP_COLUMNS = ('category', 'vendor')  # first one present groups a long-format file
+
+
+def _sku_vendor_lines(frame):
+    return frame.groupby([frame[SKU_COLUMN].rename('sku'), frame['Vendor'].rename('vendor')]).size().rename('lines')
+
+
+register_aggregate(Aggregate('sku_vendor_lines', (SKU_COLUMN, 'Vendor'), _sku_vendor_lines,
+                             "Line items per SKU and vendor"))
+
+
+# ----------------------------------------------------------------------
+# Downsampling (vectorized across all series; the loop runs over buckets)
+# ----------------------------------------------------------------------
+def _bucket_edges(n: int, buckets: int) -> np.ndarray:
+    return np.linspace(0, n, buckets + 1).astype(np.int64)
+
+
+def lttb_indices(matrix: np.ndarray, points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets point selection for every row of ``matrix``.
+
+    Rows share the x axis (day index). Returns ``(rows, points)`` sorted
+    column indexes; the first and last day are always kept. Each bucket
+    keeps the point forming the largest triangle with the point kept in the
+    previous bucket and the average of the next bucket, which preserves
+    peaks and drops far better than striding.
+    """
+    rows, n = matrix.shape
+    if n <= points or points < 3:
+        return np.broadcast_to(np.arange(n), (rows, n)).copy()
+    y = matrix.astype(float)
+    edges = 1 + _bucket_edges(n - 2, points - 2)
+    selected = np.empty((rows, points), dtype=np.int64)
+    selected[:, 0], selected[:, -1] = 0, n - 1
+    row_index = np.arange(rows)
+    for b in range(points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        nxt_lo, nxt_hi = (edges[b + 1], edges[b + 2]) if b < points - 3 else (n - 1, n)
+        ax, ay = selected[:, b], y[row_index, selected[:, b]]
+        cx, cy = (nxt_lo + nxt_hi - 1) / 2, y[:, nxt_lo:nxt_hi].mean(axis=1)
+        bx = np.arange(lo, hi)
+        area = np.abs((ax[:, None] - cx) * (y[:, lo:hi] - ay[:, None]) - (ax[:, None] - bx) * (cy - ay)[:, None])
+        selected[:, b + 1] = lo + area.argmax(axis=1)
+    return selected
+
+
+def minmax_indices(matrix: np.ndarray, points: int) -> np.ndarray:
+    """Keep the minimum and maximum of ``points // 2`` equal buckets per row (sorted by day)."""
+    rows, n = matrix.shape
+    if n <= points or points < 2:
+        return np.broadcast_to(np.arange(n), (rows, n)).copy()
+    edges = _bucket_edges(n, points // 2)
+    picks = []
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        block = matrix[:, lo:hi]
+        picks.append(np.sort(np.stack([lo + block.argmin(axis=1), lo + block.argmax(axis=1)], axis=1), axis=1))
+    return np.concatenate(picks, axis=1)
+
+
+def downsample(matrix: np.ndarray, points: int = DEFAULT_POINTS, method: str = 'lttb') -> np.ndarray:
+    """Column indexes to plot for each row of ``matrix`` (see ``DOWNSAMPLE_METHODS``)."""
+    if method == 'lttb':
+        return lttb_indices(matrix, points)
+    if method == 'minmax':
+        return minmax_indices(matrix, points)
+    if method == 'none':
+        return np.broadcast_to(np.arange(matrix.shape[1]), matrix.shape).copy()
+    raise ValueError(f"Unknown downsampling method '{method}'. Use one of: {', '.join(DOWNSAMPLE_METHODS)}")
+
+
+# ----------------------------------------------------------------------
+# Loading SKU x day series
+# ----------------------------------------------------------------------
+@dataclass
+class SkuSeries:
+    """Daily units per SKU with each SKU's group (category / vendor)."""
+    matrix: np.ndarray            # (skus, days)
+    skus: List[str]
+    dates: pd.DatetimeIndex
+    groups: List[str]
+    group_name: str = 'group'
+
+
+def _to_matrix(units: pd.Series) -> Tuple[np.ndarray, List[str], pd.DatetimeIndex]:
+    """``(sku, date)`` series -> dense matrix over every day in the range (missing days are 0)."""
+    wide = units.unstack(fill_value=0)
+    wide.columns = pd.to_datetime(wide.columns)
+    dates = pd.DatetimeIndex([])
+    if len(wide.columns):
+        dates = pd.date_range(wide.columns.min(), wide.columns.max(), freq='D')
+    wide = wide.reindex(columns=dates, fill_value=0)
+    return wide.to_numpy(dtype=float), [str(s) for s in wide.index], dates
+
+
+def load_sku_series(path: str, workers: int = DEFAULT_WORKERS) -> SkuSeries:
+    """Load daily units per SKU from a Shopify-layout export or a long ``sku``/``ds``/``y`` file.
+
+    Exports are pre-aggregated by the parallel scanner (SKUs grouped by
+    vendor); long files are read with only the needed columns.
+    """
+    with open_compressed_text(path) as f:
+        header = next(csv.reader(f), [])
+    if SKU_COLUMN in header:
+        results = scan_csv(path, ('sku_day_units', 'sku_vendor_lines'), workers=workers)
+        units = results['sku_day_units']
+        units = units[units.index.get_level_values('sku') != '']
+        matrix, skus, dates = _to_matrix(units)
+        lines = results['sku_vendor_lines']
+        vendor = lines.reset_index().sort_values('lines', kind='stable').groupby('sku')['vendor'].last()
+        return SkuSeries(matrix, skus, dates, [vendor.get(s, 'unknown') or 'unknown' for s in skus], 'vendor')
+    if not set(LONG_COLUMNS) <= set(header):
+        raise ValueError(f"{path}: expected a Shopify export or columns {', '.join(LONG_COLUMNS)}")
+
+    group_column = next((c for c in GROUP_COLUMNS if c in header), None)
+    with open_compressed_text(path) as f:
+        frame = pd.read_csv(f, usecols=[*LONG_COLUMNS, *([group_column] if group_column else [])],
+                            dtype={'sku': 'category', **({group_column: 'category'} if group_column else {})})
+    units = frame.groupby(['sku', pd.to_datetime(frame['ds']).dt.strftime('%Y-%m-%d')], observed=True)['y'].sum()
+    matrix, skus, dates = _to_matrix(units)
+    if group_column:
+        group = frame.drop_duplicates('sku').set_index('sku')[group_column].astype(str)
+        groups = [group.get(s, 'unknown') for s in skus]
+    else:
+        groups = ['all'] * len(skus)
+    return SkuSeries(matrix, skus, dates, groups, group_column or 'group')
+
+
+# ----------------------------------------------------------------------
+# Rendering
+# ----------------------------------------------------------------------
+Panel = Tuple[str, np.ndarray, np.ndarray]  # (label, dates, values)
+
+
+def _panels(matrix: np.ndarray, labels: Sequence[str], dates: pd.DatetimeIndex,
+            points: int, method: str) -> List[Panel]:
+    index = downsample(matrix, points, method)
+    days = dates.to_numpy()
+    return [(label, days[index[i]], matrix[i, index[i]]) for i, label in enumerate(labels)]
+
+
+def _render_page(path: str, title: str, panels: List[Panel], columns: int, dpi: int) -> str:
+    """Worker task: draw one page of small multiples with the non-interactive Agg backend.
+
+    Ticks are fixed (first / middle / last day, zero / peak) and the layout is
+    set up front: automatic locators and ``tight_layout`` dominate render
+    time on pages with many small axes.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    columns = max(1, min(columns, len(panels)))
+    rows = max(1, -(-len(panels) // columns))
+    fig, axes = plt.subplots(rows, columns, figsize=(3 * columns, 2 * rows + 0.6), squeeze=False, sharex=True)
+    fig.subplots_adjust(left=0.05, right=0.97, bottom=0.06, top=1 - 0.6 / (2 * rows + 0.6),
+                        wspace=0.25, hspace=0.45)
+    x_all = np.concatenate([x for _, x, _ in panels])
+    first, last = x_all.min(), x_all.max()
+    x_ticks = [first, first + (last - first) / 2, last]
+    x_labels = [pd.Timestamp(t).strftime('%Y-%m-%d') for t in x_ticks]
+    for ax, (label, x, y) in zip(axes.flat, panels):
+        ax.plot(x, y, linewidth=0.8, color='steelblue')
+        ax.set_title(label, fontsize=8)
+        peak = float(y.max()) if len(y) else 0.0
+        ax.set_yticks([0.0, peak] if peak > 0 else [0.0])
+        ax.set_xticks(x_ticks, x_labels)
+        ax.tick_params(labelsize=6)
+    for ax in axes.flat[len(panels):]:
+        ax.set_visible(False)
+    fig.suptitle(title, fontsize=11, fontweight='bold')
+    fig.savefig(path, dpi=dpi)
+    plt.close(fig)
+    return path
+
+
+def _write_index(out_dir: str, title: str, sections: List[Tuple[str, List[Tuple[str, List[str]]]]]):
+    """``sections`` is ``[(heading, [(png file, [labels on the page]), ...]), ...]``."""
+    parts = [f"<!DOCTYPE html>\n<html><head><meta charset='utf-8'><title>{html.escape(title)}</title>",
+             "<style>body{font-family:sans-serif;margin:2em}img{max-width:100%;border:1px solid #ddd}"
+             "details{margin:.3em 0 1.5em}</style></head><body>",
+             f"<h1>{html.escape(title)}</h1>",
+             "<ul>" + ''.join(f"<li><a href='#s{i}'>{html.escape(h)}</a> ({len(p)} page(s))</li>"
+                              for i, (h, p) in enumerate(sections)) + "</ul>"]
+    for i, (heading, pages) in enumerate(sections):
+        parts.append(f"<h2 id='s{i}'>{html.escape(heading)}</h2>")
+        for png, labels in pages:
+            parts.append(f"<a href='{html.escape(png)}'><img src='{html.escape(png)}' loading='lazy'></a>")
+            parts.append(f"<details><summary>{len(labels)} series</summary>{html.escape(', '.join(labels))}</details>")
+    parts.append("</body></html>\n")
+    path = os.path.join(out_dir, 'index.html')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(parts))
+    return path
+
+
+def _slug(text: str) -> str:
+    return ''.join(c if c.isalnum() else '_' for c in text).strip('_').lower() or 'group'
+
+
+def build_gallery(series: SkuSeries, out_dir: str, points: int = DEFAULT_POINTS, method: str = 'lttb',
+                  workers: int = DEFAULT_WORKERS, per_page: int = PANEL_COLUMNS * PANEL_ROWS,
+                  dpi: int = PAGE_DPI, title: str = 'SKU Sales Gallery') -> str:
+    """Render group totals and every SKU series into ``out_dir``; returns the ``index.html`` path.
+
+    Series are downsampled before plotting, SKUs are paged per group, and
+    pages are drawn in parallel worker processes.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    codes, group_labels = group_codes(series.groups)
+    codes = np.asarray(codes, dtype=np.int64)
+    totals = np.zeros((len(group_labels), series.matrix.shape[1]))
+    np.add.at(totals, codes, series.matrix)
+
+    jobs, sections = [], []
+    overview = _panels(totals, [f"{g} ({int((codes == i).sum())} SKUs)" for i, g in enumerate(group_labels)],
+                       series.dates, points, method)
+    overview_pages = []
+    for p in range(0, len(overview), per_page):
+        png = f"{series.group_name}_totals_{p // per_page + 1:03d}.png"
+        jobs.append((png, f"Daily units per {series.group_name}", overview[p:p + per_page]))
+        overview_pages.append((png, [label for label, _, _ in overview[p:p + per_page]]))
+    sections.append((f"{series.group_name.title()} totals", overview_pages))
+
+    for i, group in enumerate(group_labels):
+        rows = np.flatnonzero(codes == i)
+        panels = _panels(series.matrix[rows], [series.skus[r] for r in rows], series.dates, points, method)
+        pages = []
+        for p in range(0, len(panels), per_page):
+            png = f"sku_{i:03d}_{_slug(group)}_{p // per_page + 1:03d}.png"
+            page = p // per_page + 1
+            jobs.append((png, f"{group}: daily units per SKU (page {page})", panels[p:p + per_page]))
+            pages.append((png, [label for label, _, _ in panels[p:p + per_page]]))
+        sections.append((f"{group} ({len(rows)} SKUs)", pages))
+
+    print(f"🎨 Rendering {len(jobs)} page(s) for {len(series.skus):,} SKUs ({workers} worker(s))...")
+    columns = min(PANEL_COLUMNS, per_page)
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            for future in [pool.submit(_render_page, os.path.join(out_dir, png), t, panels, columns, dpi)
+                           for png, t, panels in jobs]:
+                future.result()
+    else:
+        for png, t, panels in jobs:
+            _render_page(os.path.join(out_dir, png), t, panels, columns, dpi)
+    return _write_index(out_dir, title, sections)
+
+
+def create_gallery(path: str, out_dir: Optional[str] = None, points: int = DEFAULT_POINTS, method: str = 'lttb',
+                   workers: int = DEFAULT_WORKERS) -> str:
+    """Load ``path``, build its gallery and return the ``index.html`` path."""
+    out_dir = out_dir or f"{os.path.basename(path).split('.')[0]}_gallery"
+    print(f"📈 Building SKU gallery for: {path}")
+    series = load_sku_series(path, workers=workers)
+    print(f"📊 {len(series.skus):,} SKUs x {len(series.dates):,} days, "
+          f"{len(set(series.groups))} {series.group_name}(s); {method} to {points} points per series")
+    index = build_gallery(series, out_dir, points=points, method=method, workers=workers,
+                          title=f"SKU Sales Gallery: {os.path.basename(path)}")
+    print(f"📁 Gallery written to: {index}")
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render downsampled per-SKU charts into an HTML gallery")
+    parser.add_argument('input', help="Shopify-layout export or long sku/ds/y CSV (.csv, .csv.gz or .csv.zst)")
+    parser.add_argument('--out-dir', help="Output directory (default: <input>_gallery)")
+    parser.add_argument('--points', type=int, default=DEFAULT_POINTS, help="Points kept per series")
+    parser.add_argument('--method', choices=DOWNSAMPLE_METHODS, default='lttb')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+    create_gallery(args.input, args.out_dir, points=args.points, method=args.method, workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
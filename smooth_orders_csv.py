@@ -1,38 +1,89 @@
 import pandas as pd
 import numpy as np
-from datetime import timedelta, date
+from datetime import date
+
+from outlier_detection import outlier_bounds
+from output_writer import CompressedCSVWriter, with_compression_suffix
 
 # Parameters
 INPUT_FILE = 'orders_export_new.csv'
-OUTPUT_FILE = 'orders_export_smoothed.csv'
+OUTPUT_COMPRESSION = None  # "gzip" or "zstd" to compress the smoothed export
+OUTPUT_FILE = with_compression_suffix('orders_export_smoothed.csv', OUTPUT_COMPRESSION)
 MIN_DAYS = 30
 SMOOTH_WINDOW = 7  # days for moving average
 MAX_DAILY_CHANGE = 2  # max allowed change in sales per day
 TODAY = date(2025, 6, 9)
+SMOOTH_BLOCK_SKUS = 2048  # SKUs smoothed per block (bounds float temporaries)
+
+
+def load_orders(input_file=INPUT_FILE):
+    orders = pd.read_csv(input_file)
+    created = pd.to_datetime(orders['Created at'])
+    if created.dt.tz is not None:
+        created = created.dt.tz_localize(None)  # keep the local calendar day
+    # datetime64 days instead of Python date objects (8 bytes per row)
+    orders['date'] = created.dt.normalize()
+    return orders
+
+class SalesGrid:
+    """Dense SKUs x days sales matrix.
+
+    SKUs are categorical codes (``skus[code]`` is the label, sorted) and
+    days are integer offsets from ``start_day``, so the grid costs 4 bytes
+    per SKU-day instead of a MultiIndex of Python objects. Missing days are
+    simply zero cells.
+    """
+
+    def __init__(self, skus, start_day, sales):
+        self.skus = skus
+        self.start_day = pd.Timestamp(start_day)
+        self.sales = sales
 
-# Load data
-orders = pd.read_csv(INPUT_FILE)
-orders['date'] = pd.to_datetime(orders['Created at']).dt.date
+    @property
+    def n_days(self):
+        return self.sales.shape[1]
 
-# Aggregate sales per SKU per day
-daily = orders.groupby(['Lineitem sku', 'date']).size().reset_index(name='sales')
+    def days(self):
+        return pd.date_range(self.start_day, periods=self.n_days)
 
-# Ensure each SKU has at least MIN_DAYS of data (fill missing dates with 0)
-all_skus = daily['Lineitem sku'].unique()
-all_dates = pd.date_range(daily['date'].min(), daily['date'].max())
-full_idx = pd.MultiIndex.from_product([all_skus, all_dates], names=['Lineitem sku', 'date'])
-daily = daily.set_index(['Lineitem sku', 'date']).reindex(full_idx, fill_value=0).reset_index()
+    def select(self, mask):
+        """Grid restricted to the SKU rows in ``mask``"""
+        return SalesGrid(self.skus[mask], self.start_day, self.sales[mask])
+
+    def shifted_to(self, last_day):
+        """Same grid with all dates shifted so the latest is ``last_day``"""
+        return SalesGrid(self.skus, pd.Timestamp(last_day) - pd.Timedelta(days=self.n_days - 1), self.sales)
+
+def build_daily_grid(orders, today=TODAY):
+    """Sales (order lines) per SKU per day, zero-filled over the full date range (empty grid starts ``today``)"""
+    valid = (orders['Lineitem sku'].notna() & orders['date'].notna()).to_numpy()
+    sku_codes, skus = pd.factorize(orders['Lineitem sku'].to_numpy()[valid], sort=True)
+    days = orders['date'].to_numpy()[valid].astype('datetime64[D]')
+    if len(days) == 0:
+        return SalesGrid(skus, pd.Timestamp(today), np.zeros((0, 0), dtype=np.int32))
+    start_day = days.min()
+    day_offsets = (days - start_day).astype(np.int64)
+    n_days = int(day_offsets.max()) + 1
+    # Aggregate sales per SKU per day straight into the int32 cells
+    sales = np.zeros((len(skus), n_days), dtype=np.int32)
+    np.add.at(sales.reshape(-1), sku_codes * n_days + day_offsets, 1)
+    return SalesGrid(np.asarray(skus, dtype=object), start_day, sales)
 
 # --- Outlier capping using IQR (upper fence only) ---
-def cap_upper_outliers(s, k=1.5):
-    Q1 = s.quantile(0.25)
-    Q3 = s.quantile(0.75)
-    IQR = Q3 - Q1
-    upper = Q3 + k * IQR
-    capped = s.copy()
-    # Only cap values above upper fence
-    capped[s > upper] = upper
-    return capped
+def upper_fences(matrix, k=1.5):
+    """Per-row IQR upper fence (Q3 + k * IQR) of a SKUs x days matrix"""
+    return outlier_bounds(matrix, 'iqr', k)[1][:, 0]
+
+def centered_moving_average(matrix, window=SMOOTH_WINDOW):
+    """Centered rolling mean along days (min_periods=1), same window as pandas"""
+    n_days = matrix.shape[1]
+    csum = np.zeros((matrix.shape[0], n_days + 1))
+    np.cumsum(matrix, axis=1, out=csum[:, 1:])
+    # pandas centers a window by ending it (window - 1) // 2 days after the label
+    end = np.arange(n_days) + (window - 1) // 2
+    lo = np.maximum(end - window + 1, 0)
+    hi = np.minimum(end, n_days - 1) + 1
+    return (csum[:, hi] - csum[:, lo]) / (hi - lo)
 
 # --- Sanity check: percent of nonzero sales zeroed ---
 def percent_zeroed(original, smoothed):
@@ -42,63 +93,94 @@ def percent_zeroed(original, smoothed):
         return 0.0
     return 100 * zeroed.sum() / nonzero.sum()
 
-# Smoothing function
-# (apply outlier capping before smoothing)
+# Smoothing engine (outlier capping before smoothing), all SKUs at once
 def smooth_and_cap(sales, window=SMOOTH_WINDOW, max_change=MAX_DAILY_CHANGE):
+    """Cap, smooth and rate-limit a SKUs x days sales matrix.
+
+    Each row is capped at its own IQR upper fence and smoothed with a
+    centered moving average. Then the day-to-day change is limited to
+    ``max_change``. The limiter is sequential in time, so it is one loop
+    over days that updates every SKU at once.
+    """
+    sales = np.asarray(sales)
+    if sales.ndim == 1:
+        return smooth_and_cap(sales[None, :], window, max_change)[0]
+    if sales.shape[0] > SMOOTH_BLOCK_SKUS:
+        # Float intermediates are only ever allocated for one block of SKUs
+        out = np.empty(sales.shape, dtype=np.int32)
+        for start in range(0, sales.shape[0], SMOOTH_BLOCK_SKUS):
+            block = slice(start, start + SMOOTH_BLOCK_SKUS)
+            out[block] = smooth_and_cap(sales[block], window, max_change)
+        return out
+    sales = sales.astype(float)
     # Cap upper outliers only
-    capped = cap_upper_outliers(pd.Series(sales))
+    capped = np.minimum(sales, upper_fences(sales)[:, None])
     # Moving average
-    smoothed = capped.rolling(window, min_periods=1, center=True).mean()
+    smoothed = centered_moving_average(capped, window)
     # Cap daily change
-    capped2 = [smoothed.iloc[0]]
-    for s in smoothed.iloc[1:]:
-        prev = capped2[-1]
-        capped2.append(max(min(s, prev + max_change), prev - max_change))
-    return np.round(capped2).astype(int)
-
-daily['smoothed_sales'] = daily.groupby('Lineitem sku')['sales'].transform(smooth_and_cap)
-
-# Filter to SKUs with at least MIN_DAYS of nonzero sales
-good_skus = daily.groupby('Lineitem sku').apply(lambda g: (g['smoothed_sales'] > 0).sum() >= MIN_DAYS)
-good_skus = good_skus[good_skus].index
-smoothed = daily[daily['Lineitem sku'].isin(good_skus)]
-
-# --- Shift all dates so the latest is TODAY ---
-if not smoothed.empty:
-    max_date = smoothed['date'].max()
-    if hasattr(max_date, 'date'):
-        max_date = max_date.date()
-    date_shift = (TODAY - max_date).days
-    smoothed['date'] = smoothed['date'] + timedelta(days=date_shift)
-
-# Reconstruct orders: for each SKU/date, create that many order lines, copying template info from original orders
-rows = []
-for (sku, d), group in smoothed.groupby(['Lineitem sku', 'date']):
-    n = int(group['smoothed_sales'].iloc[0])
-    if n == 0:
-        continue
-    # Use a template row from original orders for this SKU
-    template = orders[orders['Lineitem sku'] == sku].iloc[0].copy()
+    for day in range(1, smoothed.shape[1]):
+        prev = smoothed[:, day - 1]
+        np.clip(smoothed[:, day], prev - max_change, prev + max_change, out=smoothed[:, day])
+    return np.round(smoothed).astype(np.int32)
+
+def reconstruct_orders(orders, grid, today=TODAY):
+    """Reconstruct orders: for each SKU/date, create that many order lines, copying template info from original orders.
+
+    The first original order line of every SKU is its template. Output rows
+    are one ``take`` of template positions repeated by the smoothed counts,
+    so the frame is allocated once; dates are rendered once per grid day.
+    """
+    # Nonzero cells in SKU-major, date-sorted order
+    sku_rows, day_cols = np.nonzero(grid.sales)
+    counts = grid.sales[sku_rows, day_cols]
+
+    # Use a template row from original orders for each SKU (SKU -> row position)
+    first_line = ~orders['Lineitem sku'].duplicated()
+    template_pos = pd.Series(np.flatnonzero(first_line.to_numpy()), index=orders['Lineitem sku'][first_line])
+    sku_template = template_pos.reindex(grid.skus).to_numpy()
+    rows = orders.take(np.repeat(sku_template[sku_rows], counts)).reset_index(drop=True)
+
     # Set all date fields to the shifted date
-    new_created_at = pd.Timestamp(d).strftime('%Y-%m-%d 00:00:00 -0400')
-    template['Created at'] = new_created_at
-    template['date'] = d
-    # Optionally update Paid at and Fulfilled at to be consistent and not in the future
-    template['Paid at'] = new_created_at
-    fulfilled_at = pd.Timestamp(d) + pd.Timedelta(days=2)
-    if fulfilled_at.date() > TODAY:
-        fulfilled_at = pd.Timestamp(TODAY)
-    template['Fulfilled at'] = fulfilled_at.strftime('%Y-%m-%d 00:00:00 -0400')
-    for _ in range(n):
-        rows.append(template.copy())
-
-# Create DataFrame and save
-smoothed_orders = pd.DataFrame(rows)
-smoothed_orders.to_csv(OUTPUT_FILE, index=False)
-
-# --- After smoothing, check for excessive zeroing ---
-zeroed_pct = percent_zeroed(daily['sales'], daily['smoothed_sales'])
-if zeroed_pct > 5:
-    print(f"WARNING: {zeroed_pct:.2f}% of nonzero sales were zeroed after smoothing! Check your pipeline.")
-
-print(f"Smoothed orders saved to {OUTPUT_FILE}. Total rows: {len(smoothed_orders)}")
+    days = grid.days()
+    new_created_at = days.strftime('%Y-%m-%d 00:00:00 -0400').to_numpy(dtype=object)
+    # Paid at and Fulfilled at are consistent and not in the future
+    fulfilled_days = days + pd.Timedelta(days=2)
+    fulfilled_days = fulfilled_days.where(fulfilled_days <= pd.Timestamp(today), pd.Timestamp(today))
+    fulfilled_at = fulfilled_days.strftime('%Y-%m-%d 00:00:00 -0400').to_numpy(dtype=object)
+    line_days = np.repeat(day_cols, counts)
+    rows['Created at'] = new_created_at[line_days]
+    rows['Paid at'] = rows['Created at']
+    rows['Fulfilled at'] = fulfilled_at[line_days]
+    rows['date'] = days[line_days]
+    return rows
+
+def smooth_file(input_file=INPUT_FILE, output_file=OUTPUT_FILE, compression=OUTPUT_COMPRESSION, min_days=MIN_DAYS,
+                window=SMOOTH_WINDOW, max_change=MAX_DAILY_CHANGE, today=TODAY):
+    """Smooth ``input_file`` into ``output_file``; returns the number of order lines written"""
+    orders = load_orders(input_file)
+    grid = build_daily_grid(orders, today)
+    smoothed_sales = smooth_and_cap(grid.sales, window, max_change)
+    smoothed = SalesGrid(grid.skus, grid.start_day, smoothed_sales)
+
+    # Filter to SKUs with at least min_days of nonzero sales
+    good_skus = (smoothed.sales > 0).sum(axis=1) >= min_days
+    # --- Shift all dates so the latest is today ---
+    smoothed = smoothed.select(good_skus).shifted_to(today)
+
+    smoothed_orders = reconstruct_orders(orders, smoothed, today)
+    with CompressedCSVWriter(output_file, compression=compression) as writer:
+        writer.write_frame(smoothed_orders)
+
+    # --- After smoothing, check for excessive zeroing ---
+    zeroed_pct = percent_zeroed(grid.sales, smoothed_sales)
+    if zeroed_pct > 5:
+        print(f"WARNING: {zeroed_pct:.2f}% of nonzero sales were zeroed after smoothing! Check your pipeline.")
+
+    print(f"Smoothed orders saved to {output_file}. Total rows: {len(smoothed_orders)}")
+    return len(smoothed_orders)
+
+def main():
+    smooth_file()
+
+if __name__ == '__main__':
+    main()
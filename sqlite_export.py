@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+"""
+SQLite Order Export for Forezia Mock Data
+Bulk-loads Shopify-layout order lines into normalized orders / line_items / products / customers
+tables and answers ad hoc queries (by SKU, date range, country, discount code) through indexes
+"""
+
+import argparse
+import os
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from output_writer import open_compressed_text
+from shopify_schema import SHOPIFY_COLUMNS
+
+SQLITE_SUFFIXES = ('.sqlite', '.sqlite3', '.db')
+DEFAULT_BATCH_SIZE = 50000      # order lines per executemany batch
+DEFAULT_COMMIT_ROWS = 1000000   # order lines per transaction
+LOAD_CACHE_KB = 262144          # page cache while loading / indexing (256 MB)
+
+# Shopify column -> (table column, SQL type); blanks are stored as NULL. Columns the
+# generator never fills (timestamps equal to Created at, tags, ...) are not exported.
+CUSTOMER_COLUMNS = {
+    'Email': ('email', 'TEXT'),
+    'Billing Name': ('name', 'TEXT'),
+    'Phone': ('phone', 'TEXT'),
+    'Accepts Marketing': ('accepts_marketing', 'TEXT'),
+}
+PRODUCT_COLUMNS = {
+    'Lineitem sku': ('sku', 'TEXT'),
+    'Lineitem name': ('name', 'TEXT'),
+    'Vendor': ('vendor', 'TEXT'),
+    'Lineitem requires shipping': ('requires_shipping', 'BOOL'),
+    'Lineitem taxable': ('taxable', 'BOOL'),
+    'Lineitem grams': ('grams', 'REAL'),
+}
+ORDER_COLUMNS = {
+    'Name': ('name', 'TEXT'),
+    'Created at': ('created_at', 'TEXT'),
+    'Financial Status': ('financial_status', 'TEXT'),
+    'Fulfillment Status': ('fulfillment_status', 'TEXT'),
+    'Cancelled at': ('cancelled_at', 'TEXT'),
+    'Currency': ('currency', 'TEXT'),
+    'Subtotal': ('subtotal', 'REAL'),
+    'Shipping': ('shipping', 'REAL'),
+    'Taxes': ('taxes', 'REAL'),
+    'Total': ('total', 'REAL'),
+    'Discount Code': ('discount_code', 'TEXT'),
+    'Discount Amount': ('discount_amount', 'REAL'),
+    'discount_ratio': ('discount_ratio', 'REAL'),
+    'Refunded Amount': ('refunded_amount', 'REAL'),
+    'Shipping Method': ('shipping_method', 'TEXT'),
+    'Payment Method': ('payment_method', 'TEXT'),
+    'Billing Country': ('billing_country', 'TEXT'),
+    'Shipping City': ('shipping_city', 'TEXT'),
+    'Shipping Province': ('shipping_province', 'TEXT'),
+    'Shipping Country': ('shipping_country', 'TEXT'),
+    'Shipping Zip': ('shipping_zip', 'TEXT'),
+    'is_holiday': ('is_holiday', 'BOOL'),
+    'is_weekend': ('is_weekend', 'BOOL'),
+}
+LINE_ITEM_COLUMNS = {
+    'Lineitem quantity': ('quantity', 'INTEGER'),
+    'Lineitem price': ('price', 'REAL'),
+    'Lineitem compare at price': ('compare_at_price', 'REAL'),
+    'Lineitem discount': ('discount', 'REAL'),
+    'Lineitem fulfillment status': ('fulfillment_status', 'TEXT'),
+    'stockout': ('stockout', 'BOOL'),
+}
+
+
+def _columns_sql(columns: Dict[str, tuple]) -> str:
+    return ''.join(f",\n    {name} {'INTEGER' if kind == 'BOOL' else kind}" for name, kind in columns.values())
+
+
+SCHEMA_SQL = f"""
+CREATE TABLE customers (
+    customer_id INTEGER PRIMARY KEY{_columns_sql(CUSTOMER_COLUMNS)}
+);
+CREATE TABLE products (
+    product_id INTEGER PRIMARY KEY{_columns_sql(PRODUCT_COLUMNS)}
+);
+CREATE TABLE orders (
+    order_id INTEGER PRIMARY KEY,
+    customer_id INTEGER REFERENCES customers(customer_id),
+    day TEXT{_columns_sql(ORDER_COLUMNS)}
+);
+CREATE TABLE line_items (
+    line_id INTEGER PRIMARY KEY,
+    order_id INTEGER NOT NULL REFERENCES orders(order_id),
+    product_id INTEGER REFERENCES products(product_id){_columns_sql(LINE_ITEM_COLUMNS)}
+);
+"""
+
+# Built after the load: maintaining them row by row would slow every insert down
+INDEX_SQL = """
+CREATE UNIQUE INDEX IF NOT EXISTS customers_email ON customers (email);
+CREATE INDEX IF NOT EXISTS products_sku ON products (sku);
+CREATE INDEX IF NOT EXISTS orders_day ON orders (day);
+CREATE INDEX IF NOT EXISTS orders_country_day ON orders (shipping_country, day);
+CREATE INDEX IF NOT EXISTS orders_discount_code ON orders (discount_code) WHERE discount_code IS NOT NULL;
+CREATE INDEX IF NOT EXISTS orders_customer ON orders (customer_id);
+CREATE INDEX IF NOT EXISTS line_items_order ON line_items (order_id);
+CREATE INDEX IF NOT EXISTS line_items_product ON line_items (product_id, order_id);
+ANALYZE;
+"""
+
+
+NULLIF_PARAM = "NULLIF(?, '')"
+BOOL_VALUES = {'true': 1, 'false': 0, 'True': 1, 'False': 0, 'TRUE': 1, 'FALSE': 0, 'yes': 1, 'no': 0,
+               True: 1, False: 0}
+
+
+def is_sqlite_path(path: str) -> bool:
+    """True for output paths that should be written as a SQLite database."""
+    return str(path).lower().endswith(SQLITE_SUFFIXES)
+
+
+def _insert_sql(table: str, keys: Sequence[str], columns: Dict[str, tuple]) -> str:
+    """INSERT for the id/key columns plus ``columns``; bound '' values become NULL.
+
+    Blanks are bound as '' and turned into NULL by ``NULLIF`` inside SQLite:
+    binding Python ``None`` goes through sqlite3's adapter lookup and costs
+    more than twice as much per value.
+    """
+    names = list(keys) + [name for name, _ in columns.values()]
+    return f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join([NULLIF_PARAM] * len(names))})"
+
+
+def _text(values: pd.Series) -> np.ndarray:
+    text = values.to_numpy(dtype=object, copy=True)
+    text[pd.isna(text)] = ''
+    return text
+
+
+def _sql_values(values: pd.Series, kind: str) -> np.ndarray:
+    """One column as objects sqlite3 binds cheaply ('' for blanks).
+
+    Numbers are passed through as text: the REAL / INTEGER column affinity
+    converts well-formed numeric strings inside SQLite, which is much
+    cheaper than parsing them in pandas first.
+    """
+    if kind == 'BOOL':
+        return _text(values.map(BOOL_VALUES))
+    return _text(values)
+
+
+def _table_rows(frame: pd.DataFrame, columns: Dict[str, tuple], *keys: np.ndarray) -> List[tuple]:
+    arrays = list(keys)
+    for source, (_, kind) in columns.items():
+        arrays.append(_sql_values(frame[source], kind) if source in frame else np.full(len(frame), '', object))
+    return list(zip(*arrays))
+
+
+class SQLiteOrderWriter:
+    """Writes Shopify-layout order lines into a normalized SQLite database.
+
+    Accepts the same calls as ``CompressedCSVWriter`` (``writeheader``,
+    ``writerow``/``writerows`` with dicts, ``write_frame``), so the
+    generator and the converters can switch backend by output path. Lines
+    are buffered and inserted with ``executemany`` in batches, many batches
+    per transaction, with journaling and syncing off during the load (the
+    file is rebuilt from scratch on every run). Indexes are created and
+    ``ANALYZE`` run once the load is complete.
+
+    Rows are expected in export order: an order's lines are consecutive
+    (same Name, possibly split across batches) and its first line carries
+    the order-level fields.
+    """
+
+    def __init__(self, path: str, fieldnames: Optional[Sequence[str]] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, commit_rows: int = DEFAULT_COMMIT_ROWS):
+        self.path = path
+        self.fieldnames = list(fieldnames) if fieldnames is not None else list(SHOPIFY_COLUMNS)
+        self.batch_size = max(1, batch_size)
+        self.commit_rows = max(self.batch_size, commit_rows)
+        self.rows_written = 0
+        self.orders_written = 0
+
+        self._batch: List = []
+        self._customer_ids: Dict[str, int] = {}
+        self._product_ids: Dict[str, int] = {}
+        self._uncommitted = 0
+        self._insert_seconds = 0.0
+        self._last_name = None
+        self._closed = False
+        self._started = time.perf_counter()
+
+        if os.path.exists(path):
+            os.remove(path)
+        self._conn = sqlite3.connect(path, isolation_level=None)
+        for pragma in ('journal_mode = OFF', 'synchronous = OFF', 'temp_store = MEMORY',
+                       f'cache_size = -{LOAD_CACHE_KB}'):
+            self._conn.execute(f"PRAGMA {pragma}")
+        self._conn.executescript(SCHEMA_SQL)
+        self._conn.execute("BEGIN")
+
+    # ------------------------------------------------------------------
+    # Public API (mirrors CompressedCSVWriter)
+    # ------------------------------------------------------------------
+    def writeheader(self):
+        """No-op: the schema is created on open (kept for writer compatibility)."""
+
+    def writerow(self, row):
+        self._batch.append(row)
+        if len(self._batch) >= self.batch_size:
+            self._flush_batch()
+
+    def writerows(self, rows: Iterable):
+        for row in rows:
+            self._batch.append(row)
+            if len(self._batch) >= self.batch_size:
+                self._flush_batch()
+
+    def write_frame(self, df: pd.DataFrame, header: Optional[bool] = None):
+        """Insert a Shopify-layout DataFrame in batch-sized slices."""
+        self._flush_batch()
+        for start in range(0, len(df), self.batch_size):
+            self._load(df.iloc[start:start + self.batch_size])
+
+    def close(self) -> Dict[str, float]:
+        """Finish the load, build the indexes and return load statistics."""
+        if self._closed:
+            return self.stats
+        self._closed = True
+        try:
+            self._flush_batch()
+            self._conn.execute("COMMIT")
+            indexing = time.perf_counter()
+            self._conn.executescript(INDEX_SQL)
+            self.stats = {
+                'orders': self.orders_written, 'line_items': self.rows_written,
+                'products': len(self._product_ids), 'customers': len(self._customer_ids),
+                'insert_seconds': self._insert_seconds,  # converting + inserting, not waiting for rows
+                'index_seconds': time.perf_counter() - indexing,
+                'total_seconds': time.perf_counter() - self._started,
+            }
+        finally:
+            self._conn.close()
+        return self.stats
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    # ------------------------------------------------------------------
+    # Internals
+    # ------------------------------------------------------------------
+    def _flush_batch(self):
+        if not self._batch:
+            return
+        batch, self._batch = self._batch, []
+        if isinstance(batch[0], dict):
+            frame = pd.DataFrame.from_records(batch, columns=self.fieldnames)
+        else:
+            frame = pd.DataFrame(batch, columns=self.fieldnames)
+        self._load(frame)
+
+    def _assign_ids(self, keys: np.ndarray, ids: Dict[str, int], table: str, frame: pd.DataFrame,
+                    columns: Dict[str, tuple]) -> np.ndarray:
+        """Map keys to ids, inserting a row for every key seen for the first time."""
+        new = pd.Series(keys).drop_duplicates()
+        new = new[(new != '') & ~new.isin(ids.keys())]
+        if len(new):
+            first_id = len(ids) + 1
+            ids.update(zip(new.tolist(), range(first_id, first_id + len(new))))
+            rows = frame.iloc[new.index]
+            self._conn.executemany(
+                _insert_sql(table, [f'{table[:-1]}_id'], columns),
+                _table_rows(rows, columns, np.arange(first_id, first_id + len(new)).astype(object)))
+        return _text(pd.Series(keys).map(ids))
+
+    def _load(self, frame: pd.DataFrame):
+        if not len(frame):
+            return
+        started = time.perf_counter()
+        frame = frame.reset_index(drop=True)
+        # A new order starts wherever Name changes (also across batches); its first line
+        # carries the order-level fields and its other lines get the same order id
+        names = _text(frame['Name'])
+        is_main = np.empty(len(names), dtype=bool)
+        is_main[0] = names[0] != self._last_name
+        is_main[1:] = names[1:] != names[:-1]
+        self._last_name = names[-1]
+        order_ids = self.orders_written + np.cumsum(is_main)
+
+        # A product is a distinct (sku, name, vendor); converted exports may list one sku under several vendors
+        keys = pd.Series(_text(frame['Lineitem sku'])).str.cat([pd.Series(_text(frame[column]))
+                                                               for column in ('Lineitem name', 'Vendor')], sep='\x1f')
+        keys = np.where(keys == '\x1f\x1f', '', keys.to_numpy(dtype=object))
+        product_ids = self._assign_ids(keys, self._product_ids, 'products', frame, PRODUCT_COLUMNS)
+
+        orders = frame[is_main].reset_index(drop=True)
+        if len(orders):
+            customer_ids = self._assign_ids(_text(orders['Email']), self._customer_ids, 'customers', orders,
+                                            CUSTOMER_COLUMNS)
+            days = _text(pd.Series(_text(orders['Created at'])).str.slice(0, 10))
+            self._conn.executemany(
+                _insert_sql('orders', ['order_id', 'customer_id', 'day'], ORDER_COLUMNS),
+                _table_rows(orders, ORDER_COLUMNS, order_ids[is_main].astype(object), customer_ids, days))
+
+        line_ids = np.arange(self.rows_written + 1, self.rows_written + len(frame) + 1)
+        self._conn.executemany(
+            _insert_sql('line_items', ['line_id', 'order_id', 'product_id'], LINE_ITEM_COLUMNS),
+            _table_rows(frame, LINE_ITEM_COLUMNS, line_ids.astype(object), order_ids.astype(object), product_ids))
+
+        self.rows_written += len(frame)
+        self.orders_written += int(is_main.sum())
+        self._uncommitted += len(frame)
+        if self._uncommitted >= self.commit_rows:
+            self._conn.execute("COMMIT")
+            self._conn.execute("BEGIN")
+            self._uncommitted = 0
+        self._insert_seconds += time.perf_counter() - started
+
+
+def load_csv(input_path: str, db_path: str, chunk_size: int = DEFAULT_COMMIT_ROWS) -> Dict[str, float]:
+    """Load a Shopify-layout CSV (.csv, .csv.gz or .csv.zst) into a new database."""
+    columns = set(CUSTOMER_COLUMNS) | set(PRODUCT_COLUMNS) | set(ORDER_COLUMNS) | set(LINE_ITEM_COLUMNS)
+    with open_compressed_text(input_path) as f, SQLiteOrderWriter(db_path) as writer:
+        for chunk in pd.read_csv(f, dtype=str, keep_default_na=False, chunksize=chunk_size,
+                                 usecols=lambda column: column in columns):
+            writer.write_frame(chunk)
+    return writer.stats
+
+
+# ----------------------------------------------------------------------
+# Queries
+# ----------------------------------------------------------------------
+GROUP_KEYS = {
+    'day': 'o.day',
+    'month': 'substr(o.day, 1, 7)',
+    'sku': 'p.sku',
+    'vendor': 'p.vendor',
+    'country': 'o.shipping_country',
+    'discount_code': 'o.discount_code',
+}
+
+
+def query_sales(db_path: str, by: str = 'day', sku: Optional[str] = None, start: Optional[str] = None,
+                end: Optional[str] = None, country: Optional[str] = None,
+                discount_code: Optional[str] = None) -> pd.DataFrame:
+    """Orders, units and line revenue grouped ``by`` one of ``GROUP_KEYS``, for lines matching every filter.
+
+    ``start`` / ``end`` are inclusive ``YYYY-MM-DD`` days.
+    """
+    if by not in GROUP_KEYS:
+        raise ValueError(f"Unknown grouping '{by}'. Use one of: {', '.join(GROUP_KEYS)}")
+    conditions, params = [], []
+    for clause, value in (('p.sku = ?', sku), ('o.day >= ?', start), ('o.day <= ?', end),
+                          ('o.shipping_country = ?', country), ('o.discount_code = ?', discount_code)):
+        if value is not None:
+            conditions.append(clause)
+            params.append(value)
+    sql = (f"SELECT {GROUP_KEYS[by]} AS {by}, COUNT(DISTINCT o.order_id) AS orders, "
+           f"SUM(li.quantity) AS units, ROUND(SUM(li.quantity * li.price), 2) AS revenue "
+           f"FROM line_items li JOIN orders o ON o.order_id = li.order_id "
+           f"LEFT JOIN products p ON p.product_id = li.product_id "
+           f"{'WHERE ' + ' AND '.join(conditions) if conditions else ''} GROUP BY 1 ORDER BY 1")
+    with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+def run_sql(db_path: str, sql: str) -> pd.DataFrame:
+    """Run a read-only SQL query against an exported database."""
+    with sqlite3.connect(f"file:{db_path}?mode=ro", uri=True) as conn:
+        return pd.read_sql_query(sql, conn)
+
+
+def print_load_stats(stats: Dict[str, float], path: str):
+    rows = stats['line_items'] + stats['orders'] + stats['products'] + stats['customers']
+    rate = rows / stats['insert_seconds'] if stats['insert_seconds'] else 0
+    print(f"🗄️  Loaded {stats['line_items']:,} line items / {stats['orders']:,} orders / {stats['products']:,} products "
+          f"/ {stats['customers']:,} customers into {path}")
+    print(f"   - Inserts: {stats['insert_seconds']:.1f}s ({rate:,.0f} rows/s), indexes: {stats['index_seconds']:.1f}s, "
+          f"total: {stats['total_seconds']:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load Shopify-layout orders into SQLite and query them")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    load = commands.add_parser('load', help="Load a Shopify-layout CSV into a new database")
+    load.add_argument('input')
+    load.add_argument('database')
+
+    query = commands.add_parser('query', help="Orders, units and revenue for a SKU / date range / country / code")
+    query.add_argument('database')
+    query.add_argument('--by', choices=sorted(GROUP_KEYS), default='day')
+    query.add_argument('--sku')
+    query.add_argument('--start', help="First day (YYYY-MM-DD)")
+    query.add_argument('--end', help="Last day (YYYY-MM-DD)")
+    query.add_argument('--country', help="Shipping country code, e.g. US")
+    query.add_argument('--discount-code')
+
+    sql = commands.add_parser('sql', help="Run a read-only SQL statement")
+    sql.add_argument('database')
+    sql.add_argument('statement')
+
+    args = parser.parse_args()
+    if args.command == 'load':
+        print_load_stats(load_csv(args.input, args.database), args.database)
+        return
+    if args.command == 'query':
+        result = query_sales(args.database, args.by, args.sku, args.start, args.end, args.country, args.discount_code)
+    else:
+        result = run_sql(args.database, args.statement)
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(result.to_string(index=False) if len(result) else "(no rows)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Streaming Statistics for Large Order Exports
+Order-value quantiles, cardinalities and top products from mergeable sketches, in constant memory
+"""
+
+import argparse
+from functools import partial
+from typing import Dict
+
+import pandas as pd
+
+from csv_scanner import Aggregate, DEFAULT_WORKERS, main_order_rows, register_aggregate, scan_csv
+from incremental_analytics import print_daily_trends
+from sketches import HyperLogLog, TDigest, TopK
+
+QUANTILES = (0.5, 0.9, 0.99)
+TOP_PRODUCTS = 5
+
+
+# ----------------------------------------------------------------------
+# Aggregates (one fixed-size sketch per range, merged across workers)
+# ----------------------------------------------------------------------
+def _order_value_digest(frame):
+    total = pd.to_numeric(main_order_rows(frame)['Total'], errors='coerce')
+    return TDigest().add(total.to_numpy())
+
+
+def _distinct(column, frame):
+    values = frame[column]
+    return HyperLogLog().add(values[values != ''].to_numpy())
+
+
+def _top(column, frame):
+    values = frame[column]
+    counts = values[values != ''].value_counts()
+    return TopK().add(counts.index.to_numpy(), counts.to_numpy())
+
+
+for _aggregate in (
+    Aggregate('order_value_digest', ('Financial Status', 'Created at', 'Total'), _order_value_digest,
+              "Order value distribution (t-digest)", merge=TDigest.merge_all),
+    Aggregate('customer_emails', ('Email',), partial(_distinct, 'Email'), "Distinct customers (HyperLogLog)",
+              merge=HyperLogLog.merge_all),
+    Aggregate('product_names', ('Lineitem name',), partial(_distinct, 'Lineitem name'),
+              "Distinct products (HyperLogLog)", merge=HyperLogLog.merge_all),
+    Aggregate('product_topk', ('Lineitem name',), partial(_top, 'Lineitem name'),
+              "Most sold products (count-min top-k)", merge=TopK.merge_all),
+    Aggregate('vendor_topk', ('Vendor',), partial(_top, 'Vendor'),
+              "Vendors with most line items (count-min top-k)", merge=TopK.merge_all),
+):
+    register_aggregate(_aggregate)
+
+# daily_summary / order_names come from incremental_analytics; both are bounded by the date range
+STREAMING_AGGREGATES = ('daily_summary', 'order_names', 'order_value_digest', 'customer_emails',
+                        'product_names', 'product_topk', 'vendor_topk')
+
+
+def streaming_stats(path: str, workers: int = DEFAULT_WORKERS) -> Dict[str, object]:
+    """Scan ``path`` once and return the merged sketches (see ``STREAMING_AGGREGATES``)."""
+    return scan_csv(path, STREAMING_AGGREGATES, workers=workers)
+
+
+# ----------------------------------------------------------------------
+# Report (same sections as analyze_synthetic_data.py, estimates marked ~)
+# ----------------------------------------------------------------------
+def print_streaming_report(results: Dict[str, object]):
+    daily = results['daily_summary']
+    digest = results['order_value_digest']
+    orders = int(daily['orders'].sum())
+    revenue = daily['revenue'].sum()
+
+    print(f"\n📊 Basic Statistics:")
+    print(f"   - Total rows: {results['rows']:,}")
+    print(f"   - Unique orders: ~{results['order_names'].count():,}")
+    print(f"   - Unique customers: ~{results['customer_emails'].count():,}")
+    if len(daily):
+        print(f"   - Date range: {daily.index.min()} to {daily.index.max()}")
+
+    if orders:
+        print(f"\n💰 Revenue Analysis:")
+        print(f"   - Total revenue: ${revenue:,.2f}")
+        print(f"   - Average order value: ${revenue / orders:.2f}")
+        print(f"   - Min order value: ${digest.min:.2f}")
+        for q, value in zip(QUANTILES, digest.quantile(QUANTILES)):
+            print(f"   - p{q * 100:g} order value: ~${value:.2f}")
+        print(f"   - Max order value: ${digest.max:.2f}")
+
+    print_daily_trends(daily)
+
+    print(f"\n🧸 Product Analysis:")
+    print(f"   - Unique products sold: ~{results['product_names'].count()}")
+    print(f"   - Top {TOP_PRODUCTS} products:")
+    for i, (product, count) in enumerate(results['product_topk'].top(TOP_PRODUCTS).items(), 1):
+        print(f"     {i}. {product}: ~{count} units")
+
+    print(f"\n🏭 Vendor Analysis:")
+    print(f"   - Top {TOP_PRODUCTS} vendors:")
+    for i, (vendor, count) in enumerate(results['vendor_topk'].top(TOP_PRODUCTS).items(), 1):
+        print(f"     {i}. {vendor}: ~{count} line items")
+
+
+def analyze_streaming(path: str, workers: int = DEFAULT_WORKERS):
+    """Print the analysis report for ``path`` without loading it into memory."""
+    print(f"🔍 Analyzing synthetic data (streaming): {path}")
+    print_streaming_report(streaming_stats(path, workers=workers))
+    print(f"\n✅ Analysis complete!")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Constant-memory statistics for a Shopify-layout export")
+    parser.add_argument('input', help="Shopify-layout CSV (.csv, .csv.gz or .csv.zst)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    args = parser.parse_args()
+    analyze_streaming(args.input, workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,15 +10,15 @@ import seaborn as sns
 from datetime import datetime
 import numpy as np
 
+from data_loader import load_orders
+
 def create_sales_visualizations(filename):
     """Create visualizations to show sales patterns."""
     print(f"📈 Creating visualizations for: {filename}")
     
     # Load and prepare data
-    df = pd.read_csv(filename)
+    df = load_orders(filename)
     main_orders = df[df['Financial Status'].notna() & (df['Financial Status'] != '')].copy()
-    main_orders['Created at'] = pd.to_datetime(main_orders['Created at'])
-    main_orders['Total'] = main_orders['Total'].astype(float)
     main_orders['Date'] = main_orders['Created at'].dt.date
     main_orders['Month'] = main_orders['Created at'].dt.to_period('M')
     main_orders['Weekday'] = main_orders['Created at'].dt.day_name()
@@ -91,13 +91,25 @@ def create_sales_visualizations(filename):
     return output_file
 
 if __name__ == "__main__":
-    import glob
-    import os
-    
-    # Find the most recent synthetic file
-    synthetic_files = glob.glob("toy_sales_synthetic_*.csv")
-    if synthetic_files:
-        latest_file = max(synthetic_files, key=os.path.getctime)
-        create_sales_visualizations(latest_file)
+    import argparse
+
+    from dataset_catalog import add_lookup_arguments, lookup_from_args
+
+    parser = argparse.ArgumentParser(description="Visualize synthetic toy sales data patterns")
+    parser.add_argument('file', nargs='?', help="Export to visualize (default: newest matching dataset in the catalog)")
+    parser.add_argument('--gallery', metavar='DIR',
+                        help="Also render downsampled per-SKU / per-vendor charts into an HTML gallery in DIR")
+    add_lookup_arguments(parser)
+    args = parser.parse_args()
+
+    # Newest matching dataset from the catalog unless a file is given
+    latest_file = args.file or lookup_from_args(args)
+    if latest_file is None:
+        print("❌ No matching synthetic dataset in the catalog! Generate one, or register an existing file with:")
+        print("   python dataset_catalog.py register <file>")
     else:
-        print("❌ No synthetic data files found!")
+        create_sales_visualizations(latest_file)
+        if args.gallery:
+            from sku_gallery import create_gallery
+
+            create_gallery(latest_file, args.gallery)